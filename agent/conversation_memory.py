@@ -0,0 +1,262 @@
+"""
+세션별 대화 기록(토큰 예산 고정)
+
+MemoryAgent가 턴마다 그래프에 넘길 이전 대화 맥락을 관리한다.
+- 최근 턴은 고정 길이 링 버퍼에 (사용자, 응답, 토큰 수) 튜플로 보관한다.
+- 최근 턴 합계가 토큰 예산을 넘으면 오래된 턴부터 밀어낸다(롤링 절단).
+- 요약기가 있으면 밀려난 턴을 백그라운드에서 요약에 합치고, 요약도 별도 예산 안으로 자른다.
+따라서 대화가 길어져도 노드 프롬프트에 실리는 기록은 token_budget을 넘지 않는다.
+
+설정(환경변수):
+    MEMORY_MAX_TURNS=20          보관할 최근 턴 수(0이면 기록 끔)
+    MEMORY_TOKEN_BUDGET=1000     요약 + 최근 턴의 토큰 상한
+    MEMORY_SUMMARY=off           on이면 밀려난 턴을 NODE_SUMMARY LLM으로 요약
+    MEMORY_SUMMARY_TOKENS=200    요약의 토큰 상한(token_budget에 포함)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+# (사용자 입력, 응답, 토큰 수)
+Turn = Tuple[str, str, int]
+Summarizer = Callable[[str, Sequence[Tuple[str, str]]], Awaitable[str]]
+
+_SUMMARY_PREFIX = "[이전 대화 요약]\n"
+
+
+def approx_tokens(text: str) -> int:
+    """대략적인 토큰 수. ASCII는 4자당 1토큰, 한글 등 그 외 문자는 1자당 1토큰으로 보수적으로 센다."""
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def truncate_to_tokens(text: str, budget: int, keep: str = "head") -> str:
+    """토큰 추정치가 budget 이하가 되도록 앞(head) 또는 뒤(tail)를 남기고 자른다."""
+    if budget <= 0:
+        return ""
+    if approx_tokens(text) <= budget:
+        return text
+    # 문자 단위 이분 탐색으로 남길 길이를 찾는다.
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        piece = text[:mid] if keep == "head" else text[-mid:]
+        if approx_tokens(piece) + 1 <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return (text[:lo] + "…") if keep == "head" else ("…" + text[-lo:] if lo else "")
+
+
+class ConversationMemory:
+    """
+    한 세션의 대화 기록. 추가/조회는 O(턴 수)이고 동기 코드와 백그라운드 루프에서 함께 사용할 수 있다.
+
+    Args:
+        max_turns: 링 버퍼에 보관할 최근 턴 수
+        token_budget: 요약 + 최근 턴의 토큰 상한
+        summary_tokens: 요약의 토큰 상한(요약기가 없으면 0으로 취급)
+        summarizer: async (기존 요약, 밀려난 턴 목록) -> 새 요약. 없으면 밀려난 턴은 버린다.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 20,
+        token_budget: int = 1000,
+        summary_tokens: int = 200,
+        summarizer: Optional[Summarizer] = None,
+    ) -> None:
+        self.max_turns = max(0, max_turns)
+        self.token_budget = max(0, token_budget)
+        self.summary_tokens = min(max(0, summary_tokens), self.token_budget) if summarizer else 0
+        self._summarizer = summarizer
+        self._lock = threading.Lock()
+        self._turns: Deque[Turn] = deque(maxlen=self.max_turns or 1)
+        self._turn_tokens = 0
+        self._summary = ""
+        self._pending: List[Tuple[str, str]] = []
+        self._summary_task: Optional[Any] = None
+        self.evicted = 0
+        self.summaries = 0
+
+    @property
+    def _turn_budget(self) -> int:
+        return self.token_budget - self.summary_tokens
+
+    def add(self, user_input: str, output: str) -> None:
+        """턴을 기록하고 예산을 넘는 오래된 턴을 밀어낸다. 밀려난 턴이 있으면 요약을 예약한다."""
+        if self.max_turns == 0 or self._turn_budget <= 0:
+            return
+        # 한 턴이 예산의 절반을 넘지 않도록 각 발화를 자른다(앞부분을 남긴다).
+        per_utterance = max(1, self._turn_budget // 4)
+        user_input = truncate_to_tokens(user_input, per_utterance)
+        output = truncate_to_tokens(output, per_utterance)
+        tokens = approx_tokens(user_input) + approx_tokens(output)
+        with self._lock:
+            if len(self._turns) == self._turns.maxlen:
+                self._evict_oldest()
+            self._turns.append((user_input, output, tokens))
+            self._turn_tokens += tokens
+            while self._turn_tokens > self._turn_budget and len(self._turns) > 1:
+                self._evict_oldest()
+            schedule = bool(self._pending) and self._summarizer is not None
+        if schedule:
+            self._schedule_summary()
+
+    def _evict_oldest(self) -> None:
+        user_input, output, tokens = self._turns.popleft()
+        self._turn_tokens -= tokens
+        self.evicted += 1
+        if self._summarizer is not None:
+            self._pending.append((user_input, output))
+
+    def messages(self) -> List["BaseMessage"]:
+        """그래프에 넘길 기록: 요약(SystemMessage) + 최근 턴(Human/AI 메시지 쌍)."""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+        with self._lock:
+            summary = self._summary
+            turns = list(self._turns)
+        history: List[BaseMessage] = []
+        if summary:
+            history.append(SystemMessage(content=_SUMMARY_PREFIX + summary))
+        for user_input, output, _ in turns:
+            history.append(HumanMessage(content=user_input))
+            history.append(AIMessage(content=output))
+        return history
+
+    def restore(self, history: Sequence["BaseMessage"]) -> None:
+        """messages() 형식의 기록(요약 + Human/AI 쌍)으로 비어 있는 기록을 채운다. 예산은 add()와 같이 적용된다."""
+        user_input: Optional[str] = None
+        for message in history:
+            content = message.content if isinstance(message.content, str) else str(message.content)
+            if message.type == "system" and content.startswith(_SUMMARY_PREFIX):
+                with self._lock:
+                    self._summary = truncate_to_tokens(content[len(_SUMMARY_PREFIX):], self.summary_tokens, keep="tail")
+            elif message.type == "human":
+                user_input = content
+            elif message.type == "ai" and user_input is not None:
+                self.add(user_input, content)
+                user_input = None
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not self._turns and not self._summary
+
+    def token_count(self) -> int:
+        with self._lock:
+            return self._turn_tokens + approx_tokens(self._summary)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._turns.clear()
+            self._turn_tokens = 0
+            self._summary = ""
+            self._pending.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "turns": len(self._turns),
+                "turn_tokens": self._turn_tokens,
+                "summary_tokens": approx_tokens(self._summary),
+                "pending": len(self._pending),
+                "evicted": self.evicted,
+                "summaries": self.summaries,
+            }
+
+    # ---- 백그라운드 요약 ----
+
+    def _schedule_summary(self) -> None:
+        """요약 작업을 하나만 실행한다. 실행 중인 루프가 있으면 거기서, 없으면 백그라운드 루프에서 돌린다."""
+        with self._lock:
+            task = self._summary_task
+            if task is not None and not task.done():
+                return
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                self._summary_task = loop.create_task(self.asummarize())
+            else:
+                from agent.graphs.background_loop import get_background_loop
+
+                self._summary_task = asyncio.run_coroutine_threadsafe(self.asummarize(), get_background_loop().loop)
+
+    async def asummarize(self) -> None:
+        """밀려난 턴을 요약에 합친다. 요약 중에 밀려난 턴은 다음 반복에서 처리한다. 실패하면 해당 턴은 버린다."""
+        if self._summarizer is None:
+            return
+        from llm.scheduler import llm_priority
+
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, []
+                summary = self._summary
+            try:
+                with llm_priority("background"):
+                    new_summary = await self._summarizer(summary, pending)
+            except Exception:
+                continue
+            # 요약은 최근 내용이 중요하므로 뒤쪽을 남긴다.
+            new_summary = truncate_to_tokens(new_summary.strip(), self.summary_tokens, keep="tail")
+            with self._lock:
+                self._summary = new_summary
+                self.summaries += 1
+
+    async def wait_idle(self) -> None:
+        """진행 중인 요약이 끝날 때까지 기다린다(테스트/종료용)."""
+        task = self._summary_task
+        if task is None:
+            return
+        if isinstance(task, asyncio.Future):
+            await asyncio.shield(task)
+        else:
+            await asyncio.wrap_future(task)
+
+
+def make_llm_summarizer(prefix: str = "NODE_SUMMARY") -> Summarizer:
+    """`{prefix}_PROVIDER/_MODEL` LLM으로 기존 요약과 밀려난 턴을 한 단락으로 합치는 요약기."""
+
+    async def _summarize(summary: str, turns: Sequence[Tuple[str, str]]) -> str:
+        from agent.nodes.llm_utils import create_langchain_llm_from_env
+
+        llm = create_langchain_llm_from_env(prefix)
+        dialogue = "\n".join(f"사용자: {u}\n응답: {a}" for u, a in turns)
+        prompt_text = (
+            "[Instruction]\n이전 요약과 새 대화를 합쳐 이후 대화에 필요한 사실(상품, 금액, 사용자 요청)만 "
+            "한국어 한 단락으로 요약하라.\n\n"
+            f"[Previous Summary]\n{summary or '(없음)'}\n\n[New Turns]\n{dialogue}"
+        )
+        resp = await llm.ainvoke(prompt_text)
+        return resp.content if hasattr(resp, "content") else str(resp)
+
+    return _summarize
+
+
+def memory_from_env() -> ConversationMemory:
+    """MEMORY_* 환경변수로 세션 기록을 만든다."""
+
+    def _int(name: str, default: int) -> int:
+        try:
+            return int(os.getenv(name, default))
+        except ValueError:
+            return default
+
+    summary_on = os.getenv("MEMORY_SUMMARY", "off").strip().lower() in ("on", "true", "1", "yes")
+    return ConversationMemory(
+        max_turns=_int("MEMORY_MAX_TURNS", 20),
+        token_budget=_int("MEMORY_TOKEN_BUDGET", 1000),
+        summary_tokens=_int("MEMORY_SUMMARY_TOKENS", 200),
+        summarizer=make_llm_summarizer() if summary_on else None,
+    )
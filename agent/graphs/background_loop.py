@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """
+    전용 스레드에서 계속 실행되는 이벤트 루프.
+
+    동기 코드(Streamlit 스크립트 스레드 등)가 run_coroutine_threadsafe로 코루틴을 제출한다.
+    루프가 턴마다 새로 만들어지지 않으므로 루프에 묶인 자원(HTTP 연결 풀, MCP 세션, 비동기 캐시)이 재사용된다.
+    이미 실행 중인 다른 루프 안에서 호출해도 되지만, 결과를 기다리는 동안 호출한 루프는 멈춘다.
+    """
+
+    def __init__(self, name: str = "graph-background-loop") -> None:
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._finalizers: List[weakref.WeakMethod] = []
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """필요할 때 루프 스레드를 시작하고 루프를 반환한다."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+                    thread = threading.Thread(target=self._run_forever, args=(loop, ready), name=self._name, daemon=True)
+                    thread.start()
+                    ready.wait()
+                    self._thread = thread
+                    self._loop = loop
+        return self._loop
+
+    @staticmethod
+    def _run_forever(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """코루틴을 백그라운드 루프에서 실행하고 결과를 기다린다."""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("백그라운드 루프 안에서는 동기 호출을 사용할 수 없습니다. await를 사용하세요.")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # 타임아웃/인터럽트 시 루프에 남은 작업을 취소
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        """비동기 제너레이터를 백그라운드 루프에서 한 단계씩 진행하며 동기 이터레이터로 내보낸다."""
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            aclose = getattr(agen, "aclose", None)
+            if aclose is not None and self._loop is not None and self._loop.is_running():
+                self.run(aclose())
+
+    def add_finalizer(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """종료 시 루프 안에서 실행할 비동기 정리 함수(바운드 메서드)를 약한 참조로 등록한다."""
+        with self._lock:
+            # 이미 사라진 그래프의 참조는 버려 목록이 계속 늘지 않게 한다.
+            self._finalizers = [ref for ref in self._finalizers if ref() is not None]
+            if any(ref() == callback for ref in self._finalizers):
+                return
+            self._finalizers.append(weakref.WeakMethod(callback))
+
+    async def _finalize(self) -> None:
+        for ref in list(self._finalizers):
+            callback = ref()
+            if callback is None:
+                continue
+            try:
+                await callback()
+            except Exception:
+                pass
+        self._finalizers.clear()
+
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.get_running_loop().shutdown_asyncgens()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """등록된 정리 함수 실행 → 남은 작업 취소 → 루프 정지 → 스레드 합류."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None or thread is None:
+            return
+        if loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._finalize(), loop).result(timeout)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+
+_BACKGROUND_LOOP: Optional[BackgroundLoop] = None
+_BACKGROUND_LOCK = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """프로세스 전역 백그라운드 루프. 인터프리터 종료 시 정리된다."""
+    global _BACKGROUND_LOOP
+    if _BACKGROUND_LOOP is None:
+        with _BACKGROUND_LOCK:
+            if _BACKGROUND_LOOP is None:
+                _BACKGROUND_LOOP = BackgroundLoop()
+                atexit.register(_BACKGROUND_LOOP.shutdown)
+    return _BACKGROUND_LOOP
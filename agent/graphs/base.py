@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+    from .background_loop import BackgroundLoop
 
 
 class GraphInterface(ABC):
@@ -11,23 +16,96 @@ class GraphInterface(ABC):
     """
 
     @abstractmethod
-    async def ainvoke(self, input_text: str) -> Dict[str, Any]:
-        """비동기 실행. 상태 딕셔너리를 반환한다."""
+    async def ainvoke(
+        self,
+        input_text: str,
+        history: Optional[List["BaseMessage"]] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        비동기 실행. 상태 딕셔너리를 반환한다.
+        history는 이전 대화(요약/최근 턴 메시지)이며, 어느 노드가 이를 사용할지는 구현이 정한다.
+        session_id는 상태를 저장하는 구현(체크포인터)이 세션을 구분하는 데 사용한다.
+        """
         raise NotImplementedError
 
-    def invoke(self, input_text: str) -> Dict[str, Any]:
-        """동기 실행 헬퍼. 이벤트 루프가 없을 때만 사용."""
-        import asyncio
+    def invoke(
+        self,
+        input_text: str,
+        history: Optional[List["BaseMessage"]] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        동기 실행 헬퍼. 프로세스 전역 백그라운드 루프에서 ainvoke를 실행한다.
+        턴마다 같은 루프를 쓰므로 루프에 묶인 자원(연결 풀, MCP 세션)이 재사용된다.
+        실행 중인 이벤트 루프 안에서도 호출할 수 있으나, 그 루프에서는 ainvoke()가 바람직하다.
+        """
+        runner = self._background_loop()
+        return runner.run(self.ainvoke(input_text, history=history, session_id=session_id))
+
+    async def astream(
+        self,
+        input_text: str,
+        history: Optional[List["BaseMessage"]] = None,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        비동기 스트리밍 실행. 다음 형태의 이벤트를 순서대로 내보낸다.
+        - {"type": "node", "node": 이름, "update": 노드가 갱신한 상태}: 노드 실행 완료
+        - {"type": "token", "node": 이름, "text": 조각}: 사용자에게 보일 응답 토큰
+        - {"type": "end", "state": 최종 상태, "output": 최종 응답}: 마지막 이벤트
+        기본 구현은 ainvoke 결과를 end 이벤트 하나로 내보낸다.
+        """
+        final_state = await self.ainvoke(input_text, history=history, session_id=session_id)
+        yield {"type": "end", "state": final_state, "output": final_state.get("output", "")}
+
+    def stream(
+        self,
+        input_text: str,
+        history: Optional[List["BaseMessage"]] = None,
+        session_id: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """동기 스트리밍 헬퍼. invoke()와 같은 백그라운드 루프에서 astream을 진행한다."""
+        runner = self._background_loop()
+        yield from runner.iterate(self.astream(input_text, history=history, session_id=session_id))
+
+    async def aload_history(self, session_id: str) -> List["BaseMessage"]:
+        """
+        저장된 세션 상태에서 이전 대화를 복원한다(다른 워커에서 세션을 이어받을 때).
+        기본 구현은 상태를 저장하지 않으므로 빈 목록을 반환한다.
+        """
+        return []
 
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = None
+    def load_history(self, session_id: str) -> List["BaseMessage"]:
+        """동기 복원 헬퍼. invoke()와 같은 백그라운드 루프에서 실행한다."""
+        runner = self._background_loop()
+        return runner.run(self.aload_history(session_id))
 
-        if loop and loop.is_running():
-            # 이미 실행 중인 루프가 있으면 비동기 사용을 강제
-            raise RuntimeError("invoke()는 실행 중인 이벤트 루프 내에서 사용할 수 없습니다. ainvoke()를 사용하세요.")
-        return asyncio.run(self.ainvoke(input_text))
+    async def awarmup(self) -> Dict[str, Any]:
+        """
+        첫 요청 전에 그래프가 사용할 자원(모델, 외부 세션, 컴파일된 그래프 등)을 미리 준비한다.
+        단계별 결과를 반환하며, 기본 구현은 아무것도 하지 않는다.
+        """
+        return {}
+
+    def warmup(self) -> Dict[str, Any]:
+        """동기 예열 헬퍼. invoke()와 같은 백그라운드 루프에서 실행해 루프에 묶인 자원이 이후 요청에 재사용된다."""
+        runner = self._background_loop()
+        return runner.run(self.awarmup())
+
+    def _background_loop(self) -> "BackgroundLoop":
+        from .background_loop import get_background_loop
+
+        runner = get_background_loop()
+        # 프로세스 종료 시 백그라운드 루프 안에서 그래프 자원을 정리(인스턴스당 한 번만 등록)
+        if getattr(self, "_finalizer_runner", None) is not runner:
+            runner.add_finalizer(self.aclose)
+            self._finalizer_runner = runner
+        return runner
+
+    async def aclose(self) -> None:
+        """그래프가 보유한 외부 자원(MCP 세션 등)을 정리한다. 기본 구현은 없음."""
+        return None
 
     def save_png(self, path: str) -> None:
         """가능한 경우 그래프 구조를 PNG로 저장(옵션)."""
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
+import importlib
 import os
-from typing import Dict, Type
+from typing import Any, Dict, Type, Union
 
 from .base import GraphInterface
-from .purchase_graph import PurchaseFlowGraph
 
 
-_REGISTRY: Dict[str, Type[GraphInterface]] = {
-    "purchase": PurchaseFlowGraph,
-    "purchase_flow": PurchaseFlowGraph,
+# 그래프 구현은 'module:Class' 경로로 등록하고 선택된 것만 임포트한다.
+_REGISTRY: Dict[str, Union[str, Type[GraphInterface]]] = {
+    "purchase": "agent.graphs.purchase_graph:PurchaseFlowGraph",
+    "purchase_flow": "agent.graphs.purchase_graph:PurchaseFlowGraph",
 }
 
 
@@ -19,11 +20,15 @@ def create_from_env() -> GraphInterface:
     return create(name)
 
 
-def create(name: str) -> GraphInterface:
+def create(name: str, **kwargs: Any) -> GraphInterface:
+    """등록된 그래프를 생성한다. kwargs는 구현 생성자에 그대로 전달한다(예: 도구 카탈로그 주입)."""
     key = name.lower()
     if key not in _REGISTRY:
         available = ", ".join(sorted(_REGISTRY.keys()))
         raise ValueError(f"알 수 없는 그래프: {name}. 사용 가능: {available}")
-    return _REGISTRY[key]()
-
-
+    entry = _REGISTRY[key]
+    if isinstance(entry, str):
+        module_name, _, attr = entry.partition(":")
+        entry = getattr(importlib.import_module(module_name), attr)
+        _REGISTRY[key] = entry
+    return entry(**kwargs)
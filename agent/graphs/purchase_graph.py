@@ -1,143 +1,269 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from fastmcp import Client
-from langchain.tools import StructuredTool
-from langgraph.graph import StateGraph, START, END
 
 from .base import GraphInterface
+from agent.metrics import configure_from_env as configure_metrics_from_env, instrument_branch, instrument_node
+from agent.tracing import TRACER, configure_from_env as configure_tracing_from_env, trace_node
+from agent.tools.mcp_session import MCPSessionManager
+from agent.tools.tool_catalog import ToolCatalog
+from agent.nodes.classifier_cache import ClassifierCache, ToolEligibilityCache
+from agent.nodes.llm_utils import aclose_llm_pool, warmup_llm_from_env
+from agent.nodes.preclassifier import default_pay_intent_preclassifier, default_politeness_preclassifier
 from agent.nodes.purchase_nodes import (
     GraphState,
+    classify_politeness,
     make_node_politeness,
     node_polite_warning,
     make_node_classify_pay_amount,
+    make_node_speculative_classify,
+    make_node_multilabel_classify,
     node_ask_product,
     make_node_check_tool,
     make_node_agent,
     node_no_tool,
 )
 
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
 
-def _pyd_model_from_json_schema(name: str, schema: Dict[str, Any]):
-    from pydantic import create_model
 
-    schema = schema or {"type": "object", "properties": {}}
-    props = schema.get("properties", {})
-    req = set(schema.get("required", []))
-
-    def pytype(t: str):
-        return {
-            "integer": int,
-            "number": float,
-            "boolean": bool,
-            "object": dict,
-            "array": list,
-        }.get(t, str)
-
-    fields = {k: (pytype(v.get("type", "string")), ... if k in req else None) for k, v in props.items()}
-    return create_model(name, **fields) if fields else create_model(name)
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
 
-def _make_langchain_tool_factory(config_path: str):
+class PurchaseFlowGraph(GraphInterface):
     """
-    MCP tool 메타데이터를 읽어 LangChain StructuredTool 리스트를 생성하는 비동기 팩토리.
-    노드 내부(이미 이벤트 루프가 실행 중)에서 안전하게 호출할 수 있도록 await 기반으로 동작한다.
+    존대말 → 지불 의사 → 도구 가능 여부 순으로 분기하는 구매 흐름 그래프.
+
+    Args:
+        speculative: True면 존대말/지불 의사 분류를 동시에 실행한다.
+            None이면 환경변수 PURCHASE_GRAPH_SPECULATIVE를 따른다(기본 False).
+        multilabel: True면 존대말/지불 의사/도구 가능 여부를 한 번의 JSON 응답으로 판정한다.
+            응답 검증에 실패하면 노드별 순차 경로로 폴백한다. speculative보다 우선한다.
+            None이면 환경변수 PURCHASE_GRAPH_MULTILABEL을 따른다(기본 False).
+        preclassify: True면 존대말/지불 의사 분류 앞에 규칙 기반 사전 분류를 둔다.
+            None이면 환경변수 PURCHASE_GRAPH_PRECLASSIFIER를 따른다(기본 True).
+        checkpointer: 컴파일된 그래프에 연결할 LangGraph 체크포인터. 세션(session_id)별 상태가 저장되어
+            같은 저장소를 쓰는 다른 워커에서도 대화를 이어갈 수 있다.
+            None이면 GRAPH_CHECKPOINT_DB가 지정된 경우 SQLiteCheckpointSaver를 사용한다.
+        mcp_sessions: 도구 호출에 쓸 MCP 세션 관리자. None이면 MCP_SERVERS_CONFIG로 만든다.
+        tool_catalog: 도구 카탈로그. None이면 mcp_sessions 위에 만든다(MCP_TOOL_CATALOG_TTL/SNAPSHOT).
+        get_tools: 도구 목록을 돌려주는 비동기 함수. 지정하면 MCP 세션/카탈로그 없이 이 목록만 사용한다.
     """
 
-    async def get_tools() -> List[StructuredTool]:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
-
-        async with Client(config) as client:
-            mcp_tools = await client.list_tools()
-
-        tools: List[StructuredTool] = []
-
-        def _make_tool(name: str, desc: str, args_schema: Any) -> StructuredTool:
-            async def _acall(**kwargs):
-                async with Client(config) as _client:
-                    res = await _client.call_tool(name, kwargs)
-                    if hasattr(res, "content") and res.content:
-                        texts = [c.text for c in res.content if hasattr(c, "text")]
-                        return "\n".join(texts) if texts else str(res)
-                    return str(res)
-
-            return StructuredTool.from_function(
-                name=name,
-                description=desc,
-                args_schema=args_schema,
-                coroutine=_acall,
+    def __init__(
+        self,
+        speculative: Optional[bool] = None,
+        preclassify: Optional[bool] = None,
+        multilabel: Optional[bool] = None,
+        checkpointer: Any = None,
+        mcp_sessions: Optional[MCPSessionManager] = None,
+        tool_catalog: Optional[ToolCatalog] = None,
+        get_tools: Optional[Callable[[], Awaitable[List[Any]]]] = None,
+    ) -> None:
+        load_dotenv()
+        configure_metrics_from_env()
+        configure_tracing_from_env()
+        self._speculative = _env_flag("PURCHASE_GRAPH_SPECULATIVE") if speculative is None else speculative
+        self._multilabel = _env_flag("PURCHASE_GRAPH_MULTILABEL") if multilabel is None else multilabel
+        if preclassify is None:
+            preclassify = _env_flag("PURCHASE_GRAPH_PRECLASSIFIER", default=True)
+        self._politeness_rules = default_politeness_preclassifier() if preclassify else None
+        self._pay_intent_rules = default_pay_intent_preclassifier() if preclassify else None
+        self._classifier_cache = ClassifierCache.from_env()
+        self._eligibility_cache = ToolEligibilityCache.from_env()
+        if tool_catalog is None and get_tools is None:
+            root = Path(__file__).resolve().parents[2]
+            if mcp_sessions is None:
+                config_path = os.getenv("MCP_SERVERS_CONFIG", str(root / "mcp-server" / "mcp_servers.json"))
+                mcp_sessions = MCPSessionManager(config_path)
+            snapshot_path = os.getenv("MCP_TOOL_CATALOG_SNAPSHOT", str(root / ".cache" / "mcp_tool_catalog.json"))
+            tool_catalog = ToolCatalog(
+                mcp_sessions,
+                ttl=float(os.getenv("MCP_TOOL_CATALOG_TTL", "300")),
+                snapshot_path=snapshot_path or None,
             )
+        if mcp_sessions is None and tool_catalog is not None:
+            mcp_sessions = tool_catalog.sessions
+        self._mcp_sessions = mcp_sessions
+        self._tool_catalog = tool_catalog
+        self._get_tools_async = get_tools or tool_catalog.get_tools  # type: ignore[union-attr]
+        if checkpointer is None and os.getenv("GRAPH_CHECKPOINT_DB", "").strip():
+            from .sqlite_checkpointer import SQLiteCheckpointSaver
+
+            checkpointer = SQLiteCheckpointSaver.from_env()
+        self._checkpointer = checkpointer
+        # 컴파일은 첫 실행(또는 warmup) 시점으로 미룬다.
+        self._compiled: Any = None
+        self._unsaved: Any = None
+        self._compile_lock = threading.Lock()
+
+    @property
+    def _graph(self):
+        if self._compiled is None:
+            with self._compile_lock:
+                if self._compiled is None:
+                    self._compiled = self._build_graph()
+        return self._compiled
+
+    @_graph.setter
+    def _graph(self, value) -> None:
+        self._compiled = value
+        self._unsaved = None
+
+    def _llm_prefixes(self) -> tuple:
+        prefixes = ["NODE_POLITENESS", "NODE_PAY_INTENT", "NODE_TOOL_CHECK", "NODE_AGENT"]
+        if self._multilabel:
+            prefixes.append("NODE_MULTI_LABEL")
+        return tuple(prefixes)
+
+    async def awarmup(self) -> Dict[str, Any]:
+        """
+        첫 요청이 콜드 스타트가 되지 않도록 미리 준비한다.
+        - graph: 그래프 컴파일
+        - llm:<prefix>: 노드별 모델 생성과 제공자 예열(예: Ollama keep_alive 적재)
+        - mcp/tools: MCP 세션 개설과 도구 카탈로그 조회
+        - classify: 존대말 분류 더미 호출(규칙/캐시 우회)
+        단계 실패는 기록만 하고 나머지 단계는 계속한다.
+        """
+        report: Dict[str, Any] = {}
+
+        async def _step(name: str, coro: Awaitable[Any]) -> None:
+            started = time.perf_counter()
+            try:
+                detail = await coro
+                report[name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000.0, 1)}
+                if detail is not None:
+                    report[name]["detail"] = detail
+            except Exception as e:
+                report[name] = {"ok": False, "ms": round((time.perf_counter() - started) * 1000.0, 1), "error": repr(e)}
+
+        async def _compile() -> None:
+            self._graph
+
+        async def _tools() -> int:
+            if self._tool_catalog is None:
+                return len(await self._get_tools_async())
+            await self._tool_catalog.sessions.get_client()
+            return len(await self._tool_catalog.refresh())
+
+        await _step("graph", _compile())
+        await asyncio.gather(
+            *(_step(f"llm:{prefix}", warmup_llm_from_env(prefix)) for prefix in self._llm_prefixes()),
+            _step("tools", _tools()),
+        )
+        await _step("classify", classify_politeness("안녕하세요"))
+        return report
 
-        for t in mcp_tools:
-            # Tool 객체 또는 dict 모두 호환
-            name = getattr(t, "name", None) or (t.get("name") if isinstance(t, dict) else None)
-            desc = getattr(t, "description", "") or (t.get("description") if isinstance(t, dict) else "")
-            params = (
-                getattr(t, "inputSchema", None)
-                or getattr(t, "input_schema", None)
-                or (t.get("inputSchema") if isinstance(t, dict) else None)
-            )
-            ArgsModel = _pyd_model_from_json_schema(f"{name}_Args", params)
-            tools.append(_make_tool(name, desc, ArgsModel))
+    def _catalog_version(self) -> Optional[str]:
+        return self._tool_catalog.fingerprint if self._tool_catalog is not None else None
 
-        return tools
+    def _build_graph(self):
+        from langgraph.graph import StateGraph, START, END
 
-    return get_tools
+        workflow = StateGraph(GraphState)
 
+        # 지표/추적이 켜져 있으면 노드 실행 시간, span, 분기 결과를 기록한다(꺼져 있으면 원래 함수 그대로).
+        def add_node(name: str, node: Any) -> None:
+            workflow.add_node(name, trace_node(name, instrument_node(name, node)))
 
-class PurchaseFlowGraph(GraphInterface):
-    def __init__(self) -> None:
-        load_dotenv()
-        config_path = os.getenv(
-            "MCP_SERVERS_CONFIG",
-            str(Path(__file__).resolve().parents[2] / "mcp-server" / "mcp_servers.json"),
-        )
-        self._get_tools_async = _make_langchain_tool_factory(config_path)
-        self._graph = self._build_graph()
-
-    def _build_graph(self):
-        workflow = StateGraph(GraphState)
+        def add_branch(source: str, condition: Any, path_map: Dict[Any, str]) -> None:
+            workflow.add_conditional_edges(source, instrument_branch(source, condition, path_map), path_map)
 
         # 노드 팩토리들: 각 노드는 자체적으로 LLM을 선택
-        workflow.add_node("politeness", make_node_politeness())
-        workflow.add_node("polite_warning", node_polite_warning)
-        workflow.add_node("classify_pay_amount", make_node_classify_pay_amount())
-        workflow.add_node("ask_product", node_ask_product)
-        workflow.add_node("check_tool", make_node_check_tool(self._get_tools_async))
-        workflow.add_node("agent", make_node_agent(self._get_tools_async))
-        workflow.add_node("no_tool", node_no_tool)
-
-        # 엣지 구성
-        workflow.add_edge(START, "politeness")
+        add_node("polite_warning", node_polite_warning)
+        add_node("ask_product", node_ask_product)
+        add_node(
+            "check_tool",
+            make_node_check_tool(self._get_tools_async, self._catalog_version, self._eligibility_cache),
+        )
+        add_node("agent", make_node_agent(self._get_tools_async, get_catalog_version=self._catalog_version))
+        add_node("no_tool", node_no_tool)
 
         def cond_polite(state: GraphState) -> bool:
             return state.get("is_honorific", False)
 
-        workflow.add_conditional_edges(
-            "politeness",
-            cond_polite,
-            {True: "classify_pay_amount", False: "polite_warning"},
-        )
-
         def cond_pay_amount(state: GraphState) -> bool:
             return state.get("intent_pay_amount", False)
 
-        workflow.add_conditional_edges(
-            "classify_pay_amount",
-            cond_pay_amount,
-            {True: "check_tool", False: "ask_product"},
-        )
-
         def cond_tool(state: GraphState) -> bool:
             return state.get("tool_eligible", False)
 
-        workflow.add_conditional_edges(
+        if self._multilabel or not self._speculative:
+            # 노드별 순차 경로: 기본 모드이자 다중 라벨 응답 파싱 실패 시의 폴백 경로
+            add_node("politeness", make_node_politeness(self._politeness_rules, self._classifier_cache))
+            add_node("classify_pay_amount", make_node_classify_pay_amount(self._pay_intent_rules, self._classifier_cache))
+
+            add_branch(
+                "politeness",
+                cond_polite,
+                {True: "classify_pay_amount", False: "polite_warning"},
+            )
+
+            add_branch(
+                "classify_pay_amount",
+                cond_pay_amount,
+                {True: "check_tool", False: "ask_product"},
+            )
+
+        if self._multilabel:
+            # 세 가지 판정을 한 번의 호출로 받고, 기존 분기 조건을 순서대로 적용
+            add_node(
+                "classify_all",
+                make_node_multilabel_classify(self._get_tools_async, self._politeness_rules, self._pay_intent_rules),
+            )
+            workflow.add_edge(START, "classify_all")
+
+            def cond_multilabel(state: GraphState) -> str:
+                if state.get("multilabel_next"):
+                    return state["multilabel_next"]
+                if not state.get("multilabel_ok", False):
+                    return "politeness"
+                if not cond_polite(state):
+                    return "polite_warning"
+                if not cond_pay_amount(state):
+                    return "ask_product"
+                return "agent" if cond_tool(state) else "no_tool"
+
+            add_branch(
+                "classify_all",
+                cond_multilabel,
+                {name: name for name in ("politeness", "polite_warning", "ask_product", "check_tool", "agent", "no_tool")},
+            )
+        elif self._speculative:
+            # 두 분류를 한 노드에서 동시에 실행한 뒤, 기존 분기 조건을 순서대로 적용
+            add_node(
+                "politeness_and_pay_intent",
+                make_node_speculative_classify(self._politeness_rules, self._pay_intent_rules, self._classifier_cache),
+            )
+            workflow.add_edge(START, "politeness_and_pay_intent")
+
+            def cond_speculative(state: GraphState) -> str:
+                if not cond_polite(state):
+                    return "polite_warning"
+                return "check_tool" if cond_pay_amount(state) else "ask_product"
+
+            add_branch(
+                "politeness_and_pay_intent",
+                cond_speculative,
+                {"polite_warning": "polite_warning", "check_tool": "check_tool", "ask_product": "ask_product"},
+            )
+        else:
+            # 엣지 구성
+            workflow.add_edge(START, "politeness")
+
+        add_branch(
             "check_tool",
             cond_tool,
             {True: "agent", False: "no_tool"},
@@ -148,17 +274,104 @@ class PurchaseFlowGraph(GraphInterface):
         workflow.add_edge("agent", END)
         workflow.add_edge("no_tool", END)
 
-        return workflow.compile()
+        return workflow.compile(checkpointer=self._checkpointer)
+
+    # 토큰을 사용자에게 스트리밍하는 노드. 분류 노드의 YES/NO 토큰은 내부 판정이므로 제외한다.
+    _STREAMED_NODES = frozenset({"agent"})
 
-    async def ainvoke(self, input_text: str) -> Dict[str, Any]:
-        initial: GraphState = {
+    def _initial_state(self, input_text: str, history: Optional[List[BaseMessage]] = None) -> GraphState:
+        return {
             "input": input_text,
+            "history": list(history or []),
             "is_honorific": False,
             "intent_pay_amount": False,
             "tool_eligible": False,
+            "multilabel_ok": False,
+            "multilabel_next": "",
             "output": "",
         }
-        return await self._graph.ainvoke(initial)
+
+    def _run_config(self, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """체크포인터가 있으면 세션 단위 스레드로 실행한다. session_id가 없으면 다시 읽을 일이 없으므로 저장하지 않는다."""
+        if self._checkpointer is None or not session_id:
+            return None
+        return {"configurable": {"thread_id": session_id}}
+
+    def _runnable(self, session_id: Optional[str]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """실행할 컴파일된 그래프와 설정. 체크포인터가 있어도 session_id가 없으면 체크포인터를 뗀 사본으로 실행한다."""
+        config = self._run_config(session_id)
+        if config is not None or self._checkpointer is None:
+            return self._graph, config
+        if self._unsaved is None:
+            self._unsaved = self._graph.copy(update={"checkpointer": None})
+        return self._unsaved, None
+
+    async def ainvoke(
+        self, input_text: str, history: Optional[List[BaseMessage]] = None, session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        with TRACER.start_trace("chat_turn", graph="purchase", session_id=session_id or "", mode="invoke"):
+            graph, config = self._runnable(session_id)
+            return await graph.ainvoke(self._initial_state(input_text, history), config=config)
+
+    async def astream(
+        self, input_text: str, history: Optional[List[BaseMessage]] = None, session_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        state: Dict[str, Any] = dict(self._initial_state(input_text, history))
+        graph, config = self._runnable(session_id)
+        with TRACER.start_trace("chat_turn", graph="purchase", session_id=session_id or "", mode="stream"):
+            async for mode, payload in graph.astream(state, config=config, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    node = metadata.get("langgraph_node")
+                    text = getattr(chunk, "content", "")
+                    if node in self._STREAMED_NODES and isinstance(text, str) and text:
+                        yield {"type": "token", "node": node, "text": text}
+                else:
+                    for node, update in payload.items():
+                        if update:
+                            state.update(update)
+                        yield {"type": "node", "node": node, "update": update}
+        yield {"type": "end", "state": state, "output": state.get("output", "")}
+
+    def preclassifier_stats(self) -> Dict[str, Any]:
+        """사전 분류기별 호출/LLM 위임/규칙 적중 통계. 비활성화되어 있으면 빈 dict."""
+        rules = (self._politeness_rules, self._pay_intent_rules)
+        return {r.name: r.stats() for r in rules if r is not None}
+
+    def classifier_cache_stats(self) -> Dict[str, int]:
+        """YES/NO 분류 응답 캐시의 hit/miss 통계. 캐시가 꺼져 있으면 빈 dict."""
+        return self._classifier_cache.stats() if self._classifier_cache is not None else {}
+
+    def eligibility_cache_stats(self) -> Dict[str, int]:
+        """도구 적합성 판정 캐시 통계. 캐시가 꺼져 있으면 빈 dict."""
+        return self._eligibility_cache.stats() if self._eligibility_cache is not None else {}
+
+    async def aload_history(self, session_id: str) -> List[BaseMessage]:
+        """체크포인트에 저장된 마지막 턴의 기록과 입력/응답을 이어 붙여 돌려준다."""
+        if self._checkpointer is None or not session_id:
+            return []
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        snapshot = await self._graph.aget_state(self._run_config(session_id))
+        values = snapshot.values or {}
+        history = list(values.get("history") or [])
+        if values.get("input") and values.get("output"):
+            history += [HumanMessage(content=values["input"]), AIMessage(content=str(values["output"]))]
+        return history
+
+    def checkpointer_stats(self) -> Dict[str, int]:
+        """체크포인터 기록 통계. 체크포인터가 없거나 통계를 제공하지 않으면 빈 dict."""
+        stats = getattr(self._checkpointer, "stats", None)
+        return stats() if callable(stats) else {}
+
+    async def aclose(self) -> None:
+        if self._mcp_sessions is not None:
+            await self._mcp_sessions.aclose()
+        # 이 루프에서 만든 LLM 비동기 연결 풀(예: vLLM httpx.AsyncClient)을 닫는다.
+        await aclose_llm_pool()
+        close = getattr(self._checkpointer, "close", None)
+        if callable(close):
+            await asyncio.to_thread(close)
 
     def save_png(self, path: str) -> None:
         try:
@@ -0,0 +1,460 @@
+"""
+SQLite 그래프 체크포인터(지연 쓰기)
+
+컴파일된 LangGraph의 체크포인트를 로컬 SQLite 파일에 저장한다.
+- 직렬화: LangGraph serde(msgpack) 결과를 크기가 클 때만 zlib으로 압축한다.
+  채널 값은 체크포인트 행에 함께 저장한다(작은 상태 그래프에 맞춘 단순 스키마).
+- 지연 쓰기: put/put_writes는 메모리 대기열에만 넣고 즉시 반환한다.
+  쓰기 스레드가 flush_interval마다(또는 max_batch에 도달하면) 한 트랜잭션으로 모아 기록하므로
+  요청 경로에 동기 fsync가 생기지 않는다. 아직 기록되지 않은 항목도 같은 프로세스의 조회에는 보인다.
+- 정리: 기록할 때 스레드별로 최근 keep_last개만 남기고, ttl_seconds보다 오래 갱신되지 않은 스레드는 지운다.
+  스레드별 마지막 갱신 시각은 threads 표(인덱스)에 두므로 기간 정리가 전체 표를 훑지 않는다.
+- close() 뒤의 쓰기는 대기열에 남기지 않고 그 자리에서 기록한다.
+- 같은 DB 파일을 공유하는 워커(같은 호스트의 프로세스)라면 어느 워커에서든 세션을 이어갈 수 있다(WAL 모드).
+  다른 워커의 아직 기록되지 않은 최근 flush_interval 동안의 쓰기는 보이지 않는다.
+
+설정(환경변수, from_env):
+    GRAPH_CHECKPOINT_DB=./data/checkpoints.sqlite   (비우면 체크포인터 없음)
+    GRAPH_CHECKPOINT_FLUSH_MS=200
+    GRAPH_CHECKPOINT_KEEP=4
+    GRAPH_CHECKPOINT_TTL=604800                     (초, 0이면 기간 정리 안 함)
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+# 압축 여부를 타입 태그에 표시한다.
+_ZLIB_PREFIX = "z:"
+
+# (thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata, updated_at)
+CheckpointRow = Tuple[str, str, str, Optional[str], str, bytes, str, bytes, float]
+# (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path)
+WriteRow = Tuple[str, str, str, str, int, str, str, bytes, str]
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """
+    지연 쓰기 SQLite 체크포인터. LangGraph compile(checkpointer=...)에 전달한다.
+
+    Args:
+        path: SQLite 파일 경로(상위 디렉터리는 자동 생성)
+        flush_interval: 대기열을 기록하는 주기(초)
+        max_batch: 대기열이 이 크기에 도달하면 주기를 기다리지 않고 기록
+        keep_last: 스레드/네임스페이스별로 남길 최근 체크포인트 수(0이면 전부 보관)
+        ttl_seconds: 이 시간 동안 갱신되지 않은 스레드를 삭제(0이면 안 함)
+        compress_min_bytes: 이 크기 이상인 직렬화 결과만 압축
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.2,
+        max_batch: int = 256,
+        keep_last: int = 4,
+        ttl_seconds: float = 0.0,
+        compress_min_bytes: int = 512,
+        serde: Any = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.path = str(path)
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_batch = max(1, max_batch)
+        self.keep_last = max(0, keep_last)
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.compress_min_bytes = compress_min_bytes
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        # 아직 기록되지 않은 항목(pending)과 기록 중인 항목(inflight). 둘 다 조회에 반영한다.
+        self._pending_checkpoints: Dict[Tuple[str, str, str], CheckpointRow] = {}
+        self._pending_writes: Dict[Tuple[str, str, str, str, int], WriteRow] = {}
+        self._inflight_checkpoints: Dict[Tuple[str, str, str], CheckpointRow] = {}
+        self._inflight_writes: Dict[Tuple[str, str, str, str, int], WriteRow] = {}
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._writer: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.pruned = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        has_threads = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'threads'").fetchone()
+        conn.executescript(_SCHEMA)
+        if has_threads is None:
+            # threads 표가 없던 DB: 기존 스레드의 마지막 갱신 시각을 한 번 채운다.
+            conn.execute(
+                "INSERT OR IGNORE INTO threads SELECT thread_id, MAX(updated_at) FROM checkpoints GROUP BY thread_id"
+            )
+        conn.commit()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> Optional["SQLiteCheckpointSaver"]:
+        """GRAPH_CHECKPOINT_* 환경변수로 생성한다. 경로가 비어 있으면 None."""
+        path = os.getenv("GRAPH_CHECKPOINT_DB", "").strip()
+        if not path:
+            return None
+        return cls(
+            path,
+            flush_interval=float(os.getenv("GRAPH_CHECKPOINT_FLUSH_MS", "200")) / 1000.0,
+            keep_last=int(os.getenv("GRAPH_CHECKPOINT_KEEP", "4")),
+            ttl_seconds=float(os.getenv("GRAPH_CHECKPOINT_TTL", "604800")),
+        )
+
+    # ---- 연결/직렬화 ----
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 연결. WAL 모드이므로 읽기는 쓰기 스레드를 기다리지 않는다."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= self.compress_min_bytes:
+            return _ZLIB_PREFIX + type_, zlib.compress(data, 1)
+        return type_, data
+
+    def _load(self, type_: str, data: bytes) -> Any:
+        if type_.startswith(_ZLIB_PREFIX):
+            return self.serde.loads_typed((type_[len(_ZLIB_PREFIX):], zlib.decompress(data)))
+        return self.serde.loads_typed((type_, data))
+
+    # ---- 쓰기(대기열) ----
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, blob = self._dump(checkpoint)
+        metadata_type, metadata_blob = self._dump(get_checkpoint_metadata(config, metadata))
+        row: CheckpointRow = (
+            thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+            type_, blob, metadata_type, metadata_blob, time.time(),
+        )
+        with self._lock:
+            self._pending_checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = row
+        self._schedule()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, blob = self._dump(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, blob, task_path))
+        with self._lock:
+            for row in rows:
+                key = row[:5]
+                # 일반 쓰기(idx >= 0)는 처음 기록된 값을 유지하고, 특수 채널(오류/인터럽트)은 덮어쓴다.
+                if row[4] >= 0 and (key in self._pending_writes or key in self._inflight_writes):
+                    continue
+                self._pending_writes[key] = row
+        self._schedule()
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # 대기열에만 넣으므로 이벤트 루프에서 바로 실행해도 막히지 않는다.
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    def _schedule(self) -> None:
+        if self._stopped:
+            # 닫힌 뒤에는 쓰기 스레드가 없으므로 바로 기록한다.
+            self.flush()
+            return
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None and not self._stopped:
+                    self._writer = threading.Thread(target=self._run_writer, name="graph-checkpoint-writer", daemon=True)
+                    self._writer.start()
+        if len(self._pending_checkpoints) + len(self._pending_writes) >= self.max_batch:
+            self._wakeup.set()
+
+    def _run_writer(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # 다음 주기에 다시 시도하도록 항목은 flush()에서 대기열로 되돌린다.
+                time.sleep(self.flush_interval)
+
+    def flush(self) -> int:
+        """대기열을 한 트랜잭션으로 기록하고 오래된 체크포인트를 정리한다. 기록한 행 수를 반환한다."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending_checkpoints and not self._pending_writes:
+                    return 0
+                self._inflight_checkpoints, self._pending_checkpoints = self._pending_checkpoints, {}
+                self._inflight_writes, self._pending_writes = self._pending_writes, {}
+            checkpoints = list(self._inflight_checkpoints.values())
+            writes = list(self._inflight_writes.values())
+            conn = self._conn()
+            try:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", checkpoints)
+                    conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", writes)
+                    touched: Dict[str, float] = {}
+                    for row in checkpoints:
+                        touched[row[0]] = max(touched.get(row[0], 0.0), row[8])
+                    conn.executemany("INSERT OR REPLACE INTO threads VALUES (?, ?)", touched.items())
+                    self._prune(conn, {(row[0], row[1]) for row in checkpoints})
+            except sqlite3.Error:
+                with self._lock:
+                    # 실패한 항목을 되돌리되, 그 사이 들어온 새 항목이 우선한다.
+                    self._pending_checkpoints = {**self._inflight_checkpoints, **self._pending_checkpoints}
+                    self._pending_writes = {**self._inflight_writes, **self._pending_writes}
+                    self._inflight_checkpoints, self._inflight_writes = {}, {}
+                raise
+            with self._lock:
+                self._inflight_checkpoints, self._inflight_writes = {}, {}
+            self.flushes += 1
+            self.rows_written += len(checkpoints) + len(writes)
+            return len(checkpoints) + len(writes)
+
+    def _prune(self, conn: sqlite3.Connection, threads: set) -> None:
+        if self.keep_last:
+            for thread_id, checkpoint_ns in threads:
+                stale = conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                    (thread_id, checkpoint_ns, self.keep_last),
+                ).fetchall()
+                if stale:
+                    ids = [(thread_id, checkpoint_ns, cid) for (cid,) in stale]
+                    conn.executemany(
+                        "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", ids
+                    )
+                    conn.executemany(
+                        "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", ids
+                    )
+                    self.pruned += len(ids)
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            expired = conn.execute("SELECT thread_id FROM threads WHERE updated_at < ?", (cutoff,)).fetchall()
+            for (thread_id,) in expired:
+                self.pruned += conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,)).rowcount
+                conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+
+    # ---- 읽기 ----
+
+    def _overlay(self) -> Tuple[Dict[Tuple[str, str, str], CheckpointRow], List[WriteRow]]:
+        with self._lock:
+            checkpoints = {**self._inflight_checkpoints, **self._pending_checkpoints}
+            writes = list(self._inflight_writes.values()) + list(self._pending_writes.values())
+        return checkpoints, writes
+
+    def _to_tuple(self, row: CheckpointRow, write_rows: List[WriteRow]) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, blob, metadata_type, metadata_blob, _ = row
+        merged: Dict[Tuple[str, int], WriteRow] = {}
+        for write in write_rows:
+            merged.setdefault((write[3], write[4]), write)
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=self._load(type_, blob),
+            metadata=self._load(metadata_type, metadata_blob),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (w[3], w[5], self._load(w[6], w[7]))
+                for w in sorted(merged.values(), key=lambda w: (w[3], w[4]))
+            ],
+        )
+
+    def _writes_for(self, key: Tuple[str, str, str], overlay_writes: List[WriteRow]) -> List[WriteRow]:
+        rows = [w for w in overlay_writes if w[:3] == key]
+        rows += self._conn().execute(
+            "SELECT * FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", key
+        ).fetchall()
+        return rows
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        overlay_checkpoints, overlay_writes = self._overlay()
+        conn = self._conn()
+        if checkpoint_id:
+            row = overlay_checkpoints.get((thread_id, checkpoint_ns, checkpoint_id)) or conn.execute(
+                "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            candidates = [r for k, r in overlay_checkpoints.items() if k[0] == thread_id and k[1] == checkpoint_ns]
+            stored = conn.execute(
+                "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if stored is not None:
+                candidates.append(stored)
+            row = max(candidates, key=lambda r: r[2]) if candidates else None
+        if row is None:
+            return None
+        return self._to_tuple(row, self._writes_for(tuple(row[:3]), overlay_writes))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """체크포인트 이력 조회(드문 경로). 대기열을 먼저 기록한 뒤 DB에서 읽는다."""
+        self.flush()
+        query, params = "SELECT * FROM checkpoints WHERE 1 = 1", []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY checkpoint_id DESC"
+        for row in self._conn().execute(query, params).fetchall():
+            if filter:
+                metadata = self._load(row[6], row[7])
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield self._to_tuple(row, self._writes_for(tuple(row[:3]), []))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.flush()
+        with self._conn() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM threads WHERE thread_id = ?", (thread_id,))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ---- 수명 ----
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending_checkpoints) + len(self._pending_writes)
+        return {"pending": pending, "flushes": self.flushes, "rows_written": self.rows_written, "pruned": self.pruned}
+
+    def close(self) -> None:
+        """쓰기 스레드를 멈추고 남은 대기열을 기록한다. 이후의 put/put_writes는 호출 시점에 바로 기록된다."""
+        self._stopped = True
+        self._wakeup.set()
+        writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout=5.0)
+        self.flush()
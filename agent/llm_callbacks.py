@@ -0,0 +1,82 @@
+"""
+LLM 요청 콜백 공용 부분
+
+지표(agent/metrics.py)와 추적(agent/tracing.py)은 LLM 요청의 시작/끝을 같은 방식으로 관찰한다.
+LangChain 콜백 핸들러 정의와 모델에 콜백을 붙이는 로직은 여기 한 곳에 두고, 각 모듈은 LLMRunObserver만 구현한다.
+핸들러는 모델이 풀에 들어갈 때 한 번 붙고, 관찰자가 요청마다 켜짐 여부를 확인한다.
+그래서 모델을 만든 뒤에 지표/추적을 켜도(예열, .env 변경) 같은 모델의 다음 요청부터 기록된다.
+langchain_core 임포트 비용 때문에 핸들러 클래스는 처음 필요할 때 정의한다.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+
+class LLMRunObserver(ABC):
+    """
+    LLM 요청 하나의 시작과 끝을 관찰한다. run_id로 같은 요청의 시작/끝을 짝짓는다.
+    꺼져 있을 때는 on_start에서 아무것도 기록하지 않고, on_end는 시작을 기록한 요청만 마무리한다.
+    """
+
+    @abstractmethod
+    def on_start(self, run_id: Any, node: str) -> None:
+        """요청 시작. node는 LangGraph가 넘기는 metadata의 langgraph_node(없으면 빈 문자열)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def on_end(self, run_id: Any, response: Any = None, error: Optional[BaseException] = None) -> None:
+        """요청 종료. 실패했으면 error가 있고 response는 None이다."""
+        raise NotImplementedError
+
+
+_HANDLER_CLASS: Optional[type] = None
+
+
+def make_llm_handler(*observers: LLMRunObserver) -> Any:
+    """관찰자들에게 LLM 요청 시작/끝을 전달하는 LangChain 콜백 핸들러를 만든다."""
+    global _HANDLER_CLASS
+    if _HANDLER_CLASS is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class _LLMObserverHandler(BaseCallbackHandler):
+            run_inline = True
+
+            def __init__(self, observers: Tuple[LLMRunObserver, ...]) -> None:
+                self.observers = observers
+
+            def _start(self, run_id: Any, metadata: Optional[Dict[str, Any]]) -> None:
+                node = str((metadata or {}).get("langgraph_node", ""))
+                for observer in self.observers:
+                    observer.on_start(run_id, node)
+
+            def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: Any, metadata: Any = None, **kwargs: Any) -> None:
+                self._start(run_id, metadata)
+
+            def on_llm_start(self, serialized: Any, prompts: Any, *, run_id: Any, metadata: Any = None, **kwargs: Any) -> None:
+                self._start(run_id, metadata)
+
+            def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any) -> None:
+                for observer in self.observers:
+                    observer.on_end(run_id, response=response)
+
+            def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+                for observer in self.observers:
+                    observer.on_end(run_id, error=error)
+
+        _HANDLER_CLASS = _LLMObserverHandler
+    return _HANDLER_CLASS(observers)
+
+
+def attach_llm_callback(model_obj: Any, handler: Any) -> Any:
+    """LangChain 모델의 기존 콜백을 유지한 채 핸들러를 덧붙인다. 콜백을 받지 않는 객체면 그대로 둔다."""
+    if not hasattr(model_obj, "callbacks"):
+        return model_obj
+    callbacks = model_obj.callbacks
+    if callbacks is None:
+        model_obj.callbacks = [handler]
+    elif isinstance(callbacks, list):
+        model_obj.callbacks = callbacks + [handler]
+    else:
+        callbacks.add_handler(handler, inherit=True)
+    return model_obj
@@ -1,6 +1,7 @@
-import asyncio
-from typing import Optional
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 
+from agent.conversation_memory import ConversationMemory, memory_from_env
 from agent.graphs.base import GraphInterface
 
 
@@ -9,12 +10,65 @@ class MemoryAgent:
     그래프 주도 실행 에이전트.
     - 그래프 구현은 의존성 주입으로 제공(확장 가능)
     - LLM 선택은 각 노드에서 .env와 LLMFactory를 통해 독립적으로 수행
+    - 세션 대화 기록은 토큰 예산이 고정된 ConversationMemory로 관리하여 턴마다 그래프에 전달
+    - session_id로 그래프가 세션 상태를 저장하면, 새 프로세스의 첫 턴에서 기록을 복원한다
     """
 
-    def __init__(self, graph: GraphInterface):
+    def __init__(
+        self,
+        graph: GraphInterface,
+        memory: Optional[ConversationMemory] = None,
+        session_id: Optional[str] = None,
+    ):
         self.graph = graph
+        self.memory = memory if memory is not None else memory_from_env()
+        self.session_id = session_id or uuid.uuid4().hex
+        self._restored = False
 
-    def chat(self, user_input: str) -> str:
-        final_state = self.graph.invoke(user_input)
+    @staticmethod
+    def _output(final_state: Dict[str, Any]) -> str:
         output = final_state.get("output", "")
-        return output if isinstance(output, str) else str(output)
\ No newline at end of file
+        return output if isinstance(output, str) else str(output)
+
+    def _restore(self) -> None:
+        if not self._restored:
+            self._restored = True
+            if self.memory.is_empty():
+                self.memory.restore(self.graph.load_history(self.session_id))
+
+    async def _arestore(self) -> None:
+        if not self._restored:
+            self._restored = True
+            if self.memory.is_empty():
+                self.memory.restore(await self.graph.aload_history(self.session_id))
+
+    def chat(self, user_input: str) -> str:
+        self._restore()
+        final_state = self.graph.invoke(user_input, history=self.memory.messages(), session_id=self.session_id)
+        output = self._output(final_state)
+        self.memory.add(user_input, output)
+        return output
+
+    async def achat(self, user_input: str) -> str:
+        """chat()의 비동기 버전. 이미 실행 중인 이벤트 루프(예: HTTP 서버)에서 사용한다."""
+        await self._arestore()
+        final_state = await self.graph.ainvoke(user_input, history=self.memory.messages(), session_id=self.session_id)
+        output = self._output(final_state)
+        self.memory.add(user_input, output)
+        return output
+
+    def stream(self, user_input: str) -> Iterator[Dict[str, Any]]:
+        """노드 전이/응답 토큰 이벤트를 도착하는 대로 내보낸다(동기). 이벤트 형식은 GraphInterface.astream 참고."""
+        self._restore()
+        for event in self.graph.stream(user_input, history=self.memory.messages(), session_id=self.session_id):
+            if event["type"] == "end":
+                self.memory.add(user_input, self._output(event))
+            yield event
+
+    async def astream(self, user_input: str) -> AsyncIterator[Dict[str, Any]]:
+        """stream()의 비동기 버전."""
+        await self._arestore()
+        async for event in self.graph.astream(user_input, history=self.memory.messages(), session_id=self.session_id):
+            if event["type"] == "end":
+                self.memory.add(user_input, self._output(event))
+            yield event
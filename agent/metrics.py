@@ -0,0 +1,363 @@
+"""
+프로세스 내 성능 지표(Prometheus 텍스트 형식)
+
+그래프 노드, 노드별 LLM 호출, MCP list_tools/call_tool의 지연 히스토그램·진행 중 게이지·오류 카운터와
+조건 분기 횟수를 기록한다. 꺼져 있으면(기본) 노드/분기 계측 래퍼를 설치하지 않는다.
+LLM 콜백은 풀에 들어간 모델마다 붙어 있고 요청마다 켜짐 여부만 확인하므로, 나중에 켜도 기존 모델이 계측된다.
+
+환경변수:
+    METRICS_ENABLED   on이면 계측 활성화(기본 off). METRICS_PORT를 지정해도 활성화된다.
+    METRICS_PORT      지정하면 METRICS_ADDR:METRICS_PORT/metrics 로컬 HTTP 엔드포인트를 띄운다.
+    METRICS_ADDR      엔드포인트 바인드 주소(기본 127.0.0.1)
+
+FastAPI 서버(ui/fastapi_app.py)는 같은 내용을 GET /metrics로도 노출한다.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .llm_callbacks import LLMRunObserver
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Family:
+    """레이블 조합별 값을 보관하는 지표 묶음의 공통 부분."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # [버킷별 개수..., 합계, 총 개수]
+                entry = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        entry = self._values.get(labels)
+        return entry[-1] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(entry)) for labels, entry in self._values.items())
+        lines = self._header()
+        for labels, entry in items:
+            for bound, count in zip(self.buckets, entry):
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {count}")
+            inf = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {entry[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """지표 묶음을 이름으로 등록하고 Prometheus 텍스트 형식으로 내보낸다."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls: type, name: str, documentation: str, labelnames: Sequence[str], **kwargs: Any) -> Any:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = cls(name, documentation, labelnames, **kwargs)
+            return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+        lines: List[str] = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """기록된 값을 모두 지운다(등록된 지표 정의는 유지)."""
+        for family in list(self._families.values()):
+            family.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+NODE_DURATION = REGISTRY.histogram("agent_graph_node_duration_seconds", "그래프 노드 실행 시간", ("node",))
+NODE_INFLIGHT = REGISTRY.gauge("agent_graph_node_inflight", "실행 중인 그래프 노드 수", ("node",))
+NODE_ERRORS = REGISTRY.counter("agent_graph_node_errors_total", "예외로 끝난 그래프 노드 실행 수", ("node", "error"))
+BRANCH_TOTAL = REGISTRY.counter("agent_graph_branch_total", "조건 분기 결과별 횟수", ("source", "target"))
+LLM_DURATION = REGISTRY.histogram(
+    "agent_llm_request_duration_seconds", "LLM 요청 시간", ("node", "provider", "model")
+)
+LLM_INFLIGHT = REGISTRY.gauge("agent_llm_requests_inflight", "진행 중인 LLM 요청 수", ("provider", "model"))
+LLM_ERRORS = REGISTRY.counter("agent_llm_errors_total", "실패한 LLM 요청 수", ("node", "provider", "model", "error"))
+MCP_DURATION = REGISTRY.histogram("agent_mcp_call_duration_seconds", "MCP 요청 시간", ("method", "tool"))
+MCP_INFLIGHT = REGISTRY.gauge("agent_mcp_calls_inflight", "진행 중인 MCP 요청 수", ("method",))
+MCP_ERRORS = REGISTRY.counter("agent_mcp_errors_total", "실패한 MCP 요청 수", ("method", "tool", "error"))
+
+
+def enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def enable(on: bool = True) -> None:
+    """계측을 켜거나 끈다. 노드 계측은 켠 뒤에 컴파일되는 그래프부터, LLM 계측은 다음 요청부터 적용된다."""
+    REGISTRY.enabled = on
+
+
+class _Timer:
+    """구간 시간을 히스토그램에 기록하고, 진행 중 게이지와 오류 카운터를 함께 갱신한다."""
+
+    __slots__ = ("_duration", "_inflight", "_errors", "_labels", "_inflight_labels", "_started")
+
+    def __init__(
+        self,
+        duration: Histogram,
+        inflight: Gauge,
+        errors: Counter,
+        labels: Tuple[str, ...],
+        inflight_labels: Tuple[str, ...],
+    ) -> None:
+        self._duration = duration
+        self._inflight = inflight
+        self._errors = errors
+        self._labels = labels
+        self._inflight_labels = inflight_labels
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._inflight.inc(self._inflight_labels)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self._duration.observe(self._labels, time.perf_counter() - self._started)
+        self._inflight.dec(self._inflight_labels)
+        if exc_type is not None:
+            self._errors.inc(self._labels + (exc_type.__name__,))
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def node_timer(node: str) -> Any:
+    return _Timer(NODE_DURATION, NODE_INFLIGHT, NODE_ERRORS, (node,), (node,))
+
+
+def mcp_timer(method: str, tool: str = "") -> Any:
+    """MCP 요청 구간 계측. 꺼져 있으면 아무것도 하지 않는 공용 컨텍스트를 돌려준다."""
+    if not REGISTRY.enabled:
+        return _NULL_TIMER
+    return _Timer(MCP_DURATION, MCP_INFLIGHT, MCP_ERRORS, (method, tool), (method,))
+
+
+def instrument_node(name: str, node: Callable[..., Any]) -> Callable[..., Any]:
+    """그래프 노드 함수를 계측 래퍼로 감싼다(동기/비동기 유지). 꺼져 있으면 원래 함수를 그대로 반환한다."""
+    if not REGISTRY.enabled:
+        return node
+
+    if inspect.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def _async_node(state: Any) -> Any:
+            with node_timer(name):
+                return await node(state)
+
+        return _async_node
+
+    @functools.wraps(node)
+    def _sync_node(state: Any) -> Any:
+        with node_timer(name):
+            return node(state)
+
+    return _sync_node
+
+
+def instrument_branch(source: str, condition: Callable[[Any], Any], path_map: Dict[Any, str]) -> Callable[[Any], Any]:
+    """조건 분기 함수를 감싸 분기 대상 노드별 횟수를 센다. 꺼져 있으면 원래 함수를 그대로 반환한다."""
+    if not REGISTRY.enabled:
+        return condition
+
+    @functools.wraps(condition)
+    def _branch(state: Any) -> Any:
+        result = condition(state)
+        BRANCH_TOTAL.inc((source, str(path_map.get(result, result))))
+        return result
+
+    return _branch
+
+
+class LLMMetricsObserver(LLMRunObserver):
+    """LLM 요청 시간/진행 중/오류를 기록한다(꺼져 있으면 기록하지 않음). 노드 이름은 langgraph_node에서 얻는다."""
+
+    def __init__(self, provider: str, model: str) -> None:
+        self._provider = provider
+        self._model = model
+        self._runs: Dict[Any, Tuple[float, str]] = {}
+
+    def on_start(self, run_id: Any, node: str) -> None:
+        if not REGISTRY.enabled:
+            return
+        LLM_INFLIGHT.inc((self._provider, self._model))
+        self._runs[run_id] = (time.perf_counter(), node)
+
+    def on_end(self, run_id: Any, response: Any = None, error: Optional[BaseException] = None) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        started, node = run
+        labels = (node, self._provider, self._model)
+        LLM_DURATION.observe(labels, time.perf_counter() - started)
+        LLM_INFLIGHT.dec((self._provider, self._model))
+        if error is not None:
+            LLM_ERRORS.inc(labels + (type(error).__name__,))
+
+
+_SERVER: Any = None
+_SERVER_LOCK = threading.Lock()
+
+
+def start_http_server(port: int, addr: str = "127.0.0.1") -> Any:
+    """GET /metrics를 제공하는 로컬 HTTP 서버를 데몬 스레드로 띄운다(프로세스당 한 번)."""
+    global _SERVER
+    with _SERVER_LOCK:
+        if _SERVER is not None:
+            return _SERVER
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = REGISTRY.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        _SERVER = server
+        return server
+
+
+def configure_from_env() -> None:
+    """METRICS_ENABLED/METRICS_PORT에 따라 계측을 켜고 엔드포인트를 띄운다. 여러 번 호출해도 안전하다."""
+    port = os.getenv("METRICS_PORT", "").strip()
+    if os.getenv("METRICS_ENABLED", "off").strip().lower() in ("1", "true", "yes", "on") or port:
+        enable(True)
+    if port and REGISTRY.enabled:
+        try:
+            start_http_server(int(port), os.getenv("METRICS_ADDR", "127.0.0.1"))
+        except (OSError, ValueError):
+            # 여러 워커가 같은 포트를 쓰는 경우 등: 엔드포인트 없이 계측만 유지한다.
+            pass
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class PreparedAgentCache:
+    """
+    준비된 tool-calling 에이전트(AgentExecutor)를 (LLM 설정, 도구 카탈로그 버전)별로 보관하는 LRU 캐시.
+    프롬프트 구성/도구 스키마 바인딩/Executor 생성을 턴마다 반복하지 않도록 한다.
+    maxsize=0이면 캐시하지 않는다(비교 측정용).
+    """
+
+    def __init__(self, maxsize: int = 8) -> None:
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = build()
+        if self._maxsize <= 0:
+            return value
+
+        with self._lock:
+            value = self._entries.setdefault(key, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Tuple
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(text: str) -> str:
+    """캐시 키용 입력 정규화: 유니코드 NFKC, 앞뒤 공백 제거, 연속 공백 축약, 소문자화."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip().lower()
+
+
+def make_cache_key(prefix: str, llm_key: Hashable, text: str) -> str:
+    """(노드 prefix, 해석된 모델 설정, 정규화된 입력)을 고정 길이 키로 만든다."""
+    raw = f"{prefix}\x1f{llm_key!r}\x1f{normalize_input(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ClassifierCacheBackend(ABC):
+    """분류 결과(bool) 저장소 인터페이스."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bool]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: bool) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryLRUCache(ClassifierCacheBackend):
+    """항목 수 상한(LRU)과 TTL을 갖는 프로세스 내 캐시."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600.0) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bool]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bool) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ClassifierCacheBackend):
+    """
+    여러 워커 프로세스가 공유하는 SQLite 캐시.
+    WAL 모드로 동시 읽기를 허용하고, 쓰기 일정 횟수마다 만료 행 정리와 행 수 상한을 적용한다.
+    """
+
+    _PRUNE_EVERY = 256
+
+    def __init__(self, path: str, ttl: float = 86400.0, max_rows: int = 100_000) -> None:
+        self._path = path
+        self._ttl = ttl
+        self._max_rows = max_rows
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifier_cache ("
+            " key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS classifier_cache_expires ON classifier_cache(expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bool]:
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM classifier_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return None if row is None else bool(row[0])
+
+    def set(self, key: str, value: bool) -> None:
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO classifier_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, int(value), time.time() + self._ttl),
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self.prune()
+        except sqlite3.Error:
+            # 캐시는 최적화 용도이므로 저장 실패(잠금 경합 등)는 무시
+            pass
+
+    def prune(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM classifier_cache WHERE expires_at <= ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM classifier_cache WHERE key IN ("
+            " SELECT key FROM classifier_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_rows,),
+        )
+
+    def __len__(self) -> int:
+        try:
+            return int(self._conn().execute("SELECT COUNT(*) FROM classifier_cache").fetchone()[0])
+        except sqlite3.Error:
+            return 0
+
+
+class ClassifierCache:
+    """
+    YES/NO 분류 결과 캐시. 메모리 LRU를 1차로, (선택) SQLite를 2차로 사용한다.
+    SQLite에서 찾은 값은 메모리로 끌어올린다.
+    """
+
+    def __init__(self, memory: Optional[MemoryLRUCache] = None, persistent: Optional[ClassifierCacheBackend] = None) -> None:
+        self._memory = memory or MemoryLRUCache()
+        self._persistent = persistent
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ClassifierCache"]:
+        """
+        환경변수로 캐시를 구성한다.
+        CLASSIFIER_CACHE: off | memory(기본) | sqlite
+        CLASSIFIER_CACHE_MAXSIZE, CLASSIFIER_CACHE_TTL, CLASSIFIER_CACHE_SQLITE_PATH
+        """
+        mode = os.getenv("CLASSIFIER_CACHE", "memory").strip().lower()
+        if mode in ("off", "false", "0", "none", ""):
+            return None
+        ttl = float(os.getenv("CLASSIFIER_CACHE_TTL", "3600"))
+        memory = MemoryLRUCache(maxsize=int(os.getenv("CLASSIFIER_CACHE_MAXSIZE", "4096")), ttl=ttl)
+        persistent = None
+        if mode == "sqlite":
+            default_path = Path(__file__).resolve().parents[2] / ".cache" / "classifier_cache.sqlite3"
+            path = os.getenv("CLASSIFIER_CACHE_SQLITE_PATH", str(default_path))
+            persistent = SQLiteCache(path, ttl=ttl)
+        return cls(memory, persistent)
+
+    def get(self, key: str) -> Optional[bool]:
+        value = self._memory.get(key)
+        if value is None and self._persistent is not None:
+            value = self._persistent.get(key)
+            if value is not None:
+                self._memory.set(key, value)
+                with self._lock:
+                    self.persistent_hits += 1
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bool) -> None:
+        self._memory.set(key, value)
+        if self._persistent is not None:
+            self._persistent.set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.persistent_hits,
+                "memory_size": len(self._memory),
+                "evictions": self._memory.evictions,
+                "expirations": self._memory.expirations,
+            }
+
+
+_DIGITS = re.compile(r"\d[\d,.]*")
+_PUNCT = re.compile(r"[^\w\s#]")
+
+
+def intent_signature(text: str) -> str:
+    """
+    도구 적합성 판정용 의도 시그니처.
+    금액 등 숫자는 '#'으로, 구두점은 제거해 같은 의도의 요청이 같은 시그니처를 갖게 한다.
+    """
+    normalized = _DIGITS.sub("#", normalize_input(text))
+    return _WHITESPACE.sub(" ", _PUNCT.sub(" ", normalized)).strip()
+
+
+class ToolEligibilityCache:
+    """
+    도구 적합성(YES/NO) 판정 캐시. 키는 (도구 카탈로그 지문, 모델 설정, 의도 시그니처)이다.
+    다른 카탈로그 지문이 들어오면 이전 판정은 모두 폐기한다.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0) -> None:
+        self._memory = MemoryLRUCache(maxsize=maxsize, ttl=ttl)
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ToolEligibilityCache"]:
+        """TOOL_ELIGIBILITY_CACHE(기본 on), TOOL_ELIGIBILITY_CACHE_TTL로 구성한다."""
+        if os.getenv("TOOL_ELIGIBILITY_CACHE", "on").strip().lower() in ("off", "false", "0", "none"):
+            return None
+        return cls(ttl=float(os.getenv("TOOL_ELIGIBILITY_CACHE_TTL", "3600")))
+
+    def _key(self, fingerprint: str, llm_key: Hashable, text: str) -> str:
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                if self._fingerprint is not None:
+                    self._memory = MemoryLRUCache(maxsize=self._maxsize, ttl=self._ttl)
+                    self.invalidations += 1
+                self._fingerprint = fingerprint
+        raw = f"{fingerprint}\x1f{llm_key!r}\x1f{intent_signature(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, fingerprint: str, llm_key: Hashable, text: str) -> Optional[bool]:
+        value = self._memory.get(self._key(fingerprint, llm_key, text))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, fingerprint: str, llm_key: Hashable, text: str, value: bool) -> None:
+        self._memory.set(self._key(fingerprint, llm_key, text), value)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._memory),
+            }
@@ -1,7 +1,13 @@
+import asyncio
+import json
 import os
-from typing import Any
-from dotenv import load_dotenv
+import threading
+from typing import Any, Dict, Hashable, Tuple
+from dotenv import dotenv_values, find_dotenv
 from llm import LLMFactory
+from agent.llm_callbacks import attach_llm_callback, make_llm_handler
+from agent.metrics import LLMMetricsObserver
+from agent.tracing import LLMTraceObserver
 
 
 def _get_env(key: str, default: str | None = None) -> str | None:
@@ -11,13 +17,125 @@ def _get_env(key: str, default: str | None = None) -> str | None:
     return value
 
 
-def create_langchain_llm_from_env(prefix: str) -> Any:
+class _DotenvWatcher:
+    """
+    .env 파일을 mtime 기준으로 다시 읽는 로더.
+    - 파일이 바뀌지 않았으면 stat 한 번으로 끝난다.
+    - 프로세스 환경변수가 .env보다 우선한다(load_dotenv 기본 동작과 동일).
+      단, 이전에 .env에서 주입한 값은 파일 변경 시 새 값으로 갱신/제거한다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._path: str | None = None
+        self._mtime_ns: int | None = None
+        self._owned: Dict[str, str] = {}
+        self.reloads = 0
+
+    def refresh(self) -> bool:
+        """변경된 경우에만 .env를 반영하고, 반영 여부를 반환한다."""
+        if self._path is None:
+            self._path = find_dotenv() or ""
+        if not self._path:
+            return False
+        try:
+            mtime_ns = os.stat(self._path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime_ns == self._mtime_ns:
+            return False
+
+        with self._lock:
+            if mtime_ns == self._mtime_ns:
+                return False
+            values = {k: v for k, v in dotenv_values(self._path).items() if v is not None}
+            for key in list(self._owned):
+                if key not in values and os.environ.get(key) == self._owned[key]:
+                    os.environ.pop(key, None)
+                    del self._owned[key]
+            for key, value in values.items():
+                if key not in os.environ or os.environ.get(key) == self._owned.get(key):
+                    os.environ[key] = value
+                    self._owned[key] = value
+            self._mtime_ns = mtime_ns
+            self.reloads += 1
+            return True
+
+
+class LLMClientPool:
+    """
+    해석된 LLM 설정(provider, model, kwargs)별로 LangChain 모델을 재사용하는 프로세스 전역 풀.
+    같은 설정의 노드 호출은 동일한 클라이언트(및 keep-alive 연결)를 공유한다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._models: Dict[Hashable, Any] = {}
+        self._llms: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, kwargs: Dict[str, Any]) -> Tuple[str, str, str]:
+        frozen = json.dumps(kwargs, sort_keys=True, default=repr, ensure_ascii=False)
+        return provider.lower(), model, frozen
+
+    def get(self, provider: str, model: str, **kwargs: Any) -> Any:
+        key = self.make_key(provider, model, kwargs)
+        model_obj = self._models.get(key)
+        if model_obj is not None:
+            with self._lock:
+                self.hits += 1
+            return model_obj
+
+        with self._lock:
+            model_obj = self._models.get(key)
+            if model_obj is not None:
+                self.hits += 1
+                return model_obj
+            llm = LLMFactory.create(provider=provider, model=model, **kwargs)
+            # 지표/추적 콜백은 항상 붙이고 켜짐 여부는 요청마다 확인한다(풀에 들어간 뒤에 켜도 반영).
+            handler = make_llm_handler(LLMMetricsObserver(provider, model), LLMTraceObserver(provider, model))
+            model_obj = attach_llm_callback(llm.as_langchain_model(), handler)
+            self._models[key] = model_obj
+            self._llms[key] = llm
+            self.misses += 1
+            return model_obj
+
+    def get_llm(self, provider: str, model: str, **kwargs: Any) -> Any:
+        """풀에 있는 LangChain 모델을 만든 BaseLLM(예열 등 제공자 기능용)을 반환한다."""
+        self.get(provider, model, **kwargs)
+        return self._llms[self.make_key(provider, model, kwargs)]
+
+    async def aclose(self) -> None:
+        """풀의 LLM들이 현재 이벤트 루프에 묶어 둔 자원을 닫는다. 풀 자체는 유지한다."""
+        with self._lock:
+            llms = list(self._llms.values())
+        await asyncio.gather(*(llm.aclose() for llm in llms), return_exceptions=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._llms.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._models)}
+
+
+_DOTENV = _DotenvWatcher()
+_POOL = LLMClientPool()
+
+
+def resolve_llm_config(prefix: str) -> Tuple[str, str, Dict[str, Any]]:
     """
-    환경변수에서 제공자/모델/옵션을 읽어 LangChain 호환 LLM을 생성한다.
+    환경변수에서 노드 prefix의 (provider, model, kwargs)를 해석한다.
     prefix가 있는 경우 `{PREFIX}_PROVIDER`, `{PREFIX}_MODEL`, `{PREFIX}_TEMPERATURE`를 우선 사용하며,
     없으면 전역 `LLM_PROVIDER`, `LLM_MODEL` 값을 사용한다.
     """
-    load_dotenv()
+    _DOTENV.refresh()
 
     provider = _get_env(f"{prefix}_PROVIDER", _get_env("LLM_PROVIDER", "ollama"))
     model = _get_env(f"{prefix}_MODEL", _get_env("LLM_MODEL", "gemma3n:e4b"))
@@ -38,7 +156,41 @@ def create_langchain_llm_from_env(prefix: str) -> Any:
         except ValueError:
             pass
 
-    llm = LLMFactory.create(provider=provider, model=model, **kwargs)
-    return llm.as_langchain_model()
+    return provider, model, kwargs
+
+
+def create_langchain_llm_from_env(prefix: str) -> Any:
+    """
+    환경변수에서 제공자/모델/옵션을 읽어 LangChain 호환 LLM을 반환한다.
+    동일한 설정의 모델은 프로세스 전역 풀에서 재사용되며, .env는 파일이 바뀐 경우에만 다시 읽는다.
+    """
+    provider, model, kwargs = resolve_llm_config(prefix)
+    return _POOL.get(provider, model, **kwargs)
+
+
+def create_keyed_langchain_llm_from_env(prefix: str) -> Tuple[Hashable, Any]:
+    """create_langchain_llm_from_env와 같으나, 해석된 설정 키를 함께 반환한다(설정별 파생 객체 캐시용)."""
+    provider, model, kwargs = resolve_llm_config(prefix)
+    return LLMClientPool.make_key(provider, model, kwargs), _POOL.get(provider, model, **kwargs)
+
+
+async def warmup_llm_from_env(prefix: str) -> Tuple[str, str]:
+    """노드 prefix의 모델을 풀에 만들어 두고 제공자별 예열(모델 적재, 연결 개설)을 수행한다."""
+    provider, model, kwargs = resolve_llm_config(prefix)
+    await _POOL.get_llm(provider, model, **kwargs).awarmup()
+    return provider, model
+
+
+def get_llm_pool_stats() -> Dict[str, int]:
+    """LLM 클라이언트 풀의 hit/miss/크기와 .env 재로딩 횟수를 반환한다."""
+    return {**_POOL.stats(), "env_reloads": _DOTENV.reloads}
+
+
+async def aclose_llm_pool() -> None:
+    """풀의 LLM들이 현재 이벤트 루프에 묶어 둔 자원(비동기 연결 풀 등)을 닫는다(그래프 aclose에서 호출)."""
+    await _POOL.aclose()
 
 
+def clear_llm_pool() -> None:
+    """풀에 보관된 모델과 카운터를 초기화한다(설정 변경 강제 반영/테스트용)."""
+    _POOL.clear()
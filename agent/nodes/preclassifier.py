@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+YES = "YES"
+NO = "NO"
+UNSURE = "UNSURE"
+
+
+class RuleDecision:
+    """규칙 판정 결과. verdict는 YES/NO/UNSURE, confidence는 0.0~1.0."""
+
+    __slots__ = ("verdict", "confidence", "rule")
+
+    def __init__(self, verdict: str, confidence: float = 1.0, rule: Optional[str] = None) -> None:
+        self.verdict = verdict
+        self.confidence = confidence
+        self.rule = rule
+
+    @property
+    def decided(self) -> bool:
+        return self.verdict != UNSURE
+
+    def __repr__(self) -> str:
+        return f"RuleDecision({self.verdict!r}, {self.confidence:.2f}, rule={self.rule!r})"
+
+
+UNSURE_DECISION = RuleDecision(UNSURE, 0.0)
+
+
+class PreClassifierRule(ABC):
+    """LLM 분류 전에 적용되는 결정적 규칙. 판단할 수 없으면 None을 반환한다."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @abstractmethod
+    def evaluate(self, text: str) -> Optional[RuleDecision]:
+        raise NotImplementedError
+
+
+class RegexRule(PreClassifierRule):
+    """정규식이 일치하면 지정한 판정을 내리는 규칙."""
+
+    def __init__(self, name: str, pattern: str, verdict: str, confidence: float) -> None:
+        super().__init__(name)
+        self._pattern = re.compile(pattern)
+        self._verdict = verdict
+        self._confidence = confidence
+
+    def evaluate(self, text: str) -> Optional[RuleDecision]:
+        if self._pattern.search(text):
+            return RuleDecision(self._verdict, self._confidence, self.name)
+        return None
+
+
+class PreClassifier:
+    """
+    규칙 목록을 순서대로 적용하는 사전 분류기.
+    첫 번째로 min_confidence 이상인 판정을 채택하고, 없으면 UNSURE를 돌려 LLM으로 넘긴다.
+    규칙별 적중 횟수와 LLM으로 넘어간 횟수를 집계한다.
+    """
+
+    def __init__(self, name: str, rules: Iterable[PreClassifierRule], min_confidence: float = 0.8) -> None:
+        self.name = name
+        self._rules: List[PreClassifierRule] = list(rules)
+        self._min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._fallthrough = 0
+        self._hits: Dict[str, int] = {rule.name: 0 for rule in self._rules}
+
+    def classify(self, text: str) -> RuleDecision:
+        normalized = _normalize(text)
+        decision = UNSURE_DECISION
+        for rule in self._rules:
+            candidate = rule.evaluate(normalized)
+            if candidate is not None and candidate.decided and candidate.confidence >= self._min_confidence:
+                decision = candidate
+                break
+        with self._lock:
+            self._calls += 1
+            if decision.decided:
+                self._hits[decision.rule] = self._hits.get(decision.rule, 0) + 1
+            else:
+                self._fallthrough += 1
+        return decision
+
+    def stats(self) -> Dict[str, object]:
+        """호출 수, LLM 위임 수, 규칙별 적중 수와 적중률을 반환한다."""
+        with self._lock:
+            calls = self._calls
+            decided = calls - self._fallthrough
+            return {
+                "calls": calls,
+                "decided": decided,
+                "fallthrough": self._fallthrough,
+                "hit_rate": (decided / calls) if calls else 0.0,
+                "rules": {
+                    name: {"hits": hits, "hit_rate": (hits / calls) if calls else 0.0}
+                    for name, hits in self._hits.items()
+                },
+            }
+
+
+_TRAILING = re.compile(r"[\s.!?~…ㅎㅋ^_;:,)\]\"'“”‘’]+$")
+
+
+def _normalize(text: str) -> str:
+    """앞뒤 공백과 문장 끝 구두점/이모티콘성 문자를 제거한다."""
+    return _TRAILING.sub("", (text or "").strip())
+
+
+def default_politeness_preclassifier() -> PreClassifier:
+    """존대말 판별용 기본 규칙 세트."""
+    return PreClassifier(
+        "NODE_POLITENESS",
+        [
+            RegexRule("honorific_formal_ending", r"(니다|니까|십시오|십시다)$", YES, 0.97),
+            RegexRule("honorific_seyo_ending", r"(세요|셔요|시죠|시지요|십니까)$", YES, 0.95),
+            RegexRule("honorific_yo_ending", r"[가-힣]요$", YES, 0.9),
+            RegexRule("banmal_ending", r"(해|해라|하자|줘|줘라|내라|냐|니|야|거든|잖아|할게|할래)$", NO, 0.85),
+        ],
+    )
+
+
+_AMOUNT = r"(\d[\d,]*\s*(원|만원|천원|달러|\$)?|[일이삼사오육칠팔구십백천만]+\s*원)"
+_PAY_VERB = r"(지불|결제|송금|계산|납부|입금|구매|주문|살게|사겠|[Pp]ay)"
+
+
+def default_pay_intent_preclassifier() -> PreClassifier:
+    """지불 의사 판별용 기본 규칙 세트."""
+    return PreClassifier(
+        "NODE_PAY_INTENT",
+        [
+            RegexRule("amount_and_pay_verb", rf"{_AMOUNT}.*{_PAY_VERB}|{_PAY_VERB}.*{_AMOUNT}", YES, 0.9),
+            # 금액/지불 동사가 없다는 것만으로는 구매 요청을 배제할 수 없어 기본 min_confidence 아래로 둔다(참고용).
+            RegexRule("no_amount_no_pay_verb", rf"^(?!.*{_AMOUNT})(?!.*{_PAY_VERB}).*$", NO, 0.6),
+        ],
+    )
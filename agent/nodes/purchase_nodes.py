@@ -1,29 +1,120 @@
-from typing import Any, Callable, List, TypedDict, Awaitable
+import asyncio
+import hashlib
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, TypedDict, Awaitable
 from langchain.tools import StructuredTool
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from .llm_utils import create_langchain_llm_from_env
+from llm.scheduler import llm_priority
+from .agent_cache import PreparedAgentCache
+from .classifier_cache import ClassifierCache, ToolEligibilityCache, make_cache_key
+from .preclassifier import PreClassifier, YES
+from .llm_utils import create_langchain_llm_from_env, create_keyed_langchain_llm_from_env
 
 
 class GraphState(TypedDict):
     input: str
+    history: List[BaseMessage]
     is_honorific: bool
     intent_pay_amount: bool
     tool_eligible: bool
+    multilabel_ok: bool
+    multilabel_next: str
     output: str
 
 
-def make_node_politeness() -> Callable[[GraphState], Any]:
-    async def node_politeness(state: GraphState) -> GraphState:
-        llm = create_langchain_llm_from_env("NODE_POLITENESS")
-        instruction = (
-            "사용자 발화가 한국어 존대말(높임말)인지 판별하라. 반말이거나 애매하면 NO, 존대말이면 YES.\n"
-            "반드시 YES 또는 NO만 출력하라. 다른 말 금지."
-        )
-        prompt_text = f"[Instruction]\n{instruction}\n\n[User Input]\n{state['input']}"
+# 분류 프롬프트에 넣는 최근 대화 메시지 수(요약은 별도로 포함). 기록이 길어도 분류 프롬프트 크기를 고정한다.
+_CLASSIFIER_HISTORY_MESSAGES = 4
+_HISTORY_ROLES = {"system": "요약", "human": "사용자", "ai": "상담원"}
+
+
+def _format_history(history: Optional[List[BaseMessage]]) -> str:
+    """분류 프롬프트용 대화 맥락: 요약(SystemMessage)과 최근 메시지 몇 개를 한 줄씩 적는다."""
+    if not history:
+        return ""
+    summary = [m for m in history if m.type == "system"]
+    recent = [m for m in history if m.type != "system"][-_CLASSIFIER_HISTORY_MESSAGES:]
+    lines = []
+    for message in summary + recent:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        lines.append(f"{_HISTORY_ROLES.get(message.type, message.type)}: {content}")
+    return "\n".join(lines)
+
+
+async def _classify_yes_no(
+    prefix: str,
+    instruction: str,
+    text: str,
+    preclassifier: Optional[PreClassifier] = None,
+    cache: Optional[ClassifierCache] = None,
+    history: Optional[List[BaseMessage]] = None,
+) -> bool:
+    """
+    YES/NO 분류 공통 경로: 규칙 기반 사전 분류 → 응답 캐시 → LLM 순으로 판정한다.
+    LLM 판정 결과만 캐시에 저장한다.
+    history가 있으면 규칙/캐시 키가 맥락을 담지 못하므로 두 단계를 건너뛰고 대화 맥락과 함께 LLM에 묻는다.
+    """
+    context = _format_history(history)
+    if preclassifier is not None and not context:
+        decision = preclassifier.classify(text)
+        if decision.decided:
+            return decision.verdict == YES
+
+    llm_key, llm = create_keyed_langchain_llm_from_env(prefix)
+    cache_key = make_cache_key(prefix, llm_key, text) if cache is not None and not context else None
+    if cache_key is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    prompt_text = f"[Instruction]\n{instruction}\n\n"
+    if context:
+        prompt_text += f"[Conversation]\n{context}\n\n"
+    prompt_text += f"[User Input]\n{text}"
+    with llm_priority("classifier"):
         resp = await llm.ainvoke(prompt_text)
-        content = getattr(resp, "content", "").strip().upper()
-        return {**state, "is_honorific": content.startswith("Y")}
+    content = getattr(resp, "content", "").strip().upper()
+    result = content.startswith("Y")
+    if cache_key is not None:
+        cache.set(cache_key, result)
+    return result
+
+
+async def classify_politeness(
+    text: str,
+    preclassifier: Optional[PreClassifier] = None,
+    cache: Optional[ClassifierCache] = None,
+) -> bool:
+    """사용자 발화가 존대말인지 판별한다."""
+    instruction = (
+        "사용자 발화가 한국어 존대말(높임말)인지 판별하라. 반말이거나 애매하면 NO, 존대말이면 YES.\n"
+        "반드시 YES 또는 NO만 출력하라. 다른 말 금지."
+    )
+    return await _classify_yes_no("NODE_POLITENESS", instruction, text, preclassifier, cache)
+
+
+async def classify_pay_amount(
+    text: str,
+    preclassifier: Optional[PreClassifier] = None,
+    cache: Optional[ClassifierCache] = None,
+    history: Optional[List[BaseMessage]] = None,
+) -> bool:
+    """사용자 발화에 금액 지불 의사가 있는지 판별한다. history가 있으면 이전 대화를 맥락으로 함께 본다."""
+    instruction = (
+        "다음 사용자 발화에 '금액을 지불(결제)하겠다는 의사'가 분명히 포함되어 있으면 YES,\n"
+        "(숫자나 금액 표현 포함 등) 그렇지 않거나 정보가 부족하면 NO만 출력하라. 다른 말 금지.\n"
+        "이전 대화가 주어지면 '그 상품'처럼 앞에서 언급된 상품/금액을 가리키는 표현도 함께 고려하라."
+    )
+    return await _classify_yes_no("NODE_PAY_INTENT", instruction, text, preclassifier, cache, history)
+
+
+def make_node_politeness(
+    preclassifier: Optional[PreClassifier] = None,
+    cache: Optional[ClassifierCache] = None,
+) -> Callable[[GraphState], Any]:
+    async def node_politeness(state: GraphState) -> GraphState:
+        return {**state, "is_honorific": await classify_politeness(state["input"], preclassifier, cache)}
 
     return node_politeness
 
@@ -32,21 +123,46 @@ def node_polite_warning(state: GraphState) -> GraphState:
     return {**state, "output": "존대말을 써주세요"}
 
 
-def make_node_classify_pay_amount() -> Callable[[GraphState], Any]:
+def make_node_classify_pay_amount(
+    preclassifier: Optional[PreClassifier] = None,
+    cache: Optional[ClassifierCache] = None,
+) -> Callable[[GraphState], Any]:
     async def node_classify_pay_amount(state: GraphState) -> GraphState:
-        llm = create_langchain_llm_from_env("NODE_PAY_INTENT")
-        instruction = (
-            "다음 사용자 발화에 '금액을 지불(결제)하겠다는 의사'가 분명히 포함되어 있으면 YES,\n"
-            "(숫자나 금액 표현 포함 등) 그렇지 않거나 정보가 부족하면 NO만 출력하라. 다른 말 금지."
-        )
-        prompt_text = f"[Instruction]\n{instruction}\n\n[User Input]\n{state['input']}"
-        resp = await llm.ainvoke(prompt_text)
-        content = getattr(resp, "content", "").strip().upper()
-        return {**state, "intent_pay_amount": content.startswith("Y")}
+        intent = await classify_pay_amount(state["input"], preclassifier, cache, state.get("history"))
+        return {**state, "intent_pay_amount": intent}
 
     return node_classify_pay_amount
 
 
+def make_node_speculative_classify(
+    politeness_preclassifier: Optional[PreClassifier] = None,
+    pay_intent_preclassifier: Optional[PreClassifier] = None,
+    cache: Optional[ClassifierCache] = None,
+) -> Callable[[GraphState], Any]:
+    """
+    존대말 판별과 지불 의사 판별을 동시에 실행하는 노드(추측 실행 모드).
+    존대말이 아니면 지불 의사 판별 결과는 쓰이지 않으므로 즉시 취소한다.
+    """
+
+    async def node_speculative_classify(state: GraphState) -> GraphState:
+        pay_task = asyncio.ensure_future(
+            classify_pay_amount(state["input"], pay_intent_preclassifier, cache, state.get("history"))
+        )
+        # 버려진 결과의 예외가 "never retrieved" 경고로 남지 않도록 회수
+        pay_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            is_honorific = await classify_politeness(state["input"], politeness_preclassifier, cache)
+            if not is_honorific:
+                pay_task.cancel()
+                return {**state, "is_honorific": False, "intent_pay_amount": False}
+            return {**state, "is_honorific": True, "intent_pay_amount": await pay_task}
+        finally:
+            if not pay_task.done():
+                pay_task.cancel()
+
+    return node_speculative_classify
+
+
 def node_ask_product(state: GraphState) -> GraphState:
     return {
         **state,
@@ -54,17 +170,44 @@ def node_ask_product(state: GraphState) -> GraphState:
     }
 
 
-def make_node_check_tool(get_tools: Callable[[], Awaitable[List[StructuredTool]]]) -> Callable[[GraphState], Any]:
+def _format_tools(tools: List[StructuredTool]) -> str:
+    tool_lines = []
+    for tool in tools:
+        name = getattr(tool, "name", "")
+        desc = getattr(tool, "description", "")
+        tool_lines.append(f"- {name}: {desc}")
+    return "\n".join(tool_lines) if tool_lines else "(no tools)"
+
+
+def _catalog_version(tools: List[StructuredTool], get_catalog_version: Optional[Callable[[], Optional[str]]]) -> str:
+    """도구 카탈로그 버전. 제공자가 없으면 도구 이름/설명의 해시로 대신한다."""
+    version = get_catalog_version() if get_catalog_version else None
+    if version is None:
+        names = "\x1f".join(f"{getattr(t, 'name', '')}\x1e{getattr(t, 'description', '')}" for t in tools)
+        version = hashlib.sha256(names.encode("utf-8")).hexdigest()[:16]
+    return version
+
+
+def make_node_check_tool(
+    get_tools: Callable[[], Awaitable[List[StructuredTool]]],
+    get_catalog_version: Optional[Callable[[], Optional[str]]] = None,
+    eligibility_cache: Optional[ToolEligibilityCache] = None,
+) -> Callable[[GraphState], Any]:
+    """
+    구매/결제를 수행할 도구가 있는지 판정하는 노드.
+    eligibility_cache가 있으면 (카탈로그 버전, 의도 시그니처)가 같은 요청은 LLM 호출 없이 이전 판정을 재사용한다.
+    """
+
     async def node_check_tool(state: GraphState) -> GraphState:
         tools = await get_tools()
-        tool_lines = []
-        for tool in tools:
-            name = getattr(tool, "name", "")
-            desc = getattr(tool, "description", "")
-            tool_lines.append(f"- {name}: {desc}")
-        tools_text = "\n".join(tool_lines) if tool_lines else "(no tools)"
-
-        llm = create_langchain_llm_from_env("NODE_TOOL_CHECK")
+        llm_key, llm = create_keyed_langchain_llm_from_env("NODE_TOOL_CHECK")
+        version = _catalog_version(tools, get_catalog_version) if eligibility_cache is not None else None
+        if version is not None:
+            cached = eligibility_cache.get(version, llm_key, state["input"])
+            if cached is not None:
+                return {**state, "tool_eligible": cached}
+
+        tools_text = _format_tools(tools)
         instruction = (
             "너는 제공된 MCP 도구 목록을 보고, 사용자 요청이 '특정 상품 구매/주문/결제'를 실제 수행할 수 있는 도구가 있는지 판단한다.\n"
             "도구의 이름/설명 상 해당 액션을 수행할 수 있다고 합리적으로 볼 수 있을 때만 YES, 아니면 NO.\n"
@@ -76,28 +219,158 @@ def make_node_check_tool(get_tools: Callable[[], Awaitable[List[StructuredTool]]
             f"[Tools]\n{tools_text}\n"
         )
         try:
-            resp = await llm.ainvoke(prompt_text)
+            with llm_priority("classifier"):
+                resp = await llm.ainvoke(prompt_text)
             content = getattr(resp, "content", "").strip().upper()
             eligible = content.startswith("Y")
         except Exception:
-            eligible = False
+            return {**state, "tool_eligible": False}
+        if version is not None:
+            eligibility_cache.set(version, llm_key, state["input"], eligible)
         return {**state, "tool_eligible": eligible}
 
     return node_check_tool
 
 
-def make_node_agent(get_tools: Callable[[], Awaitable[List[StructuredTool]]]) -> Callable[[GraphState], Any]:
+_MULTILABEL_KEYS = ("honorific", "pay_intent", "tool_eligible")
+_JSON_OBJECT = re.compile(r"\{.*?\}", re.DOTALL)
+
+
+def _coerce_label(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        normalized = value.strip().upper()
+        if normalized in ("YES", "Y", "TRUE"):
+            return True
+        if normalized in ("NO", "N", "FALSE"):
+            return False
+    return None
+
+
+def parse_multilabel_response(content: str) -> Optional[Dict[str, bool]]:
+    """
+    다중 라벨 응답에서 JSON 객체를 찾아 검증한다.
+    세 키가 모두 있고 각 값이 불리언(또는 YES/NO 문자열)일 때만 결과를 반환하고, 아니면 None.
+    """
+    for match in _JSON_OBJECT.finditer(content or ""):
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        labels = {key: _coerce_label(data.get(key)) for key in _MULTILABEL_KEYS}
+        if all(v is not None for v in labels.values()):
+            return labels  # type: ignore[return-value]
+    return None
+
+
+def make_node_multilabel_classify(
+    get_tools: Callable[[], Awaitable[List[StructuredTool]]],
+    politeness_preclassifier: Optional[PreClassifier] = None,
+    pay_intent_preclassifier: Optional[PreClassifier] = None,
+) -> Callable[[GraphState], Any]:
+    """
+    존대말/지불 의사/도구 가능 여부를 한 번의 LLM 호출(JSON 응답)로 판정하는 노드.
+    사전 분류기만으로 종결 분기가 정해지면 LLM을 호출하지 않는다.
+    규칙이 이미 판정한 라벨은 LLM 응답으로 덮어쓰지 않는다(노드별 경로와 같은 분기 보장).
+    규칙이 존대말/지불 의사를 모두 YES로 정하면 multilabel_next="check_tool"로 남은 도구 판정만 check_tool에 맡긴다.
+    응답이 검증을 통과하지 못하면 multilabel_ok=False로 표시해 노드별 경로로 넘긴다.
+    """
+
+    def _rule(preclassifier: Optional[PreClassifier], text: str) -> Optional[bool]:
+        if preclassifier is None:
+            return None
+        decision = preclassifier.classify(text)
+        return decision.verdict == YES if decision.decided else None
+
+    async def node_multilabel_classify(state: GraphState) -> GraphState:
+        text = state["input"]
+        rule_polite = _rule(politeness_preclassifier, text)
+        if rule_polite is False:
+            return {**state, "is_honorific": False, "multilabel_ok": True}
+        context = _format_history(state.get("history"))
+        # 대화 맥락이 있으면 지불 의사는 규칙으로 정하지 않는다("그 상품으로 결제해 주세요").
+        rule_pay = _rule(pay_intent_preclassifier, text) if not context else None
+        if rule_polite and rule_pay is False:
+            return {**state, "is_honorific": True, "intent_pay_amount": False, "multilabel_ok": True}
+        if rule_polite and rule_pay:
+            # 남은 판정은 tool_eligible 하나: 분류 노드를 다시 거치지 않고 적합성 캐시를 쓰는 check_tool로 바로 간다.
+            return {
+                **state,
+                "is_honorific": True,
+                "intent_pay_amount": True,
+                "multilabel_ok": True,
+                "multilabel_next": "check_tool",
+            }
+
+        try:
+            tools = await get_tools()
+            llm = create_langchain_llm_from_env("NODE_MULTI_LABEL")
+            instruction = (
+                "사용자 발화와 MCP 도구 목록을 보고 다음 세 가지를 판정하라.\n"
+                "- honorific: 발화가 한국어 존대말(높임말)이면 true, 반말이거나 애매하면 false\n"
+                "- pay_intent: 금액을 지불(결제)하겠다는 의사가 분명히 포함되어 있으면 true, 아니면 false\n"
+                "- tool_eligible: 도구의 이름/설명 상 '특정 상품 구매/주문/결제'를 실제 수행할 수 있는 도구가 있으면 true, 아니면 false\n"
+                '반드시 {"honorific": true|false, "pay_intent": true|false, "tool_eligible": true|false} 형식의 JSON 한 개만 출력하라.'
+            )
+            prompt_text = f"[Instruction]\n{instruction}\n\n"
+            if context:
+                prompt_text += f"[Conversation]\n{context}\n\n"
+            prompt_text += f"[User Input]\n{text}\n\n[Tools]\n{_format_tools(tools)}\n"
+            with llm_priority("classifier"):
+                resp = await llm.ainvoke(prompt_text)
+            labels = parse_multilabel_response(getattr(resp, "content", ""))
+        except Exception:
+            labels = None
+
+        if labels is None:
+            return {**state, "multilabel_ok": False}
+        return {
+            **state,
+            "is_honorific": labels["honorific"] if rule_polite is None else rule_polite,
+            "intent_pay_amount": labels["pay_intent"] if rule_pay is None else rule_pay,
+            "tool_eligible": labels["tool_eligible"],
+            "multilabel_ok": True,
+        }
+
+    return node_multilabel_classify
+
+
+def _build_tool_calling_executor(llm: Any, tools: List[StructuredTool]) -> Any:
+    # langchain.agents는 임포트 비용이 크므로 에이전트를 처음 준비할 때 로드한다.
+    from langchain.agents import create_tool_calling_agent, AgentExecutor
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "너는 제공된 MCP 툴 중 적절한 것을 선택해 호출한다. 필요 없으면 직접 답하라."),
+        MessagesPlaceholder(variable_name="chat_history", optional=True),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+    agent = create_tool_calling_agent(llm, tools, prompt)
+    return AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+
+
+def make_node_agent(
+    get_tools: Callable[[], Awaitable[List[StructuredTool]]],
+    get_catalog_version: Optional[Callable[[], Optional[str]]] = None,
+    agent_cache: Optional[PreparedAgentCache] = None,
+) -> Callable[[GraphState], Any]:
+    """
+    도구 호출 에이전트 노드.
+    준비된 AgentExecutor는 (LLM 설정, 도구 카탈로그 버전)별로 캐시되어 턴당 비용은 모델 호출만 남는다.
+    카탈로그 버전을 제공하지 않으면 도구 이름/설명으로 버전을 대신한다.
+    """
+    cache = agent_cache if agent_cache is not None else PreparedAgentCache()
+
     async def node_agent(state: GraphState) -> GraphState:
         tools = await get_tools()
-        llm = create_langchain_llm_from_env("NODE_AGENT")
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "너는 제공된 MCP 툴 중 적절한 것을 선택해 호출한다. 필요 없으면 직접 답하라."),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ])
-        agent = create_tool_calling_agent(llm, tools, prompt)
-        executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
-        res = await executor.ainvoke({"input": state["input"]})
+        llm_key, llm = create_keyed_langchain_llm_from_env("NODE_AGENT")
+        version = _catalog_version(tools, get_catalog_version)
+        executor = cache.get_or_build((llm_key, version), lambda: _build_tool_calling_executor(llm, tools))
+        with llm_priority("agent"):
+            res = await executor.ainvoke({"input": state["input"], "chat_history": state.get("history") or []})
         out = res.get("output", "(출력 없음)")
         return {**state, "output": out}
 
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from agent.metrics import mcp_timer
+from agent.tracing import TRACER
+
+if TYPE_CHECKING:
+    from fastmcp import Client
+
+
+_LOGGER = logging.getLogger(__name__)
+_HANDLER_CLASS: Optional[type] = None
+# 다른 루프에 묶인 세션을 그 루프에서 닫을 때 기다리는 최대 시간(초)
+_FOREIGN_CLOSE_TIMEOUT = 5.0
+
+
+def _make_message_handler(manager: "MCPSessionManager") -> Any:
+    """
+    서버 알림 중 tools/list_changed를 관리자에 등록된 리스너로 전달하는 핸들러를 만든다.
+    fastmcp 임포트 비용이 크므로 첫 연결 시점에 클래스를 정의한다.
+    """
+    global _HANDLER_CLASS
+    if _HANDLER_CLASS is None:
+        from fastmcp.client.messages import MessageHandler
+
+        class _SessionMessageHandler(MessageHandler):
+            def __init__(self, manager: "MCPSessionManager") -> None:
+                self._manager = manager
+
+            async def on_tool_list_changed(self, message: Any) -> None:
+                self._manager._notify_tools_changed()
+
+        _HANDLER_CLASS = _SessionMessageHandler
+    return _HANDLER_CLASS(manager)
+
+
+def _default_client_factory(config: Dict[str, Any], **kwargs: Any) -> "Client":
+    from fastmcp import Client
+
+    return Client(config, **kwargs)
+
+
+class MCPSessionManager:
+    """
+    MCP 서버들과의 세션을 한 번 연결해 두고 재사용하는 관리자.
+    - 최초 호출 시 지연 연결하고, 이후 list_tools/call_tool은 열린 세션을 공유한다.
+      MCP 세션은 요청 ID 기반이므로 여러 대화 세션의 동시 호출이 하나의 세션 위에서 다중화된다.
+    - 호출이 실패하면 세션을 폐기하고, 다음 호출에서 다시 연결한다.
+    - 세션은 연결된 이벤트 루프에 묶이므로, 다른 루프에서 호출되면 새로 연결한다.
+    """
+
+    def __init__(self, config_path: str, client_factory: Optional[Callable[..., "Client"]] = None) -> None:
+        self._config_path = config_path
+        self._client_factory = client_factory or _default_client_factory
+        self._tools_changed_listeners: List[Callable[[], None]] = []
+        self._config: Optional[Dict[str, Any]] = None
+        self._config_fingerprint: Optional[str] = None
+        self._client: Optional[Client] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connects = 0
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        if self._config is None:
+            with open(self._config_path, "r", encoding="utf-8") as f:
+                self._config = json.load(f)
+        return self._config
+
+    @property
+    def config_fingerprint(self) -> str:
+        """설정 파일 경로와 내용의 해시. 서버 구성이 다르면 값이 달라진다(도구 스냅샷 구분용)."""
+        if self._config_fingerprint is None:
+            canonical = json.dumps(
+                {"path": os.path.abspath(self._config_path), "config": self.config},
+                sort_keys=True,
+                ensure_ascii=False,
+                default=str,
+            )
+            self._config_fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+        return self._config_fingerprint
+
+    def add_tools_changed_listener(self, listener: Callable[[], None]) -> None:
+        """서버가 tools/list_changed 알림을 보낼 때 호출될 콜백을 등록한다."""
+        self._tools_changed_listeners.append(listener)
+
+    def _notify_tools_changed(self) -> None:
+        for listener in list(self._tools_changed_listeners):
+            try:
+                listener()
+            except Exception:
+                pass
+
+    def _get_connect_lock(self, loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+        if self._connect_lock is None or self._lock_loop is not loop:
+            self._connect_lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._connect_lock
+
+    def _is_usable(self, loop: asyncio.AbstractEventLoop) -> bool:
+        client = self._client
+        return client is not None and self._loop is loop and client.is_connected()
+
+    async def get_client(self) -> Client:
+        """연결된 클라이언트를 반환한다. 필요하면 (재)연결한다."""
+        loop = asyncio.get_running_loop()
+        if self._is_usable(loop):
+            return self._client  # type: ignore[return-value]
+
+        async with self._get_connect_lock(loop):
+            if self._is_usable(loop):
+                return self._client  # type: ignore[return-value]
+            await self._discard()
+            client = self._client_factory(self.config, message_handler=_make_message_handler(self))
+            await client.__aenter__()
+            self._client = client
+            self._loop = loop
+            self.connects += 1
+            return client
+
+    async def _discard(self, client: Optional[Client] = None) -> None:
+        """현재(또는 지정한) 세션을 폐기한다. 이미 다른 클라이언트로 교체되었으면 무시한다."""
+        target = client or self._client
+        if target is None or target is not self._client:
+            return
+        owner = self._loop
+        self._client = None
+        self._loop = None
+        if owner is asyncio.get_running_loop():
+            try:
+                await target.__aexit__(None, None, None)
+            except Exception:
+                pass
+        else:
+            await self._close_on_owner_loop(target, owner)
+
+    @staticmethod
+    async def _close_on_owner_loop(client: Client, owner: Optional[asyncio.AbstractEventLoop]) -> None:
+        """
+        다른 이벤트 루프에 묶인 세션은 그 루프에서만 닫을 수 있으므로, 소유 루프가 살아 있으면 그 루프에 종료를 예약한다.
+        소유 루프가 이미 멈췄으면 닫을 방법이 없으므로 경고만 남긴다(stdio 서버 프로세스가 남을 수 있음).
+        """
+        if owner is None or owner.is_closed() or not owner.is_running():
+            _LOGGER.warning("MCP 세션의 이벤트 루프가 이미 멈춰 있어 세션을 닫지 못했습니다(서버 프로세스/전송이 남을 수 있음).")
+            return
+        future = asyncio.run_coroutine_threadsafe(client.__aexit__(None, None, None), owner)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(future), timeout=_FOREIGN_CLOSE_TIMEOUT)
+        except Exception as e:
+            _LOGGER.warning("다른 이벤트 루프의 MCP 세션 종료에 실패했습니다: %r", e)
+
+    async def list_tools(self) -> List[Any]:
+        """도구 목록 조회. 조회는 멱등이므로 세션 오류 시 한 번 재연결 후 재시도한다."""
+        with mcp_timer("list_tools"), TRACER.span("mcp.list_tools", "client"):
+            client = await self.get_client()
+            try:
+                return await client.list_tools()
+            except Exception:
+                await self._discard(client)
+                client = await self.get_client()
+                return await client.list_tools()
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """
+        도구 호출. 결제 등 비멱등 도구가 있으므로 자동 재시도는 하지 않고,
+        실패한 세션만 폐기하여 다음 호출에서 재연결되도록 한다.
+        """
+        with mcp_timer("call_tool", name), TRACER.span("mcp.call_tool", "client", tool=name):
+            client = await self.get_client()
+            # 기록 중인 trace가 있으면 서버가 이어서 기록할 수 있도록 traceparent를 요청 _meta로 전달
+            traceparent = TRACER.traceparent()
+            try:
+                if traceparent is None:
+                    return await client.call_tool(name, arguments)
+                return await client.call_tool(name, arguments, meta={"traceparent": traceparent})
+            except Exception:
+                if not client.is_connected():
+                    await self._discard(client)
+                raise
+
+    async def aclose(self) -> None:
+        """열린 세션을 정리한다. 다른 루프에 묶인 세션은 소유 루프에서 닫도록 예약한다."""
+        await self._discard()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain.tools import StructuredTool
+
+from agent.tools.mcp_session import MCPSessionManager
+
+
+_ARGS_MODELS: Dict[tuple, Any] = {}
+_ARGS_MODELS_LOCK = threading.Lock()
+
+
+def _schema_hash(schema: Dict[str, Any]) -> str:
+    canonical = json.dumps(schema, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _pyd_model_from_json_schema(name: str, schema: Dict[str, Any]):
+    """JSON Schema로부터 pydantic 인자 모델을 만든다. (이름, 스키마 해시)별로 메모이즈한다."""
+    from pydantic import create_model
+
+    schema = schema or {"type": "object", "properties": {}}
+    key = (name, _schema_hash(schema))
+    cached = _ARGS_MODELS.get(key)
+    if cached is not None:
+        return cached
+
+    props = schema.get("properties", {})
+    req = set(schema.get("required", []))
+
+    def pytype(t: str):
+        return {
+            "integer": int,
+            "number": float,
+            "boolean": bool,
+            "object": dict,
+            "array": list,
+        }.get(t, str)
+
+    fields = {k: (pytype(v.get("type", "string")), ... if k in req else None) for k, v in props.items()}
+    model = create_model(name, **fields) if fields else create_model(name)
+    with _ARGS_MODELS_LOCK:
+        return _ARGS_MODELS.setdefault(key, model)
+
+
+def _tool_spec(t: Any) -> Dict[str, Any]:
+    """MCP Tool 객체 또는 dict를 직렬화 가능한 명세 dict로 정규화한다."""
+    name = getattr(t, "name", None) or (t.get("name") if isinstance(t, dict) else None)
+    desc = getattr(t, "description", "") or (t.get("description") if isinstance(t, dict) else "")
+    params = (
+        getattr(t, "input_schema", None)
+        or getattr(t, "inputSchema", None)
+        or (t.get("inputSchema") if isinstance(t, dict) else None)
+    )
+    return {"name": name, "description": desc or "", "input_schema": params or {}}
+
+
+def catalog_fingerprint(specs: List[Dict[str, Any]]) -> str:
+    """도구 명세 목록의 내용 해시. 도구 구성이 같으면 항상 같은 값이 나온다."""
+    canonical = json.dumps(sorted(specs, key=lambda s: s["name"] or ""), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class ToolCatalog:
+    """
+    MCP 도구 목록을 LangChain StructuredTool로 변환해 캐시하는 카탈로그.
+    - TTL 동안은 list_tools() 왕복 없이 메모리 캐시를 반환한다.
+    - 서버의 tools/list_changed 알림을 받으면 즉시 무효화한다.
+    - TTL이 지난 캐시는 그대로 응답하고 백그라운드에서 갱신한다(stale-while-revalidate).
+    - 갱신 결과를 디스크 스냅샷으로 저장해, 새로 뜬 프로세스는 MCP 서버 응답을 기다리지 않고 첫 요청을 처리한다.
+      스냅샷에는 MCP 설정(경로+내용) 해시를 함께 저장하고, 설정이 다른 프로세스는 스냅샷을 쓰지 않는다.
+    """
+
+    SNAPSHOT_FORMAT = 2
+
+    def __init__(self, sessions: MCPSessionManager, ttl: float = 300.0, snapshot_path: Optional[str] = None) -> None:
+        self._sessions = sessions
+        self._ttl = ttl
+        self._snapshot_path = snapshot_path
+        self._tools: Optional[List[StructuredTool]] = None
+        self._fingerprint: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.refreshes = 0
+        sessions.add_tools_changed_listener(self.invalidate)
+        self._load_snapshot()
+
+    @property
+    def sessions(self) -> MCPSessionManager:
+        """도구 조회/호출에 쓰는 MCP 세션 관리자."""
+        return self._sessions
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """현재 카탈로그 버전(도구 명세 해시). 아직 로드 전이면 None."""
+        return self._fingerprint
+
+    def invalidate(self) -> None:
+        """메모리 캐시를 비운다. 다음 조회는 서버에서 새로 받아온다."""
+        self._tools = None
+        self._expires_at = 0.0
+
+    async def get_tools(self) -> List[StructuredTool]:
+        tools = self._tools
+        if tools is not None:
+            if time.monotonic() >= self._expires_at:
+                self._schedule_refresh()
+            return tools
+        return await self.refresh()
+
+    async def refresh(self) -> List[StructuredTool]:
+        """서버에서 도구 목록을 받아 캐시를 갱신한다. 동시 호출은 하나의 조회로 합쳐진다."""
+        loop = asyncio.get_running_loop()
+        if self._refresh_lock is None or self._lock_loop is not loop:
+            self._refresh_lock = asyncio.Lock()
+            self._lock_loop = loop
+        started = self.refreshes
+        async with self._refresh_lock:
+            if self.refreshes != started and self._tools is not None:
+                return self._tools
+            mcp_tools = await self._sessions.list_tools()
+            specs = [_tool_spec(t) for t in mcp_tools]
+            self._install(specs)
+            self.refreshes += 1
+            self._save_snapshot(specs)
+            return self._tools  # type: ignore[return-value]
+
+    def _schedule_refresh(self) -> None:
+        task = self._refresh_task
+        loop = asyncio.get_running_loop()
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+
+        async def _run() -> None:
+            try:
+                await self.refresh()
+            except Exception:
+                # 갱신 실패 시 기존 캐시를 유지하고 다음 조회에서 다시 시도한다.
+                pass
+
+        self._refresh_task = loop.create_task(_run())
+
+    def _install(self, specs: List[Dict[str, Any]]) -> None:
+        fingerprint = catalog_fingerprint(specs)
+        if fingerprint != self._fingerprint or self._tools is None:
+            self._tools = [self._make_tool(s) for s in specs]
+            self._fingerprint = fingerprint
+        self._expires_at = time.monotonic() + self._ttl
+
+    def _make_tool(self, spec: Dict[str, Any]) -> StructuredTool:
+        name = spec["name"]
+        sessions = self._sessions
+
+        async def _acall(**kwargs):
+            res = await sessions.call_tool(name, kwargs)
+            if hasattr(res, "content") and res.content:
+                texts = [c.text for c in res.content if hasattr(c, "text")]
+                return "\n".join(texts) if texts else str(res)
+            return str(res)
+
+        return StructuredTool.from_function(
+            name=name,
+            description=spec["description"],
+            args_schema=_pyd_model_from_json_schema(f"{name}_Args", spec["input_schema"]),
+            coroutine=_acall,
+        )
+
+    def _load_snapshot(self) -> None:
+        """디스크 스냅샷이 있으면 즉시 만료된 상태로 적재한다(첫 조회 시 백그라운드 갱신)."""
+        if not self._snapshot_path or not os.path.exists(self._snapshot_path):
+            return
+        try:
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != self.SNAPSHOT_FORMAT:
+                return
+            if data.get("source") != self._sessions.config_fingerprint:
+                # 다른 MCP 서버 구성에서 저장된 스냅샷: 존재하지 않는 도구를 내보내지 않도록 무시
+                return
+            self._install(data["tools"])
+            self._expires_at = 0.0
+        except Exception:
+            # 손상된 스냅샷은 무시하고 서버 조회로 대체
+            self._tools = None
+            self._fingerprint = None
+
+    def _save_snapshot(self, specs: List[Dict[str, Any]]) -> None:
+        if not self._snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._snapshot_path) or ".", exist_ok=True)
+            tmp_path = f"{self._snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "format": self.SNAPSHOT_FORMAT,
+                        "source": self._sessions.config_fingerprint,
+                        "fingerprint": self._fingerprint,
+                        "saved_at": time.time(),
+                        "tools": specs,
+                    },
+                    f,
+                    ensure_ascii=False,
+                    default=str,
+                )
+            os.replace(tmp_path, self._snapshot_path)
+        except OSError:
+            # 스냅샷은 최적화 용도이므로 저장 실패는 무시
+            pass
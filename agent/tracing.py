@@ -0,0 +1,424 @@
+"""
+로컬 분산 추적(span) 모듈
+
+대화 턴마다 하나의 trace를 만들고, 그래프 노드·LLM 요청(프롬프트/응답 토큰 수 포함)·MCP 요청을 하위 span으로 기록한다.
+MCP call_tool에는 W3C traceparent를 요청 _meta로 실어 보내므로, 서버(mcp-server/server/trace_context.py)의
+span도 같은 trace로 이어진다. 외부 수집기 없이 로컬 내보내기(JSONL 파일, 테스트용 메모리)만 사용한다.
+
+환경변수:
+    TRACE_EXPORTER     off(기본) | jsonl | memory
+    TRACE_FILE         jsonl 내보내기 파일(기본 .cache/traces.jsonl, MCP 서버와 공유하려면 절대 경로 권장)
+    TRACE_SAMPLE_RATE  trace(턴) 단위 샘플링 비율 0~1(기본 1.0)
+
+꺼져 있으면 노드 래퍼를 설치하지 않고, 나머지 지점은 공용 빈 컨텍스트만 돌려준다.
+LLM 콜백은 풀에 들어간 모델마다 붙어 있고 요청마다 켜짐 여부를 확인하므로, 나중에 켜도 기존 모델이 기록된다.
+
+느린 요청 분석:
+    python -m agent.tracing .cache/traces.jsonl --slowest 5
+"""
+from __future__ import annotations
+
+import argparse
+import contextvars
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .llm_callbacks import LLMRunObserver
+
+DEFAULT_TRACE_FILE = str(Path(__file__).resolve().parents[1] / ".cache" / "traces.jsonl")
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """실행 구간 하나. 끝나면 dict로 변환되어 내보내기로 전달된다."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes", "start_time", "duration_ms",
+                 "status", "error", "_started")
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], kind: str, attributes: Dict[str, Any]
+    ) -> None:
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter(ABC):
+    """끝난 span(dict)을 받아 저장하는 내보내기 인터페이스."""
+
+    @abstractmethod
+    def export(self, span: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """span을 메모리 리스트에 모은다(테스트용)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def traces(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            return group_traces(list(self.spans))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class JsonlExporter(SpanExporter):
+    """span을 한 줄에 하나씩 JSONL 파일에 덧붙인다(여러 프로세스가 같은 파일을 공유해도 줄 단위로 기록)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class _Unsampled:
+    """샘플링에서 빠진 trace 표식. 하위 span을 만들지 않는다."""
+
+
+_UNSAMPLED = _Unsampled()
+_CURRENT: contextvars.ContextVar[Any] = contextvars.ContextVar("trace_span", default=None)
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+
+_NULL = _NullContext()
+
+
+class _SpanContext:
+    """span을 현재 span으로 설정하고, 끝나면 복원한 뒤 내보낸다."""
+
+    __slots__ = ("_tracer", "_span", "_token")
+
+    def __init__(self, tracer: "Tracer", span: Any) -> None:
+        self._tracer = tracer
+        self._span = span
+        self._token: Any = None
+
+    def __enter__(self) -> Optional[Span]:
+        self._token = _CURRENT.set(self._span)
+        return self._span if isinstance(self._span, Span) else None
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            _CURRENT.reset(self._token)
+        except ValueError:
+            # 비동기 제너레이터가 다른 컨텍스트에서 정리되는 경우
+            pass
+        if isinstance(self._span, Span):
+            self._tracer.end_span(self._span, exc)
+
+
+class Tracer:
+    """
+    trace/span 생성기.
+    - start_trace: 턴 단위 루트 span. 샘플링 여부를 여기서 정하고 하위 span이 따른다.
+    - span: 현재 span의 하위 span(현재 trace가 없거나 샘플링에서 빠졌으면 기록하지 않음)
+    - start_span/end_span: 콜백처럼 시작과 끝이 다른 호출에서 일어나는 구간용(현재 span을 바꾸지 않음)
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0, seed: Optional[int] = None) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._rng = random.Random(seed)
+        self._env_key: Any = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, exporter: Optional[SpanExporter], sample_rate: float = 1.0) -> None:
+        """내보내기와 샘플링 비율을 바꾼다. 이전 내보내기는 닫는다."""
+        previous, self.exporter = self.exporter, exporter
+        self.sample_rate = sample_rate
+        self._env_key = None
+        if previous is not None and previous is not exporter:
+            previous.shutdown()
+
+    def current_span(self) -> Optional[Span]:
+        span = _CURRENT.get()
+        return span if isinstance(span, Span) else None
+
+    def traceparent(self) -> Optional[str]:
+        """현재 span의 W3C traceparent 헤더 값. 기록 중인 trace가 없으면 None."""
+        span = _CURRENT.get()
+        return span.traceparent if isinstance(span, Span) else None
+
+    def start_trace(self, name: str, **attributes: Any) -> Any:
+        if self.exporter is None:
+            return _NULL
+        if self.sample_rate < 1.0 and self._rng.random() >= self.sample_rate:
+            return _SpanContext(self, _UNSAMPLED)
+        return _SpanContext(self, Span(name, _new_id(128), None, "internal", attributes))
+
+    def span(self, name: str, kind: str = "internal", **attributes: Any) -> Any:
+        if self.exporter is None:
+            return _NULL
+        child = self.start_span(name, kind, attributes)
+        return _NULL if child is None else _SpanContext(self, child)
+
+    def start_span(self, name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        parent = _CURRENT.get()
+        if self.exporter is None or not isinstance(parent, Span):
+            return None
+        return Span(name, parent.trace_id, parent.span_id, kind, attributes or {})
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.duration_ms = (time.perf_counter() - span._started) * 1000.0
+        if error is not None:
+            span.record_error(error)
+        exporter = self.exporter
+        if exporter is not None:
+            try:
+                exporter.export(span.to_dict())
+            except Exception:
+                # 추적 실패가 요청을 실패시키지 않도록 한다.
+                pass
+
+
+TRACER = Tracer()
+
+
+def configure_from_env() -> None:
+    """TRACE_EXPORTER/TRACE_FILE/TRACE_SAMPLE_RATE를 반영한다. 설정이 그대로면 아무것도 하지 않는다."""
+    mode = os.getenv("TRACE_EXPORTER", "off").strip().lower()
+    if mode not in ("jsonl", "memory"):
+        return
+    path = os.getenv("TRACE_FILE", "").strip() or DEFAULT_TRACE_FILE
+    try:
+        sample_rate = min(1.0, max(0.0, float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))))
+    except ValueError:
+        sample_rate = 1.0
+    key = (mode, path if mode == "jsonl" else None, sample_rate)
+    if TRACER._env_key == key:
+        return
+    TRACER.configure(JsonlExporter(path) if mode == "jsonl" else InMemoryExporter(), sample_rate)
+    TRACER._env_key = key
+
+
+def trace_node(name: str, node: Callable[..., Any]) -> Callable[..., Any]:
+    """그래프 노드 함수를 span으로 감싼다(동기/비동기 유지). 추적이 꺼져 있으면 원래 함수를 그대로 반환한다."""
+    if not TRACER.enabled:
+        return node
+
+    if inspect.iscoroutinefunction(node):
+
+        @functools.wraps(node)
+        async def _async_node(state: Any) -> Any:
+            with TRACER.span(f"node.{name}", node=name):
+                return await node(state)
+
+        return _async_node
+
+    @functools.wraps(node)
+    def _sync_node(state: Any) -> Any:
+        with TRACER.span(f"node.{name}", node=name):
+            return node(state)
+
+    return _sync_node
+
+
+def _token_usage(response: Any) -> Dict[str, int]:
+    """LLMResult에서 프롬프트/응답 토큰 수를 찾는다(usage_metadata 우선, 없으면 llm_output.token_usage)."""
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"prompt_tokens": usage.get("input_tokens", 0), "completion_tokens": usage.get("output_tokens", 0)}
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return {"prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0)}
+    return {}
+
+
+class LLMTraceObserver(LLMRunObserver):
+    """LLM 요청마다 client span을 기록하고, 끝나면 토큰 수를 속성으로 남긴다(추적이 꺼져 있거나 trace 밖이면 기록하지 않음)."""
+
+    def __init__(self, provider: str, model: str) -> None:
+        self._provider = provider
+        self._model = model
+        self._spans: Dict[Any, Span] = {}
+
+    def on_start(self, run_id: Any, node: str) -> None:
+        attributes = {"provider": self._provider, "model": self._model}
+        if node:
+            attributes["node"] = node
+        span = TRACER.start_span(f"llm.{self._provider}", "client", attributes)
+        if span is not None:
+            self._spans[run_id] = span
+
+    def on_end(self, run_id: Any, response: Any = None, error: Optional[BaseException] = None) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        if response is not None:
+            span.attributes.update(_token_usage(response))
+        TRACER.end_span(span, error)
+
+
+def group_traces(spans: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """span 목록을 trace_id별로 묶고, 각 trace 안에서 시작 시각 순으로 정렬한다."""
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        traces.setdefault(span["trace_id"], []).append(span)
+    for items in traces.values():
+        items.sort(key=lambda s: s["start_time"])
+    return traces
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """루트에서 시작해 매 단계 가장 늦게 끝나는 하위 span을 따라간 경로(전체 지연을 결정한 구간)."""
+    by_parent: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {s["span_id"] for s in spans}
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        by_parent.setdefault(parent, []).append(span)
+
+    def _end(span: Dict[str, Any]) -> float:
+        return span["start_time"] + (span["duration_ms"] or 0.0) / 1000.0
+
+    path: List[Dict[str, Any]] = []
+    children = by_parent.get(None, [])
+    while children:
+        last = max(children, key=_end)
+        path.append(last)
+        children = by_parent.get(last["span_id"], [])
+    return path
+
+
+def render_trace(spans: List[Dict[str, Any]]) -> str:
+    """trace 하나를 들여쓴 트리(시작 오프셋/소요 시간, 임계 경로는 *)로 만든다."""
+    if not spans:
+        return ""
+    origin = min(s["start_time"] for s in spans)
+    on_path = {s["span_id"] for s in critical_path(spans)}
+    ids = {s["span_id"] for s in spans}
+    by_parent: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in sorted(spans, key=lambda s: s["start_time"]):
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        by_parent.setdefault(parent, []).append(span)
+
+    lines: List[str] = []
+
+    def _walk(parent: Optional[str], depth: int) -> None:
+        for span in by_parent.get(parent, []):
+            offset = (span["start_time"] - origin) * 1000.0
+            mark = "*" if span["span_id"] in on_path else " "
+            extra = " ".join(f"{k}={v}" for k, v in span["attributes"].items())
+            status = "" if span["status"] == "ok" else f" [{span['error'] or span['status']}]"
+            label = "  " * depth + span["name"]
+            lines.append(f"{mark} {label:<34} +{offset:8.1f}ms {span['duration_ms'] or 0.0:8.1f}ms  {extra}{status}")
+            _walk(span["span_id"], depth + 1)
+
+    _walk(None, 0)
+    return "\n".join(lines)
+
+
+def load_spans(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="JSONL trace에서 느린 요청과 임계 경로를 출력한다.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_TRACE_FILE)
+    parser.add_argument("--slowest", type=int, default=5, help="출력할 trace 수(루트 span 소요 시간 기준)")
+    parser.add_argument("--trace-id", default=None, help="지정한 trace만 출력")
+    args = parser.parse_args(argv)
+
+    traces = group_traces(list(load_spans(args.path)))
+    if args.trace_id:
+        selected = [args.trace_id] if args.trace_id in traces else []
+    else:
+
+        def _root_ms(trace_id: str) -> float:
+            roots = [s for s in traces[trace_id] if s["parent_id"] is None] or traces[trace_id]
+            return max(s["duration_ms"] or 0.0 for s in roots)
+
+        selected = sorted(traces, key=_root_ms, reverse=True)[: args.slowest]
+    for trace_id in selected:
+        print(f"trace {trace_id}")
+        print(render_trace(traces[trace_id]))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
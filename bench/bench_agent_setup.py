@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+에이전트 노드 턴당 준비 비용 마이크로 벤치마크 (LLM/네트워크 불필요)
+
+- 도구: 저장소의 pay-server(FastMCP)를 in-memory로 연결해 ToolCatalog로 생성
+- LLM: bind_tools를 지원하는 고정 응답 스텁 모델
+- before: 턴마다 프롬프트/create_tool_calling_agent/AgentExecutor 생성 (기존 동작)
+- after : PreparedAgentCache로 준비된 에이전트 재사용
+
+실행:
+    python bench/bench_agent_setup.py --turns 200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "mcp-server" / "server"))
+
+from fastmcp import Client  # noqa: E402
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.utils.function_calling import convert_to_openai_tool  # noqa: E402
+
+from app import mcp  # noqa: E402
+from llm import BaseLLM, LLMFactory  # noqa: E402
+from agent.nodes.agent_cache import PreparedAgentCache  # noqa: E402
+from agent.nodes.llm_utils import create_keyed_langchain_llm_from_env  # noqa: E402
+from agent.nodes.purchase_nodes import _build_tool_calling_executor, make_node_agent  # noqa: E402
+from agent.tools.mcp_session import MCPSessionManager  # noqa: E402
+from agent.tools.tool_catalog import ToolCatalog  # noqa: E402
+
+
+class _StubChatModel(GenericFakeChatModel):
+    """도구 스키마 바인딩 비용은 실제 모델과 같게 치르고, 응답은 고정 문자열을 돌려주는 스텁."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+
+class _StubLLM(BaseLLM):
+    def _initialize(self) -> None:
+        self.llm = _StubChatModel(messages=itertools.repeat(AIMessage(content="완료")))
+
+    def __call__(self, *args, **kwargs):
+        return self.llm.invoke(*args, **kwargs)
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p95_us": ordered[int(len(ordered) * 0.95) - 1] * 1e6,
+    }
+
+
+async def _run(turns: int) -> None:
+    LLMFactory.register("bench_stub", _StubLLM)
+    os.environ["NODE_AGENT_PROVIDER"] = "bench_stub"
+    os.environ["NODE_AGENT_MODEL"] = "stub"
+
+    sessions = MCPSessionManager(str(ROOT / "mcp-server" / "mcp_servers.json"), client_factory=lambda _c, **kw: Client(mcp, **kw))
+    catalog = ToolCatalog(sessions)
+    tools = await catalog.get_tools()
+    llm_key, llm = create_keyed_langchain_llm_from_env("NODE_AGENT")
+    cache = PreparedAgentCache()
+
+    # 준비 비용만 측정
+    setup_before, setup_after = [], []
+    for _ in range(turns):
+        t0 = time.perf_counter()
+        _build_tool_calling_executor(llm, tools)
+        setup_before.append(time.perf_counter() - t0)
+    for _ in range(turns):
+        t0 = time.perf_counter()
+        create_keyed_langchain_llm_from_env("NODE_AGENT")
+        cache.get_or_build((llm_key, catalog.fingerprint), lambda: _build_tool_calling_executor(llm, tools))
+        setup_after.append(time.perf_counter() - t0)
+
+    # 노드 전체 턴(스텁 모델 호출 포함) 측정
+    state = {"input": "돈 12345 지불해요", "is_honorific": True, "intent_pay_amount": True, "tool_eligible": True, "output": ""}
+    node_before = make_node_agent(catalog.get_tools, agent_cache=PreparedAgentCache(maxsize=0))
+    node_after = make_node_agent(catalog.get_tools, get_catalog_version=lambda: catalog.fingerprint)
+    turn_before, turn_after = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for node, samples in ((node_before, turn_before), (node_after, turn_after)):
+            for _ in range(turns):
+                t0 = time.perf_counter()
+                await node(state)
+                samples.append(time.perf_counter() - t0)
+    await sessions.aclose()
+
+    print(f"turns={turns}")
+    for label, before, after in (("setup", setup_before, setup_after), ("turn ", turn_before, turn_after)):
+        b, a = _summary(before), _summary(after)
+        print(
+            f"{label}  before: mean {b['mean_us']:9.1f}us p50 {b['p50_us']:9.1f}us p95 {b['p95_us']:9.1f}us | "
+            f"after: mean {a['mean_us']:9.1f}us p50 {a['p50_us']:9.1f}us p95 {a['p95_us']:9.1f}us | "
+            f"x{b['mean_us'] / max(a['mean_us'], 1e-9):.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="에이전트 노드 준비 비용 벤치마크")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run(args.turns))
+
+
+if __name__ == "__main__":
+    main()
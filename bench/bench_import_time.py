@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+콜드 스타트(임포트 시간) 벤치마크 (LLM/네트워크 불필요)
+
+시나리오마다 새 인터프리터를 `python -X importtime`으로 띄워
+- 프로세스 전체 경과 시간(벽시계)
+- 최상위 임포트 누적 시간 상위 N개 모듈
+- 실제로 로드된 무거운 패키지(제공자 SDK, fastmcp, streamlit 등)
+를 보고한다.
+
+시나리오:
+    import_llm      : import llm
+    create_provider : LLMFactory.create('ollama', ...) 한 제공자만 생성
+    create_graph    : agent.graphs.factory.create_from_env()
+
+실행:
+    python bench/bench_import_time.py --repeat 5 --top 10
+    python bench/bench_import_time.py --scenario create_graph --budget-ms 3000
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SCENARIOS: Dict[str, str] = {
+    "import_llm": "import llm",
+    "create_provider": "from llm import LLMFactory; LLMFactory.create('ollama', 'llama3.1')",
+    "create_graph": "from agent.graphs.factory import create_from_env; create_from_env()",
+}
+
+HEAVY_PACKAGES = (
+    "langchain_openai",
+    "langchain_community",
+    "openai",
+    "requests",
+    "urllib3",
+    "httpx",
+    "fastmcp",
+    "langchain.agents",
+    "langgraph",
+    "streamlit",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run_once(code: str) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "MCP_TOOL_CATALOG_SNAPSHOT": ""}
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"시나리오 실행 실패:\n{proc.stderr[-2000:]}")
+    # (모듈, self_us, cumulative_us, 깊이)
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return wall_ms, modules
+
+
+def _report(name: str, code: str, repeat: int, top: int) -> float:
+    walls: List[float] = []
+    modules: List[Tuple[str, int, int, int]] = []
+    for _ in range(repeat):
+        wall_ms, modules = _run_once(code)
+        walls.append(wall_ms)
+
+    loaded = {m[0] for m in modules}
+    top_level = sorted((m for m in modules if m[3] == 0), key=lambda m: m[2], reverse=True)
+    total_ms = sum(m[2] for m in modules if m[3] == 0) / 1000.0
+    heavy = [p for p in HEAVY_PACKAGES if p in loaded]
+
+    print(f"[{name}] {code}")
+    print(f"  wall    : median {statistics.median(walls):8.1f}ms  min {min(walls):8.1f}ms  (n={repeat})")
+    print(f"  imports : {total_ms:8.1f}ms cumulative, {len(modules)} modules")
+    print(f"  heavy   : {', '.join(heavy) if heavy else '(none)'}")
+    for module, self_us, cumulative_us, _ in top_level[:top]:
+        print(f"    {cumulative_us / 1000.0:8.1f}ms  {module}")
+    return total_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="콜드 스타트 임포트 시간 벤치마크")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="실행할 시나리오(기본 전체)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="임포트 누적 시간이 이 값을 넘으면 종료 코드 1")
+    args = parser.parse_args()
+
+    over_budget = False
+    for name in args.scenario or list(SCENARIOS):
+        total_ms = _report(name, SCENARIOS[name], args.repeat, args.top)
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            print(f"  !! 예산 초과: {total_ms:.1f}ms > {args.budget_ms:.1f}ms")
+            over_budget = True
+        print()
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
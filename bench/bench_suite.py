@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+오프라인 성능 벤치마크 모음 (LLM/네트워크 불필요)
+
+- LLM: 모델명이 곧 응답인 스텁 분류 모델 + 도구를 한 번 호출하고 답하는 스텁 에이전트 모델
+  (--llm-delay-ms로 모델 지연을 흉내 낼 수 있다. 기본 0 = 프레임워크 오버헤드만 측정)
+- 도구: 저장소의 pay-server(FastMCP)를 in-memory로 연결
+
+측정 항목(metrics, 단위는 이름의 접미사):
+    node.<이름>.p50_ms / p95_ms      노드별 실행 시간
+    e2e.p50_ms / p95_ms              PurchaseFlowGraph.ainvoke 한 번의 지연
+    e2e.throughput_rps               --concurrency개를 동시에 실행할 때 처리량
+    tool.mcp.p50_ms / direct.p50_ms  MCP 도구 호출과 같은 함수 직접 호출, tool.overhead.p50_ms = 차이
+    cold_start.create_graph_ms       새 인터프리터에서 그래프 생성까지(bench_import_time 재사용)
+
+결과는 JSON(--output)으로 저장하고 --baseline과 비교한다.
+_ms 항목은 증가, _rps 항목은 감소가 --threshold(비율)를 넘으면 회귀로 보고 종료 코드 1을 반환한다.
+잡음을 줄이기 위해 _ms 항목은 차이가 --noise-ms 이하이면 무시한다.
+기준선은 측정한 기계에 종속되므로 같은 환경에서 --update-baseline으로 갱신한다.
+
+실행:
+    python bench/bench_suite.py                                   # 측정 + bench/baseline.json과 비교
+    python bench/bench_suite.py --requests 500 --concurrency 16 --threshold 0.15
+    python bench/bench_suite.py --skip cold_start --update-baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bench"))
+sys.path.insert(0, str(ROOT / "mcp-server" / "server"))
+
+DEFAULT_BASELINE = ROOT / "bench" / "baseline.json"
+SECTIONS = ("nodes", "e2e", "tools", "cold_start")
+
+# 여러 분기를 고르게 지나도록 고른 입력(존대말 경고, 상품 안내, 도구 호출)
+INPUTS = (
+    "돈 12345 지불해요",
+    "상품 보여주세요",
+    "돈 내",
+    "5000원 결제해 주세요",
+    "안녕하세요",
+    "만원 지불할게요",
+)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def _latency(prefix: str, samples_s: List[float]) -> Dict[str, float]:
+    ms = [s * 1000.0 for s in samples_s]
+    return {f"{prefix}.p50_ms": statistics.median(ms), f"{prefix}.p95_ms": _percentile(ms, 0.95)}
+
+
+# ---- 스텁 LLM ----
+
+def _register_stub_provider(delay_s: float) -> None:
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    from llm import BaseLLM, LLMFactory
+
+    class _BenchChatModel(BaseChatModel):
+        """reply가 'agent'면 첫 호출에서 pay_amount 도구를 호출하고 도구 결과를 받으면 답한다. 그 외에는 reply를 그대로 답한다."""
+
+        reply: str = "YES"
+        delay: float = 0.0
+
+        @property
+        def _llm_type(self) -> str:
+            return "bench-stub"
+
+        def bind_tools(self, tools, **kwargs):
+            return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+        def _message(self, messages) -> AIMessage:
+            if self.reply != "agent":
+                return AIMessage(content=self.reply)
+            if isinstance(messages[-1], ToolMessage):
+                return AIMessage(content="완료")
+            return AIMessage(content="", tool_calls=[{"name": "pay_amount", "args": {"amount": 12345}, "id": "call-1"}])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(self.delay)
+            return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(self.delay)
+            return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    class _BenchLLM(BaseLLM):
+        def _initialize(self) -> None:
+            self.llm = _BenchChatModel(reply=self.model, delay=delay_s)
+
+        def __call__(self, *args, **kwargs):
+            return self.llm.invoke(*args, **kwargs)
+
+    LLMFactory.register("bench_stub", _BenchLLM)
+    os.environ.update({
+        "LLM_PROVIDER": "bench_stub",
+        "NODE_POLITENESS_MODEL": "YES",
+        "NODE_PAY_INTENT_MODEL": "YES",
+        "NODE_TOOL_CHECK_MODEL": "YES",
+        "NODE_MULTI_LABEL_MODEL": "{}",
+        "NODE_AGENT_MODEL": "agent",
+        # 반복 입력이 캐시로 빠지지 않도록 요청마다 같은 일을 하게 한다.
+        "CLASSIFIER_CACHE": "off",
+        "TOOL_ELIGIBILITY_CACHE": "off",
+        "MCP_TOOL_CATALOG_SNAPSHOT": "",
+        "GRAPH_CHECKPOINT_DB": "",
+        "MEMORY_SUMMARY": "off",
+    })
+
+
+def _build_graph():
+    """in-memory pay-server 도구 카탈로그를 주입한 그래프와 그 카탈로그를 돌려준다."""
+    from in_memory_mcp import pay_server_catalog
+    from agent.graphs.purchase_graph import PurchaseFlowGraph
+
+    catalog = pay_server_catalog()
+    return PurchaseFlowGraph(tool_catalog=catalog), catalog
+
+
+# ---- 측정 ----
+
+def _node_timer():
+    from langchain_core.callbacks import AsyncCallbackHandler
+
+    class _NodeTimer(AsyncCallbackHandler):
+        """LangGraph 노드 실행(run 이름 == langgraph_node)의 시작/종료 시각으로 노드별 시간을 모은다."""
+
+        def __init__(self) -> None:
+            self.started: Dict[Any, tuple] = {}
+            self.samples: Dict[str, List[float]] = {}
+
+        async def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, name=None, **kwargs):
+            node = (metadata or {}).get("langgraph_node")
+            if node is not None and (name or kwargs.get("name")) == node:
+                self.started[run_id] = (node, time.perf_counter())
+
+        async def on_chain_end(self, outputs, *, run_id, **kwargs):
+            started = self.started.pop(run_id, None)
+            if started is not None:
+                self.samples.setdefault(started[0], []).append(time.perf_counter() - started[1])
+
+    return _NodeTimer()
+
+
+async def _bench_nodes(graph, rounds: int) -> Dict[str, float]:
+    timer = _node_timer()
+    for i in range(rounds):
+        await graph._graph.ainvoke(graph._initial_state(INPUTS[i % len(INPUTS)]), config={"callbacks": [timer]})
+    metrics: Dict[str, float] = {}
+    for node, samples in sorted(timer.samples.items()):
+        metrics.update(_latency(f"node.{node}", samples))
+    return metrics
+
+
+async def _bench_e2e(graph, requests: int, concurrency: int) -> Dict[str, float]:
+    single: List[float] = []
+    for i in range(requests):
+        t0 = time.perf_counter()
+        await graph.ainvoke(INPUTS[i % len(INPUTS)])
+        single.append(time.perf_counter() - t0)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(i: int) -> None:
+        async with semaphore:
+            await graph.ainvoke(INPUTS[i % len(INPUTS)])
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - t0
+    return {**_latency("e2e", single), "e2e.throughput_rps": requests / elapsed}
+
+
+async def _bench_tools(catalog, calls: int) -> Dict[str, float]:
+    from app import pay_amount
+
+    tools = {t.name: t for t in await catalog.get_tools()}
+    tool = tools["pay_amount"]
+    direct = getattr(pay_amount, "fn", pay_amount)
+    mcp_samples, direct_samples = [], []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        await tool.ainvoke({"amount": 12345})
+        mcp_samples.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        direct(12345)
+        direct_samples.append(time.perf_counter() - t0)
+    metrics = {**_latency("tool.mcp", mcp_samples), **_latency("tool.direct", direct_samples)}
+    metrics["tool.overhead.p50_ms"] = metrics["tool.mcp.p50_ms"] - metrics["tool.direct.p50_ms"]
+    return metrics
+
+
+def _bench_cold_start(repeat: int) -> Dict[str, float]:
+    from bench_import_time import SCENARIOS, _run_once
+
+    walls = [_run_once(SCENARIOS["create_graph"])[0] for _ in range(repeat)]
+    return {"cold_start.create_graph_ms": statistics.median(walls)}
+
+
+async def _run_async(args: argparse.Namespace, sections: Iterable[str]) -> Dict[str, float]:
+    graph, catalog = _build_graph()
+    metrics: Dict[str, float] = {}
+    # 에이전트 stdout(verbose) 출력이 측정에 섞이지 않게 한다.
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            await graph.awarmup()
+            for text in INPUTS:
+                await graph.ainvoke(text)
+            if "nodes" in sections:
+                metrics.update(await _bench_nodes(graph, args.requests))
+            if "e2e" in sections:
+                metrics.update(await _bench_e2e(graph, args.requests, args.concurrency))
+            if "tools" in sections:
+                metrics.update(await _bench_tools(catalog, args.requests))
+        finally:
+            await graph.aclose()
+    return metrics
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """선택한 측정을 실행하고 결과 문서(meta + metrics)를 반환한다."""
+    sections = [s for s in SECTIONS if s not in (args.skip or [])]
+    _register_stub_provider(args.llm_delay_ms / 1000.0)
+    metrics = asyncio.run(_run_async(args, sections))
+    if "cold_start" in sections:
+        metrics.update(_bench_cold_start(args.cold_start_repeat))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "llm_delay_ms": args.llm_delay_ms,
+        },
+        "metrics": {k: round(v, 4) for k, v in sorted(metrics.items())},
+    }
+
+
+# ---- 기준선 비교 ----
+
+def compare(
+    current: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float,
+    noise_ms: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """
+    공통 항목을 비교한다. 각 행은 metric/baseline/current/change(비율)/regressed.
+    _ms는 낮을수록, _rps는 높을수록 좋다. 그 외 단위는 비교만 하고 회귀로 보지 않는다.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        base, value = baseline[name], current[name]
+        change = (value - base) / abs(base) if base else 0.0
+        if name.endswith("_ms"):
+            regressed = change > threshold and (value - base) > noise_ms
+        elif name.endswith("_rps"):
+            regressed = change < -threshold
+        else:
+            regressed = False
+        rows.append({"metric": name, "baseline": base, "current": value, "change": change, "regressed": regressed})
+    return rows
+
+
+def _print_report(result: Dict[str, Any], rows: Optional[List[Dict[str, Any]]]) -> None:
+    print(f"requests={result['meta']['requests']} concurrency={result['meta']['concurrency']} "
+          f"llm_delay_ms={result['meta']['llm_delay_ms']}")
+    by_metric = {row["metric"]: row for row in rows or []}
+    for name, value in result["metrics"].items():
+        row = by_metric.get(name)
+        suffix = ""
+        if row is not None:
+            suffix = f"  base {row['baseline']:10.3f}  {row['change'] * 100:+6.1f}%" + ("  !! REGRESSION" if row["regressed"] else "")
+        print(f"  {name:<40} {value:10.3f}{suffix}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="오프라인 성능 벤치마크 모음")
+    parser.add_argument("--requests", type=int, default=200, help="측정 항목별 반복 횟수")
+    parser.add_argument("--concurrency", type=int, default=8, help="처리량 측정 시 동시 실행 수")
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0, help="스텁 LLM 호출 지연")
+    parser.add_argument("--cold-start-repeat", type=int, default=3)
+    parser.add_argument("--skip", choices=SECTIONS, action="append", help="건너뛸 측정(여러 번 지정 가능)")
+    parser.add_argument("--output", default=str(ROOT / "bench_results.json"), help="결과 JSON 경로")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="비교할 기준선 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.25, help="회귀로 판단할 변화 비율(0.25 = 25%%)")
+    parser.add_argument("--noise-ms", type=float, default=0.2, help="_ms 항목에서 무시할 절대 차이")
+    parser.add_argument("--update-baseline", action="store_true", help="결과를 기준선으로 저장")
+    args = parser.parse_args(argv)
+
+    result = run_suite(args)
+    Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    rows = None
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.update_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        rows = compare(result["metrics"], baseline["metrics"], args.threshold, args.noise_ms)
+    _print_report(result, rows)
+
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"기준선 갱신: {baseline_path}")
+        return 0
+    regressions = [row["metric"] for row in rows or [] if row["regressed"]]
+    if regressions:
+        print(f"회귀 {len(regressions)}건 (threshold {args.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+저장소의 pay-server(FastMCP)를 MCP 서버 프로세스 없이 같은 프로세스에서 연결하는 공용 도우미
+벤치마크(bench_suite, load_generator)와 테스트가 함께 사용한다.
+
+사용:
+    catalog = pay_server_catalog()
+    graph = PurchaseFlowGraph(tool_catalog=catalog)     # 또는 pay_server_graph()
+"""
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+CONFIG_PATH = str(ROOT / "mcp-server" / "mcp_servers.json")
+
+
+def pay_server_sessions() -> Any:
+    """in-memory pay-server에 연결하는 MCPSessionManager."""
+    server_dir = str(ROOT / "mcp-server" / "server")
+    if server_dir not in sys.path:
+        sys.path.insert(0, server_dir)
+    from fastmcp import Client
+
+    from app import mcp
+    from agent.tools.mcp_session import MCPSessionManager
+
+    return MCPSessionManager(CONFIG_PATH, client_factory=lambda _config, **kwargs: Client(mcp, **kwargs))
+
+
+def pay_server_catalog(ttl: float = 300.0, snapshot_path: Optional[str] = None) -> Any:
+    """in-memory pay-server의 도구 카탈로그(기본: 스냅샷 없음)."""
+    from agent.tools.tool_catalog import ToolCatalog
+
+    return ToolCatalog(pay_server_sessions(), ttl=ttl, snapshot_path=snapshot_path)
+
+
+def pay_server_graph(**kwargs: Any) -> Any:
+    """in-memory pay-server 도구를 쓰는 PurchaseFlowGraph. kwargs는 그래프 생성자에 전달한다."""
+    from agent.graphs.purchase_graph import PurchaseFlowGraph
+
+    return PurchaseFlowGraph(tool_catalog=pay_server_catalog(), **kwargs)
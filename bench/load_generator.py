@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+부하 생성기: 발화 코퍼스를 목표 속도로 에이전트에 재생한다
+
+agent.graphs.factory.create로 만든 그래프 하나를 여러 MemoryAgent 세션이 공유하며,
+요청마다 MemoryAgent.astream의 마지막 node 이벤트로 종료 노드(polite_warning/ask_product/agent/no_tool)를 판정한다.
+
+모드:
+    open   : --qps 속도로 요청을 도착시킨다(균등 또는 포아송 간격). 응답을 기다리지 않으며,
+             지연은 예정 도착 시각부터 잰다(밀린 대기 시간 포함). --max-inflight를 넘는 도착은 버린다(dropped).
+    closed : --concurrency개 세션이 각각 응답을 받은 뒤 --think-ms 후 다음 발화를 보낸다.
+--qps/--concurrency에 쉼표로 여러 값을 주면 단계별로 실행하고 처리량 곡선 요약을 출력한다(포화 지점 확인용).
+
+코퍼스(JSONL): 줄마다 {"text": "..."} (또는 "input"/"utterance" 키, 혹은 JSON 문자열)
+
+실행:
+    python bench/load_generator.py --corpus bench/corpus.jsonl --mode open --qps 5,10,20,40 --duration 30
+    python bench/load_generator.py --mode closed --concurrency 1,4,16 --duration 20 --output load.json
+    LLM_PROVIDER=fake FAKE_LLM_SCRIPT=... python bench/load_generator.py --in-memory-mcp --qps 100,200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+
+from agent.graphs.base import GraphInterface  # noqa: E402
+from agent.memory_agent import MemoryAgent  # noqa: E402
+
+
+def load_corpus(path: str) -> List[str]:
+    """JSONL 코퍼스에서 발화 목록을 읽는다."""
+    utterances = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        if isinstance(item, dict):
+            item = item.get("text") or item.get("input") or item.get("utterance")
+        if item:
+            utterances.append(str(item))
+    if not utterances:
+        raise ValueError(f"코퍼스가 비어 있습니다: {path}")
+    return utterances
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """최근접 순위 분위수(정렬된 입력)."""
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.999999) - 1))]
+
+
+class LoadStats:
+    """요청 결과 집계: 종료 노드별 지연, 오류 유형, 버린 도착 수."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.dropped = 0
+        self.sent = 0
+
+    def record(self, terminal: Optional[str], latency: float, error: Optional[str]) -> None:
+        if error is not None:
+            self.errors[error] += 1
+            return
+        self.latencies.setdefault(terminal or "(unknown)", []).append(latency)
+
+    @property
+    def completed(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        def _row(samples: List[float]) -> Dict[str, float]:
+            ordered = sorted(samples)
+            return {
+                "count": len(ordered),
+                "p50_ms": _percentile(ordered, 0.50) * 1000.0,
+                "p95_ms": _percentile(ordered, 0.95) * 1000.0,
+                "p99_ms": _percentile(ordered, 0.99) * 1000.0,
+            }
+
+        nodes = {node: _row(samples) for node, samples in sorted(self.latencies.items())}
+        everything = [s for samples in self.latencies.values() for s in samples]
+        finished = self.completed + sum(self.errors.values())
+        return {
+            "sent": self.sent,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "errors": dict(self.errors),
+            "error_rate": sum(self.errors.values()) / finished if finished else 0.0,
+            "elapsed_s": elapsed,
+            "achieved_rps": self.completed / elapsed if elapsed > 0 else 0.0,
+            "nodes": nodes,
+            "all": _row(everything) if everything else None,
+        }
+
+
+async def _terminal_node(agent: MemoryAgent, text: str) -> Optional[str]:
+    terminal: Optional[str] = None
+    async for event in agent.astream(text):
+        if event["type"] == "node":
+            terminal = event["node"]
+    return terminal
+
+
+async def _one(agent: MemoryAgent, text: str, started: float, timeout: float, stats: LoadStats) -> None:
+    terminal: Optional[str] = None
+    error: Optional[str] = None
+    try:
+        terminal = await asyncio.wait_for(_terminal_node(agent, text), timeout)
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except Exception as exc:
+        error = type(exc).__name__
+    stats.record(terminal, time.perf_counter() - started, error)
+
+
+def _arrival_offsets(qps: float, count: int, arrival: str, rng: random.Random) -> Iterator[float]:
+    offset = 0.0
+    for _ in range(count):
+        yield offset
+        offset += rng.expovariate(qps) if arrival == "poisson" else 1.0 / qps
+
+
+async def run_open_loop(
+    graph: GraphInterface,
+    corpus: List[str],
+    qps: float,
+    duration: float,
+    sessions: int = 64,
+    max_inflight: int = 1000,
+    timeout: float = 60.0,
+    arrival: str = "poisson",
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """목표 QPS로 duration초 동안 요청을 도착시킨다."""
+    stats = LoadStats()
+    agents = [MemoryAgent(graph, session_id=f"load-open-{i}") for i in range(max(1, sessions))]
+    utterances = itertools.cycle(corpus)
+    tasks: set = set()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for i, offset in enumerate(_arrival_offsets(qps, max(1, int(qps * duration)), arrival, rng)):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        stats.sent += 1
+        if len(tasks) >= max_inflight:
+            stats.dropped += 1
+            continue
+        task = asyncio.create_task(_one(agents[i % len(agents)], next(utterances), start + offset, timeout, stats))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    result = stats.summary(time.perf_counter() - start)
+    result.update({"mode": "open", "target_qps": qps, "offered_rps": stats.sent / duration})
+    return result
+
+
+async def run_closed_loop(
+    graph: GraphInterface,
+    corpus: List[str],
+    concurrency: int,
+    duration: float,
+    think_ms: float = 0.0,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    """concurrency개 세션이 응답을 받을 때마다 다음 발화를 보낸다."""
+    stats = LoadStats()
+    utterances = itertools.cycle(corpus)
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def _session(i: int) -> None:
+        agent = MemoryAgent(graph, session_id=f"load-closed-{i}")
+        while time.perf_counter() < deadline:
+            stats.sent += 1
+            await _one(agent, next(utterances), time.perf_counter(), timeout, stats)
+            if think_ms:
+                await asyncio.sleep(think_ms / 1000.0)
+
+    await asyncio.gather(*(_session(i) for i in range(max(1, concurrency))))
+    result = stats.summary(time.perf_counter() - start)
+    result.update({"mode": "closed", "concurrency": concurrency})
+    return result
+
+
+def _print_step(result: Dict[str, Any]) -> None:
+    if result["mode"] == "open":
+        head = f"open qps={result['target_qps']:g} offered={result['offered_rps']:.1f}/s"
+    else:
+        head = f"closed concurrency={result['concurrency']}"
+    print(
+        f"[{head}] achieved={result['achieved_rps']:.1f}/s completed={result['completed']} "
+        f"errors={sum(result['errors'].values())} ({result['error_rate']:.1%}) dropped={result['dropped']}"
+    )
+    if result["errors"]:
+        print(f"  errors: {', '.join(f'{k}={v}' for k, v in sorted(result['errors'].items()))}")
+    print(f"  {'node':<16}{'count':>8}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}")
+    rows = list(result["nodes"].items()) + ([("ALL", result["all"])] if result["all"] else [])
+    for node, row in rows:
+        print(f"  {node:<16}{row['count']:>8}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+
+
+def _print_curve(results: List[Dict[str, Any]]) -> None:
+    print("처리량 곡선")
+    print(f"  {'step':<18}{'achieved/s':>12}{'p50_ms':>10}{'p99_ms':>10}{'errors':>9}{'dropped':>9}")
+    for result in results:
+        step = f"qps={result['target_qps']:g}" if result["mode"] == "open" else f"conc={result['concurrency']}"
+        overall = result["all"] or {"p50_ms": float("nan"), "p99_ms": float("nan")}
+        print(
+            f"  {step:<18}{result['achieved_rps']:>12.1f}{overall['p50_ms']:>10.1f}{overall['p99_ms']:>10.1f}"
+            f"{result['error_rate']:>9.1%}{result['dropped']:>9}"
+        )
+
+
+async def _main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from agent.graphs.factory import create
+
+    corpus = load_corpus(args.corpus)
+    if args.in_memory_mcp:
+        # MCP 서버 프로세스 대신 저장소의 pay-server를 같은 프로세스에서 연결한다(도구 카탈로그 주입).
+        from in_memory_mcp import pay_server_catalog
+
+        graph = create(args.graph, tool_catalog=pay_server_catalog())
+    else:
+        graph = create(args.graph)
+    results = []
+    try:
+        if not args.no_warmup:
+            await graph.awarmup()
+        steps = args.qps if args.mode == "open" else args.concurrency
+        for value in (float(v) if args.mode == "open" else int(v) for v in steps.split(",")):
+            # 에이전트 실행기의 verbose 출력이 보고서에 섞이지 않게 한다.
+            with contextlib.redirect_stdout(io.StringIO()):
+                if args.mode == "open":
+                    result = await run_open_loop(
+                        graph, corpus, value, args.duration, sessions=args.sessions,
+                        max_inflight=args.max_inflight, timeout=args.timeout, arrival=args.arrival, seed=args.seed,
+                    )
+                else:
+                    result = await run_closed_loop(
+                        graph, corpus, value, args.duration, think_ms=args.think_ms, timeout=args.timeout
+                    )
+            _print_step(result)
+            results.append(result)
+    finally:
+        await graph.aclose()
+    if len(results) > 1:
+        _print_curve(results)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="발화 코퍼스 부하 생성기")
+    parser.add_argument("--corpus", default=str(ROOT / "bench" / "corpus.jsonl"), help="JSONL 발화 코퍼스")
+    parser.add_argument("--graph", default="purchase", help="agent.graphs.factory에 등록된 그래프 이름")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--qps", default="10", help="open 모드 목표 QPS(쉼표로 여러 단계)")
+    parser.add_argument("--concurrency", default="8", help="closed 모드 동시 세션 수(쉼표로 여러 단계)")
+    parser.add_argument("--duration", type=float, default=30.0, help="단계별 실행 시간(초)")
+    parser.add_argument("--sessions", type=int, default=64, help="open 모드에서 요청을 나눠 받을 세션 수")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="open 모드 동시 처리 상한(넘으면 dropped)")
+    parser.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="closed 모드 응답 후 다음 요청까지 대기")
+    parser.add_argument("--timeout", type=float, default=60.0, help="요청별 제한 시간(초)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--in-memory-mcp", action="store_true", help="pay-server를 같은 프로세스에서 연결")
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--output", default=None, help="단계별 결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    results = asyncio.run(_main_async(args))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
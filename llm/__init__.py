@@ -19,15 +19,39 @@ SOLID 원칙 적용:
     >>> llm = LLMFactory.create('openai', 'gpt-4', temperature=0.7)
 """
 
+from importlib import import_module
+
 from .base_llm import BaseLLM
-from .ollama import OllamaLLM
-from .openai_llm import OpenAILLM
 from .factory import LLMFactory
 
+# 합성 제공자(다른 제공자를 묶는 라우터, 부하 시험용 가짜 모델)는 확장 제공자와 같은 방식으로 등록한다.
+LLMFactory.register('router', 'llm.router_llm:RouterLLM')
+LLMFactory.register('fake', 'llm.fake_llm:FakeLLM')
+
+# 제공자 구현은 SDK 임포트 비용이 크므로 처음 접근할 때 로드한다(PEP 562).
+_LAZY_EXPORTS = {
+    'OllamaLLM': '.ollama',
+    'OpenAILLM': '.openai_llm',
+    'RouterLLM': '.router_llm',
+    'FakeLLM': '.fake_llm',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     'BaseLLM',
     'OllamaLLM',
     'OpenAILLM',
+    'RouterLLM',
+    'FakeLLM',
     'LLMFactory',
 ]
 
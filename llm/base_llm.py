@@ -47,6 +47,20 @@ class BaseLLM(ABC):
         """
         pass
     
+    async def awarmup(self) -> None:
+        """
+        첫 요청 전에 모델/연결을 미리 준비(예: 모델 메모리 적재, 연결 풀 개설)
+        기본 구현은 아무것도 하지 않음. 실패해도 호출 측에서 무시할 수 있도록 예외는 그대로 전달
+        """
+        return None
+    
+    async def aclose(self) -> None:
+        """
+        현재 이벤트 루프에 묶인 자원(예: 비동기 연결 풀)을 정리
+        기본 구현은 아무것도 하지 않음. 정리 후 같은 루프에서 다시 호출되면 자원을 새로 만든다
+        """
+        return None
+    
     def get_model_name(self) -> str:
         """모델명 반환"""
         return self.model
@@ -1,12 +1,14 @@
 """
 LLM Factory 패턴 구현
 SOLID 원칙 중 의존성 역전 원칙과 개방/폐쇄 원칙을 적용
+
+제공자 클래스는 'module:Class' 임포트 경로로 등록되며, 처음 create될 때 임포트된다.
+사용하지 않는 제공자의 SDK(langchain_openai, langchain_community 등)는 로드하지 않는다.
 """
-from typing import Dict, Type
+import importlib
+import threading
+from typing import Dict, Type, Union
 from .base_llm import BaseLLM
-from .ollama import OllamaLLM
-from .openai_llm import OpenAILLM
-from .vllm_llm import VLLMLLM
 
 
 class LLMFactory:
@@ -21,12 +23,30 @@ class LLMFactory:
     Design Pattern: Factory Method Pattern
     """
     
-    # LLM 제공자별 클래스 매핑
-    _providers: Dict[str, Type[BaseLLM]] = {
-        'ollama': OllamaLLM,
-        'openai': OpenAILLM,
-        'vllm': VLLMLLM,
+    # LLM 제공자별 클래스 매핑 (클래스 또는 지연 로딩용 'module:Class' 임포트 경로)
+    _providers: Dict[str, Union[str, Type[BaseLLM]]] = {
+        'ollama': 'llm.ollama:OllamaLLM',
+        'openai': 'llm.openai_llm:OpenAILLM',
+        'vllm': 'llm.vllm_llm:VLLMLLM',
     }
+    _load_lock = threading.Lock()
+    
+    @classmethod
+    def _resolve(cls, provider: str) -> Type[BaseLLM]:
+        """임포트 경로로 등록된 제공자를 처음 사용할 때 임포트하고 클래스로 교체한다."""
+        entry = cls._providers[provider]
+        if not isinstance(entry, str):
+            return entry
+        with cls._load_lock:
+            entry = cls._providers[provider]
+            if not isinstance(entry, str):
+                return entry
+            module_name, _, attr = entry.partition(':')
+            llm_class = getattr(importlib.import_module(module_name), attr)
+            if not (isinstance(llm_class, type) and issubclass(llm_class, BaseLLM)):
+                raise TypeError(f"{entry}는 BaseLLM을 상속받아야 합니다.")
+            cls._providers[provider] = llm_class
+            return llm_class
     
     @classmethod
     def create(cls, provider: str, model: str, **kwargs) -> BaseLLM:
@@ -39,7 +59,8 @@ class LLMFactory:
             **kwargs: 추가 설정 파라미터
             
         Returns:
-            BaseLLM 인스턴스
+            BaseLLM 인스턴스. LLM_SCHEDULER가 켜져 있으면(기본) 제공자/모델별 동시 실행·속도 한도를
+            적용하는 ScheduledLLM으로 감싸서 반환한다.
             
         Raises:
             ValueError: 지원하지 않는 제공자인 경우
@@ -60,26 +81,39 @@ class LLMFactory:
                 f"사용 가능한 제공자: {available}"
             )
         
-        llm_class = cls._providers[provider]
-        return llm_class(model=model, **kwargs)
+        llm_class = cls._resolve(provider)
+        llm = llm_class(model=model, **kwargs)
+
+        from .scheduler import ScheduledLLM, scheduler_enabled
+        if scheduler_enabled():
+            return ScheduledLLM(llm, provider)
+        return llm
     
     @classmethod
-    def register(cls, provider: str, llm_class: Type[BaseLLM]) -> None:
+    def register(cls, provider: str, llm_class: Union[str, Type[BaseLLM]]) -> None:
         """
         새로운 LLM 제공자를 등록 (확장성 제공)
         
         Args:
             provider: LLM 제공자 이름
-            llm_class: BaseLLM을 상속받은 클래스
+            llm_class: BaseLLM을 상속받은 클래스, 또는 처음 사용할 때 임포트할 'module:Class' 경로
             
         Raises:
             TypeError: BaseLLM을 상속받지 않은 클래스인 경우
+            ValueError: 임포트 경로 형식이 잘못된 경우
             
         Examples:
             >>> class CustomLLM(BaseLLM):
             ...     pass
             >>> LLMFactory.register('custom', CustomLLM)
+            >>> LLMFactory.register('anthropic', 'llm.anthropic_llm:AnthropicLLM')
         """
+        if isinstance(llm_class, str):
+            module_name, sep, attr = llm_class.partition(':')
+            if not sep or not module_name or not attr:
+                raise ValueError(f"임포트 경로는 'module:Class' 형식이어야 합니다: {llm_class}")
+            cls._providers[provider.lower()] = llm_class
+            return
         if not issubclass(llm_class, BaseLLM):
             raise TypeError(
                 f"{llm_class.__name__}는 BaseLLM을 상속받아야 합니다."
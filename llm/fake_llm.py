@@ -0,0 +1,309 @@
+"""
+가짜(합성) LLM 구현 (부하/용량 시험용)
+
+실제 모델을 호출하지 않고 스크립트로 정한 응답을, 분포에서 뽑은 지연 뒤에 돌려주는 비동기 LangChain 채팅 모델.
+PurchaseFlowGraph 전체를 그대로 높은 동시성으로 돌려 볼 수 있다.
+
+스크립트(모델명 = 스크립트 키):
+    NODE_POLITENESS_PROVIDER=fake
+    NODE_POLITENESS_MODEL=NODE_POLITENESS       # FAKE_LLM_SCRIPT의 키
+    FAKE_LLM_SCRIPT='{"NODE_POLITENESS": {"reply": "YES", "latency": "lognormal:120:0.4"},
+                      "NODE_AGENT": {"reply": "결제가 완료되었습니다.", "latency": "percentiles:50=800,95=2500",
+                                     "token_ms": 15,
+                                     "tool_calls": [{"name": "pay_amount", "args": {"amount": 12345}}]}}'
+    (FAKE_LLM_SCRIPT는 JSON 문자열 또는 JSON 파일 경로, "default" 키는 모든 항목의 기본값)
+스크립트에 없는 모델명은 '응답@지연' 인라인 형식으로 해석한다. 예: NODE_PAY_INTENT_MODEL=NO@fixed:50
+
+항목 필드:
+    reply      최종 텍스트 응답(기본 "YES")
+    latency    첫 토큰까지 지연 분포(기본 fixed:0)
+               fixed:<ms> | uniform:<min_ms>:<max_ms> | lognormal:<median_ms>:<sigma>
+               | percentiles:<q>=<ms>,...(분위수 사이 선형 보간) | replay:<관측 지연(ms) JSON 목록 파일>
+    token_ms   토큰(공백 단위 조각) 사이 지연. 비스트리밍 호출은 전체 시간을 한 번에 기다린다.
+    tool_calls 도구가 바인딩된 호출의 첫 응답에서 낼 도구 호출 목록. 생략하면 첫 번째 바인딩 도구를
+               스키마로 만든 인자로 호출한다. 빈 목록이면 도구를 호출하지 않는다.
+               도구 결과(ToolMessage)를 받은 뒤에는 reply로 답한다.
+FAKE_LLM_SEED로 지연 표본을 재현할 수 있다.
+"""
+import asyncio
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from .base_llm import BaseLLM
+
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+_CALL_IDS = itertools.count(1)
+
+
+class LatencyModel:
+    """지연 분포. sample()은 초 단위 값을 돌려준다."""
+
+    def __init__(self, spec: str = "fixed:0", rng: Optional[random.Random] = None) -> None:
+        self.spec = spec
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        kind, _, args = spec.partition(":")
+        kind = kind.strip().lower()
+        if kind == "fixed":
+            value = float(args or 0) / 1000.0
+            self._draw = lambda: value
+        elif kind == "uniform":
+            low, high = (float(x) / 1000.0 for x in args.split(":"))
+            self._draw = lambda: self._rng.uniform(low, high)
+        elif kind == "lognormal":
+            median, sigma = (float(x) for x in args.split(":"))
+            self._draw = lambda: median / 1000.0 * math.exp(sigma * self._rng.gauss(0.0, 1.0))
+        elif kind == "percentiles":
+            points = sorted(
+                (float(q) / 100.0, float(ms) / 1000.0)
+                for q, ms in (item.split("=") for item in args.split(",") if item.strip())
+            )
+            self._draw = self._inverse_cdf(points)
+        elif kind == "replay":
+            samples = sorted(float(ms) / 1000.0 for ms in json.loads(Path(args).read_text(encoding="utf-8")))
+            if not samples:
+                raise ValueError(f"재생할 지연 표본이 없습니다: {args}")
+            self._draw = lambda: samples[int(self._rng.random() * len(samples))]
+        else:
+            raise ValueError(f"지원하지 않는 지연 분포입니다: {spec!r}")
+
+    def _inverse_cdf(self, points: List[Tuple[float, float]]):
+        """주어진 분위수 사이를 선형 보간한다. 0분위가 없으면 첫 값의 절반, 100분위가 없으면 마지막 값으로 둔다."""
+        if not points:
+            raise ValueError("percentiles 분포에는 분위수가 하나 이상 필요합니다.")
+        if points[0][0] > 0.0:
+            points.insert(0, (0.0, points[0][1] * 0.5))
+        if points[-1][0] < 1.0:
+            points.append((1.0, points[-1][1]))
+        qs = [q for q, _ in points]
+
+        def _draw() -> float:
+            u = self._rng.random()
+            i = max(1, bisect.bisect_right(qs, u))
+            (q0, v0), (q1, v1) = points[i - 1], points[min(i, len(points) - 1)]
+            return v0 if q1 == q0 else v0 + (v1 - v0) * (u - q0) / (q1 - q0)
+
+        return _draw
+
+    def sample(self) -> float:
+        with self._lock:
+            return max(0.0, self._draw())
+
+
+def load_script(source: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """FAKE_LLM_SCRIPT(JSON 문자열 또는 파일 경로)를 읽는다."""
+    source = os.getenv("FAKE_LLM_SCRIPT", "") if source is None else source
+    source = source.strip()
+    if not source:
+        return {}
+    if not source.startswith("{"):
+        source = Path(source).read_text(encoding="utf-8")
+    return json.loads(source)
+
+
+def resolve_entry(model: str, script: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """모델명에 해당하는 스크립트 항목. 없으면 '응답@지연' 인라인 형식으로 해석한다."""
+    entry = dict(script.get("default") or {})
+    if model in script:
+        entry.update(script[model])
+    elif model:
+        reply, sep, latency = model.partition("@")
+        entry["reply"] = reply
+        if sep:
+            entry["latency"] = latency
+    return entry
+
+
+def _example_value(schema: Dict[str, Any]) -> Any:
+    """JSON 스키마로 그럴듯한 인자 값을 만든다."""
+    if "default" in schema:
+        return schema["default"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "integer":
+        return 1000
+    if kind == "number":
+        return 1000.0
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {k: _example_value(v) for k, v in (schema.get("properties") or {}).items()}
+    return "test"
+
+
+class FakeChatModel(BaseChatModel):
+    """스크립트 응답과 합성 지연으로 동작하는 채팅 모델. 도구 바인딩/스트리밍/비동기 호출을 모두 지원한다."""
+
+    reply: str = "YES"
+    latency: str = "fixed:0"
+    token_ms: float = 0.0
+    tool_calls: Optional[List[Dict[str, Any]]] = None
+    seed: Optional[int] = None
+
+    _latency: LatencyModel = PrivateAttr()
+    _stats: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, **data: Any) -> None:
+        super().__init__(**data)
+        self._latency = LatencyModel(self.latency, random.Random(self.seed))
+        self._stats = {"calls": 0, "tool_calls": 0, "streams": 0}
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"reply": self.reply, "latency": self.latency, "token_ms": self.token_ms}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def fake_stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    # ---- 응답 구성 ----
+
+    def _planned_tool_calls(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """도구가 바인딩되어 있고 아직 도구 결과를 받지 않은 호출이면 도구 호출을 낸다."""
+        if not tools or any(isinstance(m, ToolMessage) for m in messages):
+            return []
+        planned = self.tool_calls
+        if planned is None:
+            function = tools[0].get("function", {})
+            args = {k: _example_value(v) for k, v in (function.get("parameters", {}).get("properties") or {}).items()}
+            planned = [{"name": function.get("name"), "args": args}]
+        return [
+            {"name": call["name"], "args": dict(call.get("args") or {}), "id": f"fake-call-{next(_CALL_IDS)}"}
+            for call in planned
+        ]
+
+    def _plan(self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], List[str], float]:
+        """(도구 호출, 텍스트 조각, 첫 토큰 지연 초)"""
+        calls = self._planned_tool_calls(messages, tools)
+        pieces = [] if calls else _TOKEN.findall(self.reply) or [""]
+        self._stats["calls"] += 1
+        self._stats["tool_calls"] += len(calls)
+        return calls, pieces, self._latency.sample()
+
+    def _usage(self, messages: List[BaseMessage], pieces: List[str]) -> Dict[str, int]:
+        prompt_chars = sum(len(m.content) if isinstance(m.content, str) else len(str(m.content)) for m in messages)
+        input_tokens, output_tokens = prompt_chars // 4 + 1, max(1, len(pieces))
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _message(self, messages: List[BaseMessage], calls: List[Dict[str, Any]], pieces: List[str]) -> AIMessage:
+        return AIMessage(content="".join(pieces), tool_calls=calls, usage_metadata=self._usage(messages, pieces))
+
+    def _total_delay(self, first_token: float, pieces: List[str]) -> float:
+        return first_token + self.token_ms / 1000.0 * max(0, len(pieces) - 1)
+
+    # ---- LangChain 인터페이스 ----
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        calls, pieces, first_token = self._plan(messages, kwargs.get("tools"))
+        time.sleep(self._total_delay(first_token, pieces))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, calls, pieces))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        calls, pieces, first_token = self._plan(messages, kwargs.get("tools"))
+        await asyncio.sleep(self._total_delay(first_token, pieces))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, calls, pieces))])
+
+    def _chunks(self, messages: List[BaseMessage], calls: List[Dict[str, Any]], pieces: List[str]) -> Iterator[ChatGenerationChunk]:
+        if calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"], ensure_ascii=False), "id": c["id"], "index": i}
+                    for i, c in enumerate(calls)
+                ],
+                usage_metadata=self._usage(messages, pieces),
+            ))
+            return
+        for i, piece in enumerate(pieces):
+            usage = self._usage(messages, pieces) if i == len(pieces) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        calls, pieces, first_token = self._plan(messages, kwargs.get("tools"))
+        self._stats["streams"] += 1
+        time.sleep(first_token)
+        for i, chunk in enumerate(self._chunks(messages, calls, pieces)):
+            if i:
+                time.sleep(self.token_ms / 1000.0)
+            if run_manager is not None and chunk.text:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        calls, pieces, first_token = self._plan(messages, kwargs.get("tools"))
+        self._stats["streams"] += 1
+        await asyncio.sleep(first_token)
+        for i, chunk in enumerate(self._chunks(messages, calls, pieces)):
+            if i:
+                await asyncio.sleep(self.token_ms / 1000.0)
+            if run_manager is not None and chunk.text:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeLLM(BaseLLM):
+    """
+    가짜 LLM 구현 클래스 (부하/용량 시험용)
+
+    SOLID 원칙:
+    - 단일 책임 원칙(SRP): 스크립트 응답과 합성 지연 생성만 담당
+    - 개방/폐쇄 원칙(OCP): LLMFactory에 'fake'로 등록되는 제공자
+    - 리스코프 치환 원칙(LSP): BaseLLM으로 완전히 치환 가능
+
+    설정(kwargs 또는 환경변수):
+    - script: 스크립트 dict 또는 JSON 문자열/파일 경로 (기본 FAKE_LLM_SCRIPT)
+    - seed / FAKE_LLM_SEED: 지연 표본 난수 시드
+    - reply, latency, token_ms, tool_calls: 스크립트 항목을 직접 덮어쓰기
+    temperature, max_tokens 등 실제 제공자용 설정은 무시한다.
+    """
+
+    def _initialize(self) -> None:
+        """스크립트 항목을 해석해 가짜 채팅 모델 초기화"""
+        script = self.config.get('script')
+        if not isinstance(script, dict):
+            script = load_script(script)
+        entry = resolve_entry(self.model, script)
+        for key in ('reply', 'latency', 'token_ms', 'tool_calls'):
+            if key in self.config:
+                entry[key] = self.config[key]
+        seed = self.config.get('seed', os.getenv('FAKE_LLM_SEED') or None)
+        self.llm = FakeChatModel(
+            reply=str(entry.get('reply', 'YES')),
+            latency=str(entry.get('latency', 'fixed:0')),
+            token_ms=float(entry.get('token_ms', 0.0)),
+            tool_calls=entry.get('tool_calls'),
+            seed=int(seed) if seed is not None else None,
+        )
+
+    def __call__(self, *args, **kwargs):
+        """LangChain 호환 호출"""
+        return self.llm.invoke(*args, **kwargs)
+
+    def fake_stats(self) -> Dict[str, int]:
+        """호출/도구 호출/스트리밍 횟수"""
+        return self.llm.fake_stats()
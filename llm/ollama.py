@@ -2,6 +2,8 @@
 Ollama LLM 구현
 BaseLLM을 상속받아 Ollama 전용 기능 구현
 """
+import os
+
 from langchain_community.chat_models import ChatOllama
 from .base_llm import BaseLLM
 
@@ -23,6 +25,18 @@ class OllamaLLM(BaseLLM):
             **self.config
         )
     
+    async def awarmup(self) -> None:
+        """
+        빈 프롬프트 요청으로 Ollama 서버에 모델을 미리 적재하고 keep_alive 동안 유지시킴
+        keep_alive는 설정값 또는 OLLAMA_KEEP_ALIVE 환경변수(기본 30m)
+        """
+        import httpx
+
+        keep_alive = self.config.get('keep_alive') or os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+        async with httpx.AsyncClient(base_url=self.llm.base_url, timeout=120.0) as client:
+            response = await client.post('/api/generate', json={'model': self.model, 'keep_alive': keep_alive})
+            response.raise_for_status()
+    
     def __call__(self, *args, **kwargs):
         """
         Ollama LLM 호출
@@ -0,0 +1,372 @@
+"""
+라우터 LLM 구현 (여러 백엔드 합성)
+
+순서가 있는 (provider, model) 대상 목록에 요청을 보낸다.
+- 헤징(hedging): 첫 대상이 p95 기반 지연 안에 응답하지 않으면 다음 대상에 같은 요청을 보내고 먼저 온 응답을 사용
+- 장애 조치(failover): 대상이 오류를 내면 다음 대상으로 즉시 넘어감
+- 스트리밍: 첫 조각을 먼저 낸 대상이 이기고, 나머지 응답은 그 대상에서 이어서 받음
+
+대상 지정:
+    LLMFactory.create('router', 'ollama/gemma3n:e4b,openai/gpt-4o-mini')
+    LLMFactory.create('router', 'default', targets=[('ollama', 'llama3.1'), ('openai', 'gpt-4o-mini')])
+노드에서는 NODE_<X>_PROVIDER=router, NODE_<X>_MODEL=<provider>/<model>,... 로 사용한다.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from .base_llm import BaseLLM
+
+
+# 라우터 자체 설정 키(대상 LLM에는 전달하지 않음)
+_ROUTER_KEYS = ("targets", "hedge", "hedge_delay", "hedge_quantile", "min_samples", "max_hedges")
+
+
+def parse_targets(spec: str) -> List[Tuple[str, str]]:
+    """'provider/model,provider/model' 형식을 (provider, model) 목록으로 바꾼다. 모델명에는 '/'가 들어갈 수 있다."""
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, sep, model = item.partition("/")
+        if not sep or not model:
+            raise ValueError(f"라우터 대상 형식이 올바르지 않습니다: {item!r} (예: ollama/llama3.1)")
+        targets.append((provider.strip().lower(), model.strip()))
+    return targets
+
+
+class LatencyTracker:
+    """최근 응답 지연(초)의 이동 창. 분위수로 헤징 지연을 정한다."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class _TargetStats:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+        self.hedged = 0
+
+    def snapshot(self, quantile: float) -> Dict[str, Any]:
+        p = self.latency.quantile(quantile)
+        return {
+            "calls": self.calls,
+            "wins": self.wins,
+            "errors": self.errors,
+            "hedged": self.hedged,
+            f"p{int(quantile * 100)}_ms": None if p is None else round(p * 1000.0, 3),
+        }
+
+
+async def _first_chunk(stream: AsyncIterator[ChatGenerationChunk]) -> Tuple[Optional[ChatGenerationChunk], AsyncIterator[ChatGenerationChunk]]:
+    """스트림의 첫 조각을 받는다(빈 스트림이면 None). 취소되거나 실패하면 스트림을 닫는다."""
+    try:
+        return await stream.__anext__(), stream
+    except StopAsyncIteration:
+        return None, stream
+    except BaseException:
+        await stream.aclose()
+        raise
+
+
+class RouterChatModel(BaseChatModel):
+    """
+    대상 채팅 모델들 사이에서 헤징/장애 조치를 수행하는 LangChain 채팅 모델.
+
+    hedge_delay는 첫 대상의 지연 표본이 min_samples개 모이기 전까지 쓰는 초기 지연이며,
+    이후에는 hedge_quantile(기본 p95) 지연을 사용한다.
+    표본에는 성공 응답의 지연과 함께, 헤징에서 지거나 중간에 취소된 시도의 경과 시간(실제 지연의 하한)도 들어간다.
+    멈춘 첫 대상이 표본에서 빠지면 빠른 응답만 남아 헤징 지연이 점점 짧아지기 때문이다.
+    """
+
+    targets: List[Any]
+    target_names: List[str]
+    hedge: bool = True
+    hedge_delay: float = 1.0
+    hedge_quantile: float = 0.95
+    min_samples: int = 10
+    max_hedges: int = 1
+
+    _stats: List[_TargetStats] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._stats = [_TargetStats(name) for name in self.target_names]
+
+    @property
+    def _llm_type(self) -> str:
+        return "router"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"targets": self.target_names, "hedge": self.hedge}
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        # 대상마다 도구 바인딩 인자 형식이 다를 수 있으므로 대상별로 바인딩 인자를 만들어 둔다.
+        # 도구 바인딩을 지원하지 않는 대상은 도구 호출 요청에서 제외한다.
+        per_target: List[Optional[Dict[str, Any]]] = []
+        for target in self.targets:
+            try:
+                per_target.append(dict(target.bind_tools(tools, **kwargs).kwargs))
+            except (NotImplementedError, AttributeError):
+                per_target.append(None)
+        if not any(k is not None for k in per_target):
+            raise NotImplementedError("도구 바인딩을 지원하는 라우터 대상이 없습니다.")
+        return self.bind(target_kwargs=per_target)
+
+    def current_hedge_delay(self) -> float:
+        """첫 대상의 최근 지연 분위수(표본이 부족하면 초기값)."""
+        primary = self._stats[0].latency
+        if len(primary) < self.min_samples:
+            return self.hedge_delay
+        return primary.quantile(self.hedge_quantile) or self.hedge_delay
+
+    def _eligible(self, kwargs: Dict[str, Any]) -> List[Tuple[int, Dict[str, Any]]]:
+        per_target = kwargs.pop("target_kwargs", None)
+        result = []
+        for index in range(len(self.targets)):
+            if per_target is None:
+                result.append((index, kwargs))
+            elif per_target[index] is not None:
+                result.append((index, {**kwargs, **per_target[index]}))
+        return result
+
+    async def _attempt(self, index: int, call: Callable[[], Awaitable[Any]], observe: bool = True) -> Any:
+        """대상 하나에 대한 시도. 호출/오류 횟수와 지연 표본을 기록한다."""
+        stats = self._stats[index]
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # 취소된 시도도 적어도 경과 시간만큼은 걸렸다(실제 지연의 하한).
+            stats.latency.observe(time.perf_counter() - started)
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        if observe:
+            stats.latency.observe(time.perf_counter() - started)
+        return result
+
+    async def _race(
+        self,
+        candidates: List[Tuple[int, Dict[str, Any]]],
+        start: Callable[[int, Dict[str, Any]], Awaitable[Any]],
+        discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ) -> Any:
+        """
+        헤징/장애 조치 순서로 시도를 띄우고 처음 성공한 결과를 돌려준다.
+        같은 순간에 함께 성공해 쓰이지 않는 결과는 discard로 정리한다.
+        """
+        pending: Dict["asyncio.Task[Any]", int] = {}
+        next_pos = 0
+        hedges = 0
+        last_error: Optional[BaseException] = None
+
+        def _launch() -> None:
+            nonlocal next_pos
+            index, call_kwargs = candidates[next_pos]
+            next_pos += 1
+            task = asyncio.ensure_future(start(index, call_kwargs))
+            # 취소된 패자 작업의 예외를 회수해 "never retrieved" 경고를 막는다.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            pending[task] = index
+
+        _launch()
+        try:
+            while pending:
+                can_hedge = self.hedge and hedges < self.max_hedges and next_pos < len(candidates)
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.current_hedge_delay() if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedges += 1
+                    self._stats[candidates[next_pos][0]].hedged += 1
+                    _launch()
+                    continue
+                winners = []
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is None:
+                        winners.append((index, task.result()))
+                    else:
+                        last_error = task.exception()
+                if winners:
+                    index, result = winners[0]
+                    self._stats[index].wins += 1
+                    if discard is not None:
+                        for _, extra in winners[1:]:
+                            await discard(extra)
+                    return result
+                if not pending and next_pos < len(candidates):
+                    _launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error if last_error is not None else RuntimeError("라우터 대상이 없습니다.")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        def _start(index: int, call_kwargs: Dict[str, Any]) -> Awaitable[ChatResult]:
+            target = self.targets[index]
+            return self._attempt(index, lambda: target._agenerate(messages, stop=stop, run_manager=run_manager, **call_kwargs))
+
+        return await self._race(self._eligible(kwargs), _start)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        # 첫 조각까지를 헤징/장애 조치로 경주하고, 이긴 대상의 스트림을 이어서 내보낸다.
+        # 첫 조각 이후의 오류는 다른 대상으로 넘길 수 없으므로 그대로 전달한다.
+        # 첫 조각 지연은 전체 응답 지연과 다른 양이므로 성공한 시도는 지연 표본에 넣지 않는다.
+        def _start(index: int, call_kwargs: Dict[str, Any]) -> Awaitable[Tuple[Optional[ChatGenerationChunk], AsyncIterator[ChatGenerationChunk]]]:
+            stream = self._target_stream(index, messages, stop, run_manager, call_kwargs)
+            return self._attempt(index, lambda: _first_chunk(stream), observe=False)
+
+        async def _close(won: Tuple[Optional[ChatGenerationChunk], Any]) -> None:
+            await won[1].aclose()
+
+        first, stream = await self._race(self._eligible(kwargs), _start, discard=_close)
+        if first is None:
+            return
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _target_stream(self, index: int, messages: List[BaseMessage], stop: Optional[List[str]], run_manager: Any, kwargs: Dict[str, Any]) -> AsyncIterator[ChatGenerationChunk]:
+        target = self.targets[index]
+        streams = any(getattr(type(target), name) is not getattr(BaseChatModel, name) for name in ("_astream", "_stream"))
+        if streams:
+            async for chunk in target._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+            return
+        # 스트리밍을 지원하지 않는 대상은 완성된 응답을 한 조각으로 내보낸다.
+        result = await target._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        message = result.generations[0].message
+        yield ChatGenerationChunk(message=AIMessageChunk(content=message.content, additional_kwargs=message.additional_kwargs))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        # 동기 호출은 헤징 없이 순서대로 장애 조치만 수행한다.
+        last_error: Optional[BaseException] = None
+        for index, call_kwargs in self._eligible(kwargs):
+            stats = self._stats[index]
+            stats.calls += 1
+            started = time.perf_counter()
+            try:
+                result = self.targets[index]._generate(messages, stop=stop, run_manager=run_manager, **call_kwargs)
+            except Exception as e:
+                stats.errors += 1
+                last_error = e
+                continue
+            stats.latency.observe(time.perf_counter() - started)
+            stats.wins += 1
+            return result
+        raise last_error if last_error is not None else RuntimeError("라우터 대상이 없습니다.")
+
+    def router_stats(self) -> Dict[str, Any]:
+        return {
+            "hedge_delay_ms": round(self.current_hedge_delay() * 1000.0, 3),
+            "targets": {s.name: s.snapshot(self.hedge_quantile) for s in self._stats},
+        }
+
+
+class RouterLLM(BaseLLM):
+    """
+    라우터 LLM 구현 클래스
+
+    SOLID 원칙:
+    - 단일 책임 원칙(SRP): 대상 선택(헤징/장애 조치)만 담당하고 호출은 각 대상 LLM에 위임
+    - 개방/폐쇄 원칙(OCP): LLMFactory.register로 등록되는 합성 제공자
+    - 리스코프 치환 원칙(LSP): BaseLLM으로 완전히 치환 가능
+
+    설정(kwargs 또는 환경변수):
+    - targets: [(provider, model), ...] 또는 'provider/model,...' (없으면 model 인자를 대상 목록으로 해석)
+    - hedge / ROUTER_HEDGE: 헤징 사용 여부(기본 on)
+    - hedge_delay / ROUTER_HEDGE_DELAY: 지연 표본이 모이기 전 헤징 지연(초, 기본 1.0)
+    - hedge_quantile / ROUTER_HEDGE_QUANTILE: 헤징 지연 분위수(기본 0.95)
+    - min_samples / ROUTER_MIN_SAMPLES: 분위수 지연으로 바꾸기 전에 모을 첫 대상의 지연 표본 수(기본 10)
+    - max_hedges / ROUTER_MAX_HEDGES: 요청당 추가로 보낼 최대 중복 요청 수(기본 1)
+    그 밖의 설정(temperature, max_tokens 등)은 모든 대상에 그대로 전달한다.
+    """
+
+    def _initialize(self) -> None:
+        """대상 LLM 생성 및 라우팅 모델 초기화"""
+        from .factory import LLMFactory
+
+        targets: Any = self.config.get('targets') or self.model
+        if isinstance(targets, str):
+            targets = parse_targets(targets)
+        if not targets:
+            raise ValueError("라우터 대상이 필요합니다. (targets 인자 또는 model='provider/model,...')")
+        if any(provider == 'router' for provider, _ in targets):
+            raise ValueError("라우터 대상으로 router를 지정할 수 없습니다.")
+
+        shared = {k: v for k, v in self.config.items() if k not in _ROUTER_KEYS}
+        self.targets: List[Tuple[str, str]] = [(p, m) for p, m in targets]
+        self.target_llms: List[BaseLLM] = [LLMFactory.create(p, m, **shared) for p, m in self.targets]
+
+        hedge = self.config.get('hedge')
+        if hedge is None:
+            hedge = os.getenv('ROUTER_HEDGE', 'on').strip().lower() not in ('off', 'false', '0', 'no')
+        self.llm = RouterChatModel(
+            targets=[t.as_langchain_model() for t in self.target_llms],
+            target_names=[f"{p}/{m}" for p, m in self.targets],
+            hedge=hedge,
+            hedge_delay=float(self.config.get('hedge_delay') or os.getenv('ROUTER_HEDGE_DELAY', 1.0)),
+            hedge_quantile=float(self.config.get('hedge_quantile') or os.getenv('ROUTER_HEDGE_QUANTILE', 0.95)),
+            min_samples=int(self.config.get('min_samples') or os.getenv('ROUTER_MIN_SAMPLES', 10)),
+            max_hedges=int(self.config.get('max_hedges') or os.getenv('ROUTER_MAX_HEDGES', 1)),
+        )
+
+    def __call__(self, *args, **kwargs):
+        """대상 LLM을 순서대로 호출하고 처음 성공한 응답을 반환(장애 조치)"""
+        last_error: Optional[BaseException] = None
+        for llm in self.target_llms:
+            try:
+                return llm(*args, **kwargs)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def awarmup(self) -> None:
+        """모든 대상을 동시에 예열한다. 일부 대상이 실패해도 나머지 예열은 계속한다."""
+        results = await asyncio.gather(*(llm.awarmup() for llm in self.target_llms), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == len(results) and errors:
+            raise errors[0]
+
+    async def aclose(self) -> None:
+        """모든 대상의 현재 루프 자원을 정리한다. 한 대상의 실패가 나머지 정리를 막지 않는다."""
+        await asyncio.gather(*(llm.aclose() for llm in self.target_llms), return_exceptions=True)
+
+    def router_stats(self) -> Dict[str, Any]:
+        """대상별 호출/승리/오류/헤징 횟수와 지연 분위수"""
+        return self.llm.router_stats()
@@ -0,0 +1,488 @@
+"""
+LLM 호출 스케줄러
+
+LLMFactory가 생성하는 모든 BaseLLM을 감싸 제공자/모델 단위로 호출을 조절한다.
+- 동시 실행 수 제한(우선순위 대기열): 짧은 분류 호출이 긴 에이전트 호출 뒤에서 굶지 않게 한다.
+- 초당 요청 수(RPS)와 분당 토큰 수(TPM) 토큰 버킷.
+
+설정(환경변수, 제공자/모델 단위):
+    LLM_SCHEDULER=on|off                      (기본 on, 한도가 없으면 통과)
+    LLM_LIMIT_<PROVIDER>_CONCURRENCY=2        제공자 전체 동시 실행 수
+    LLM_LIMIT_<PROVIDER>_RPS=5                제공자 전체 초당 요청 수
+    LLM_LIMIT_<PROVIDER>_TPM=90000            제공자 전체 분당 토큰 수(추정 후 실제 사용량으로 보정)
+    LLM_LIMIT_<PROVIDER>__<MODEL>_...         모델 단위 한도(모델명은 영숫자 외 문자를 '_'로, 대문자로)
+
+우선순위는 호출 측에서 `with llm_priority("classifier"):`로 지정한다(기본 "default").
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from .base_llm import BaseLLM
+
+
+PRIORITIES: Dict[str, int] = {"classifier": 0, "default": 1, "agent": 2, "background": 3}
+
+_PRIORITY: contextvars.ContextVar[int] = contextvars.ContextVar("llm_priority", default=PRIORITIES["default"])
+
+# 응답 토큰 수를 알 수 없을 때 사용하는 추정치
+_DEFAULT_COMPLETION_TOKENS = 256
+
+
+@contextmanager
+def llm_priority(name: str) -> Iterator[None]:
+    """이 블록 안에서 발생하는 LLM 호출의 우선순위 클래스를 지정한다(낮은 값이 먼저 처리)."""
+    token = _PRIORITY.set(PRIORITIES[name])
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> int:
+    return _PRIORITY.get()
+
+
+def estimate_tokens(messages: List[BaseMessage], max_tokens: Optional[int]) -> int:
+    """대략적인 요청 토큰 수(문자 4개당 1토큰) + 응답 토큰 상한."""
+    chars = sum(len(m.content) if isinstance(m.content, str) else len(str(m.content)) for m in messages)
+    return chars // 4 + 1 + (max_tokens or _DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    """
+    예약형 토큰 버킷. 잔량이 음수가 될 수 있으며, 예약 시 잔량이 회복될 때까지의 대기 시간을 돌려준다.
+    예약 순서대로 대기하므로 먼저 예약한 호출이 먼저 통과한다.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """예약량 보정. 양수면 추가 차감, 음수면 환급한다."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted", "abandoned")
+
+    def __init__(self, wake) -> None:
+        self.wake = wake
+        self.granted = False
+        self.abandoned = False
+
+
+class PriorityLimiter:
+    """
+    우선순위 대기열을 갖는 동시 실행 제한기.
+    이벤트 루프/스레드에 묶이지 않아 여러 루프와 동기 호출이 같은 한도를 공유할 수 있다.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self._heap: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, w in self._heap if not w.abandoned)
+
+    def _grant_locked(self) -> None:
+        while self.active < self.limit and self._heap:
+            _, _, waiter = heapq.heappop(self._heap)
+            if waiter.abandoned:
+                continue
+            self.active += 1
+            waiter.granted = True
+            waiter.wake()
+
+    def _try_fast(self) -> bool:
+        if self.active < self.limit and not self._heap:
+            self.active += 1
+            return True
+        return False
+
+    async def acquire(self, priority: int) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _wake() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        with self._lock:
+            if self._try_fast():
+                return
+            waiter = _Waiter(_wake)
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.abandoned = True
+                granted = waiter.granted
+            if granted:
+                self.release()
+            raise
+
+    def acquire_sync(self, priority: int) -> None:
+        event = threading.Event()
+        with self._lock:
+            if self._try_fast():
+                return
+            heapq.heappush(self._heap, (priority, next(self._seq), _Waiter(event.set)))
+        event.wait()
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+            self._grant_locked()
+
+
+def _env_key(name: str) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "_", name).strip("_").upper()
+
+
+class _Limits:
+    """제공자 또는 (제공자, 모델) 하나의 한도와 통계."""
+
+    def __init__(self, concurrency: Optional[int], rps: Optional[float], tpm: Optional[float]) -> None:
+        self.limiter = PriorityLimiter(concurrency) if concurrency else None
+        self.requests = TokenBucket(rps, max(rps, 1.0)) if rps else None
+        self.tokens = TokenBucket(tpm / 60.0, tpm) if tpm else None
+        self.calls = 0
+        self.queued = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def empty(self) -> bool:
+        return self.limiter is None and self.requests is None and self.tokens is None
+
+    def reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def refund(self, tokens: int) -> None:
+        """호출하지 못한 예약(예: 대기 중 취소)을 버킷에 되돌린다."""
+        if self.requests is not None:
+            self.requests.adjust(-1)
+        if self.tokens is not None:
+            self.tokens.adjust(-tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "queued": self.queued,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 6),
+            "in_flight": self.limiter.active if self.limiter else None,
+            "waiting": self.limiter.waiting if self.limiter else 0,
+        }
+
+
+class _Ticket:
+    """한 번의 호출이 확보한 한도. 실제 토큰 사용량을 알게 되면 TPM 예약을 보정한다."""
+
+    def __init__(self, limits: List[_Limits], estimated: int) -> None:
+        self._limits = limits
+        self._estimated = estimated
+
+    def reconcile(self, actual_tokens: Optional[int]) -> None:
+        if not actual_tokens:
+            return
+        for limits in self._limits:
+            if limits.tokens is not None:
+                limits.tokens.adjust(actual_tokens - self._estimated)
+
+
+def _reserve(limits: List[_Limits], estimated_tokens: int) -> float:
+    """호출 수를 세고 RPS/TPM 예약을 잡는다. 반환값은 호출 전에 기다려야 할 시간(초)."""
+    for item in limits:
+        item.calls += 1
+    wait = max((item.reserve(estimated_tokens) for item in limits), default=0.0)
+    if wait > 0:
+        for item in limits:
+            item.throttled += 1
+    return wait
+
+
+class LLMScheduler:
+    """제공자/모델별 한도 레지스트리. 한도는 해당 키가 처음 사용될 때 환경변수에서 읽는다."""
+
+    def __init__(self, env: Optional[Dict[str, str]] = None) -> None:
+        self._env = env
+        self._lock = threading.Lock()
+        self._limits: Dict[str, _Limits] = {}
+
+    def _get(self, name: str) -> Optional[str]:
+        return (self._env if self._env is not None else os.environ).get(name)
+
+    def _load(self, env_prefix: str) -> _Limits:
+        def _num(suffix: str, cast):
+            raw = self._get(f"{env_prefix}_{suffix}")
+            try:
+                return cast(raw) if raw not in (None, "") else None
+            except ValueError:
+                return None
+
+        return _Limits(_num("CONCURRENCY", int), _num("RPS", float), _num("TPM", float))
+
+    def _limits_for(self, provider: str, model: str) -> List[_Limits]:
+        keys = (
+            (provider, f"LLM_LIMIT_{_env_key(provider)}"),
+            (f"{provider}/{model}", f"LLM_LIMIT_{_env_key(provider)}__{_env_key(model)}"),
+        )
+        result = []
+        with self._lock:
+            for key, env_prefix in keys:
+                limits = self._limits.get(key)
+                if limits is None:
+                    limits = self._limits[key] = self._load(env_prefix)
+                if not limits.empty:
+                    result.append(limits)
+        return result
+
+    @asynccontextmanager
+    async def slot(self, provider: str, model: str, estimated_tokens: int) -> AsyncIterator[_Ticket]:
+        # 제공자 → 모델 순서로 확보해 교착을 피한다.
+        limits = self._limits_for(provider, model)
+        priority = current_priority()
+        acquired: List[PriorityLimiter] = []
+        started = time.monotonic()
+        # RPS/TPM 대기는 동시성 슬롯을 잡기 전에 끝낸다(잠든 호출이 슬롯을 막지 않도록).
+        wait = _reserve(limits, estimated_tokens)
+        try:
+            try:
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                for item in limits:
+                    if item.limiter is not None:
+                        if item.limiter.active >= item.limiter.limit:
+                            item.queued += 1
+                        await item.limiter.acquire(priority)
+                        acquired.append(item.limiter)
+            except BaseException:
+                # 대기 중 취소되면 호출은 나가지 않았으므로 예약한 요청/토큰을 되돌린다.
+                for item in limits:
+                    item.refund(estimated_tokens)
+                raise
+            elapsed = time.monotonic() - started
+            for item in limits:
+                item.wait_seconds += elapsed
+            yield _Ticket(limits, estimated_tokens)
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    @contextmanager
+    def sync_slot(self, provider: str, model: str, estimated_tokens: int) -> Iterator[_Ticket]:
+        limits = self._limits_for(provider, model)
+        priority = current_priority()
+        acquired: List[PriorityLimiter] = []
+        started = time.monotonic()
+        wait = _reserve(limits, estimated_tokens)
+        try:
+            try:
+                if wait > 0:
+                    time.sleep(wait)
+                for item in limits:
+                    if item.limiter is not None:
+                        if item.limiter.active >= item.limiter.limit:
+                            item.queued += 1
+                        item.limiter.acquire_sync(priority)
+                        acquired.append(item.limiter)
+            except BaseException:
+                for item in limits:
+                    item.refund(estimated_tokens)
+                raise
+            elapsed = time.monotonic() - started
+            for item in limits:
+                item.wait_seconds += elapsed
+            yield _Ticket(limits, estimated_tokens)
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: limits.stats() for key, limits in self._limits.items() if not limits.empty}
+
+
+_SCHEDULER: Optional[LLMScheduler] = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """프로세스 전역 스케줄러. 모든 제공자가 같은 한도를 공유한다."""
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        with _SCHEDULER_LOCK:
+            if _SCHEDULER is None:
+                _SCHEDULER = LLMScheduler()
+    return _SCHEDULER
+
+
+def reset_scheduler() -> None:
+    """전역 스케줄러를 버린다. 다음 호출부터 한도를 환경변수에서 다시 읽는다(설정 변경/테스트용)."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        _SCHEDULER = None
+
+
+def scheduler_enabled() -> bool:
+    return os.getenv("LLM_SCHEDULER", "on").strip().lower() not in ("off", "false", "0", "no")
+
+
+def _usage_tokens(result: Any) -> Optional[int]:
+    """응답에서 실제 사용 토큰 수를 찾는다(usage_metadata 또는 llm_output.token_usage)."""
+    generations = getattr(result, "generations", None) or []
+    for generation in generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage and usage.get("total_tokens"):
+            return int(usage["total_tokens"])
+    token_usage = (getattr(result, "llm_output", None) or {}).get("token_usage") or {}
+    total = token_usage.get("total_tokens")
+    return int(total) if total else None
+
+
+def _overrides(model: BaseChatModel, name: str) -> bool:
+    return getattr(type(model), name) is not getattr(BaseChatModel, name)
+
+
+class ScheduledChatModel(BaseChatModel):
+    """스케줄러를 거쳐 내부 LangChain 채팅 모델을 호출하는 래퍼."""
+
+    inner: BaseChatModel
+    scheduler: Any
+    provider: str
+    model_name: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self.inner._identifying_params
+
+    def __getattr__(self, name: str) -> Any:
+        # 내부 모델 고유의 메서드/속성(예: 클라이언트 접근자)은 그대로 노출한다.
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            inner = self.__dict__.get("inner")
+            if inner is None or name.startswith("__"):
+                raise
+            return getattr(inner, name)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        # 내부 모델의 도구 바인딩 인자를 그대로 가져와 래퍼에 바인딩해야 호출이 스케줄러를 거친다.
+        bound = self.inner.bind_tools(tools, **kwargs)
+        bound_kwargs = getattr(bound, "kwargs", None)
+        if bound_kwargs is None or getattr(bound, "bound", None) is not self.inner:
+            return bound
+        return self.bind(**bound_kwargs)
+
+    def _estimate(self, messages: List[BaseMessage]) -> int:
+        return estimate_tokens(messages, getattr(self.inner, "max_tokens", None))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        with self.scheduler.sync_slot(self.provider, self.model_name, self._estimate(messages)) as ticket:
+            result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            ticket.reconcile(_usage_tokens(result))
+            return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        async with self.scheduler.slot(self.provider, self.model_name, self._estimate(messages)) as ticket:
+            result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            ticket.reconcile(_usage_tokens(result))
+            return result
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.scheduler.slot(self.provider, self.model_name, self._estimate(messages)):
+            if _overrides(self.inner, "_astream") or _overrides(self.inner, "_stream"):
+                async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    yield chunk
+                return
+            # 스트리밍을 지원하지 않는 모델은 완성된 응답을 한 조각으로 내보낸다.
+            result = await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            message = result.generations[0].message
+            yield ChatGenerationChunk(message=AIMessageChunk(content=message.content, additional_kwargs=message.additional_kwargs))
+
+
+class ScheduledLLM(BaseLLM):
+    """
+    스케줄러 적용 BaseLLM 프록시.
+
+    SOLID 원칙:
+    - 단일 책임 원칙(SRP): 호출 조절만 담당하고 실제 호출은 내부 LLM에 위임
+    - 리스코프 치환 원칙(LSP): 내부 LLM과 같은 BaseLLM 인터페이스 제공
+    """
+
+    def __init__(self, inner: BaseLLM, provider: str, scheduler: Optional[LLMScheduler] = None) -> None:
+        self._inner = inner
+        self._provider = provider
+        self._scheduler = scheduler or get_scheduler()
+        super().__init__(inner.model, **inner.config)
+
+    def _initialize(self) -> None:
+        model = self._inner.as_langchain_model()
+        if isinstance(model, BaseChatModel):
+            model = ScheduledChatModel(inner=model, scheduler=self._scheduler, provider=self._provider, model_name=self.model)
+        self.llm = model
+
+    async def awarmup(self) -> None:
+        # 예열 요청은 한도/우선순위 대상이 아니다.
+        await self._inner.awarmup()
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+    def __call__(self, *args, **kwargs):
+        with self._scheduler.sync_slot(self._provider, self.model, _DEFAULT_COMPLETION_TOKENS):
+            return self._inner(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # 제공자 고유 메서드(예: batch_stats)는 내부 LLM으로 위임
+        inner = self.__dict__.get("_inner")
+        if inner is None:
+            raise AttributeError(name)
+        return getattr(inner, name)
+
+    def unwrap(self) -> BaseLLM:
+        """스케줄러를 거치지 않는 내부 LLM."""
+        return self._inner
@@ -0,0 +1,164 @@
+"""
+vLLM 마이크로 배칭
+
+짧은 시간 창(window) 안에 도착한 프롬프트를 모아 한 번의 배치 생성 요청으로 전송하고,
+결과를 대기 중인 호출자들에게 나누어 돌려준다.
+
+- 샘플링 파라미터가 같은 요청끼리만 묶는다(파라미터가 다르면 별도 배치).
+- 창이 끝나거나 배치가 max_batch_size에 도달하면 즉시 전송한다.
+- 배치 크기와 큐 대기 시간 히스토그램을 제공해 창 크기와 추가 지연을 조정할 수 있게 한다.
+"""
+import asyncio
+import bisect
+import json
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Histogram:
+    """고정 버킷 히스토그램(누적 아님). 버킷 상한(le) 이하로 관측값을 센다."""
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self._bounds = sorted(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self._bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets = {str(b): c for b, c in zip(self._bounds, self._counts)}
+            buckets["+Inf"] = self._counts[-1]
+            return {
+                "count": self.count,
+                "sum": self.total,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+                "buckets": buckets,
+            }
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_WAIT_MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# (프롬프트, 결과 future, 큐 진입 시각)
+_Pending = Tuple[str, "asyncio.Future[str]", float]
+SendBatch = Callable[[List[str], Dict[str, Any]], Awaitable[List[str]]]
+
+
+class _LoopQueue:
+    """이벤트 루프 하나에 묶인 대기열. 파라미터 키별로 대기 중인 요청과 타이머를 가진다."""
+
+    def __init__(self) -> None:
+        self.pending: Dict[str, List[_Pending]] = {}
+        self.params: Dict[str, Dict[str, Any]] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.inflight: "set[asyncio.Task]" = set()
+
+
+class GenerateBatcher:
+    """
+    요청 합치기(coalescing) 계층.
+
+    send_batch(prompts, params)는 프롬프트 목록을 한 번에 전송하고 같은 순서의 결과 문자열 목록을 돌려줘야 한다.
+    window_ms 동안 모인 요청(또는 max_batch_size개)을 한 번의 send_batch 호출로 처리한다.
+    """
+
+    def __init__(self, send_batch: SendBatch, window_ms: float = 5.0, max_batch_size: int = 16) -> None:
+        self._send_batch = send_batch
+        self._window = max(window_ms, 0.0) / 1000.0
+        self._max_batch_size = max(int(max_batch_size), 1)
+        # 대기열의 future/타이머는 이벤트 루프에 묶이므로 루프별로 따로 둔다.
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopQueue]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.failures = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+    def _queue(self, loop: asyncio.AbstractEventLoop) -> _LoopQueue:
+        with self._lock:
+            queue = self._queues.get(loop)
+            if queue is None:
+                queue = self._queues[loop] = _LoopQueue()
+            return queue
+
+    async def submit(self, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """프롬프트를 대기열에 넣고 배치 결과 중 자기 몫을 기다린다."""
+        params = params or {}
+        loop = asyncio.get_running_loop()
+        queue = self._queue(loop)
+        key = json.dumps(params, sort_keys=True, default=str)
+        future: "asyncio.Future[str]" = loop.create_future()
+
+        batch = queue.pending.setdefault(key, [])
+        queue.params[key] = params
+        batch.append((prompt, future, time.perf_counter()))
+        with self._lock:
+            self.requests += 1
+
+        if len(batch) >= self._max_batch_size:
+            self._flush(loop, queue, key)
+        elif key not in queue.timers:
+            queue.timers[key] = loop.call_later(self._window, self._flush, loop, queue, key)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, queue: _LoopQueue, key: str) -> None:
+        timer = queue.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = queue.pending.pop(key, None)
+        params = queue.params.pop(key, {})
+        if not batch:
+            return
+        task = loop.create_task(self._dispatch(batch, params))
+        queue.inflight.add(task)
+        task.add_done_callback(queue.inflight.discard)
+
+    async def _dispatch(self, batch: List[_Pending], params: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        self.batch_size.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.queue_wait_ms.observe((now - enqueued_at) * 1000.0)
+        with self._lock:
+            self.batches += 1
+
+        try:
+            outputs = await self._send_batch([prompt for prompt, _, _ in batch], params)
+            if len(outputs) != len(batch):
+                raise ValueError(f"배치 응답 개수 불일치: 요청 {len(batch)}개, 응답 {len(outputs)}개")
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return
+
+        for (_, future, _), text in zip(batch, outputs):
+            if not future.done():
+                future.set_result(text)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {"requests": self.requests, "batches": self.batches, "failures": self.failures}
+        return {
+            **counters,
+            "window_ms": self._window * 1000.0,
+            "max_batch_size": self._max_batch_size,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
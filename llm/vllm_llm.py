@@ -1,26 +1,276 @@
 """
 vLLM LLM 구현 (외부 서버 호출)
 BaseLLM을 상속받아 HTTP로 vLLM 서버를 호출합니다.
+
+- keep-alive 연결 풀을 갖는 httpx 클라이언트를 재사용합니다(동기/비동기 각각).
+- 전용 `/generate` 엔드포인트와 OpenAI 호환 `/v1/chat/completions` 엔드포인트를 모두 지원합니다.
+- `as_langchain_model()`은 LangChain BaseChatModel을 반환하므로 비동기 노드에서 `await llm.ainvoke(...)`가 가능합니다.
+- `chat` 엔드포인트는 SSE(`stream: true`)로 토큰 단위 스트리밍을 지원합니다.
+- (선택) `batch_window_ms > 0`이면 `generate` 경로의 비동기 호출을 창 단위로 모아
+  OpenAI 호환 `/v1/completions`에 프롬프트 목록 하나로 전송합니다(마이크로 배칭).
 """
+import asyncio
+import json
 import os
-import requests
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
 import urllib3
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
 from urllib3.exceptions import InsecureRequestWarning
+
 from .base_llm import BaseLLM
+from .vllm_batching import GenerateBatcher
+
+
+def _role_of(message: BaseMessage) -> str:
+    if isinstance(message, SystemMessage):
+        return "system"
+    if isinstance(message, AIMessage):
+        return "assistant"
+    if isinstance(message, HumanMessage):
+        return "user"
+    return getattr(message, "role", None) or "user"
+
+
+def _content_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+class VLLMChatModel(BaseChatModel):
+    """
+    vLLM 서버용 LangChain 채팅 모델.
+
+    endpoint:
+        - "generate": 전용 `/generate` 라우트. 메시지를 하나의 프롬프트로 이어 붙여 전송한다.
+        - "chat": OpenAI 호환 `/v1/chat/completions` 라우트.
+    """
+
+    server_url: str
+    model_name: str = ""
+    endpoint: str = "generate"
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    timeout: float = 30.0
+    verify: bool = True
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    api_key: Optional[str] = None
+    batch_window_ms: float = 0.0
+    max_batch_size: int = 16
+
+    _batcher: Optional[GenerateBatcher] = PrivateAttr(default=None)
+    _sync_client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _async_clients: Any = PrivateAttr(default_factory=weakref.WeakKeyDictionary)
+    _client_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "vllm"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"server_url": self.server_url, "model_name": self.model_name, "endpoint": self.endpoint}
+
+    # ---- HTTP 클라이언트 (연결 풀) ----
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+        return {
+            "base_url": self.server_url.rstrip("/"),
+            "timeout": self.timeout,
+            "verify": self.verify,
+            "headers": headers,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        }
+
+    def _get_sync_client(self) -> httpx.Client:
+        if self._sync_client is None:
+            with self._client_lock:
+                if self._sync_client is None:
+                    self._sync_client = httpx.Client(**self._client_kwargs())
+        return self._sync_client
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # AsyncClient의 연결은 이벤트 루프에 묶이므로 루프별로 하나씩 유지한다.
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**self._client_kwargs())
+            self._async_clients[loop] = client
+        return client
+
+    # ---- 요청/응답 변환 ----
+
+    def _sampling_params(self, stop: Optional[List[str]], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        if self.max_tokens is not None:
+            params["max_tokens"] = self.max_tokens
+        if stop:
+            params["stop"] = stop
+        params.update(kwargs.get("payload", {}))
+        return params
+
+    @staticmethod
+    def _messages_to_prompt(messages: List[BaseMessage]) -> str:
+        if len(messages) == 1 and isinstance(messages[0], HumanMessage):
+            return _content_text(messages[0])
+        lines = [f"{_role_of(m).capitalize()}: {_content_text(m)}" for m in messages]
+        lines.append("Assistant:")
+        return "\n".join(lines)
+
+    def _build_request(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict[str, Any]):
+        params = self._sampling_params(stop, kwargs)
+        if self.endpoint == "chat":
+            body = {
+                "model": self.model_name,
+                "messages": [{"role": _role_of(m), "content": _content_text(m)} for m in messages],
+                **params,
+            }
+            return "/v1/chat/completions", body, None
+        prompt = self._messages_to_prompt(messages)
+        return "/generate", {"prompt": prompt, **params}, prompt
+
+    def _parse_response(self, data: Dict[str, Any], prompt: Optional[str]) -> ChatResult:
+        if self.endpoint == "chat":
+            choice = (data.get("choices") or [{}])[0]
+            text = (choice.get("message") or {}).get("content") or ""
+        else:
+            outputs = data.get("text") or [""]
+            text = outputs[0] if isinstance(outputs, list) else str(outputs)
+            # vLLM 데모 서버의 /generate는 프롬프트를 포함한 전체 텍스트를 돌려준다.
+            if prompt and text.startswith(prompt):
+                text = text[len(prompt):]
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text.strip()))],
+            llm_output={"raw": data, "model_name": self.model_name},
+        )
+
+    # ---- LangChain 인터페이스 ----
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        path, body, prompt = self._build_request(messages, stop, kwargs)
+        response = self._get_sync_client().post(path, json=body)
+        response.raise_for_status()
+        return self._parse_response(response.json(), prompt)
+
+    # ---- 마이크로 배칭 ----
+
+    def _get_batcher(self) -> GenerateBatcher:
+        if self._batcher is None:
+            with self._client_lock:
+                if self._batcher is None:
+                    self._batcher = GenerateBatcher(self._send_batch, self.batch_window_ms, self.max_batch_size)
+        return self._batcher
+
+    async def _send_batch(self, prompts: List[str], params: Dict[str, Any]) -> List[str]:
+        # vLLM 데모 서버의 /generate는 단일 프롬프트만 받으므로 배치는 프롬프트 목록을 받는 /v1/completions로 보낸다.
+        body = {"model": self.model_name, "prompt": prompts, **params}
+        response = await self._get_async_client().post("/v1/completions", json=body)
+        response.raise_for_status()
+        choices = sorted(response.json().get("choices") or [], key=lambda c: c.get("index", 0))
+        return [c.get("text") or "" for c in choices]
+
+    def batch_stats(self) -> Optional[Dict[str, Any]]:
+        """배치 크기/큐 대기 시간 히스토그램. 배칭이 꺼져 있거나 아직 사용되지 않았으면 None."""
+        return self._batcher.stats() if self._batcher is not None else None
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.endpoint == "generate" and self.batch_window_ms > 0:
+            text = await self._get_batcher().submit(self._messages_to_prompt(messages), self._sampling_params(stop, kwargs))
+            return ChatResult(
+                generations=[ChatGeneration(message=AIMessage(content=text.strip()))],
+                llm_output={"model_name": self.model_name, "batched": True},
+            )
+        path, body, prompt = self._build_request(messages, stop, kwargs)
+        response = await self._get_async_client().post(path, json=body)
+        response.raise_for_status()
+        return self._parse_response(response.json(), prompt)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.endpoint != "chat":
+            # /generate는 증분 응답 형식이 없으므로 완성된 응답을 한 조각으로 내보낸다.
+            result = await self._agenerate(messages, stop, **kwargs)
+            text = result.generations[0].message.content
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+            return
+
+        path, body, _ = self._build_request(messages, stop, kwargs)
+        body["stream"] = True
+        async with self._get_async_client().stream("POST", path, json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choice = (json.loads(data).get("choices") or [{}])[0]
+                text = (choice.get("delta") or {}).get("content") or ""
+                if not text:
+                    continue
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+                if run_manager:
+                    await run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+
+    def generate_raw(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """`/generate`에 payload를 그대로 전송하고 JSON 응답을 반환한다(연결 풀 사용)."""
+        response = self._get_sync_client().post("/generate", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        """현재 이벤트 루프의 비동기 클라이언트를 닫는다. 이후 같은 루프에서 호출하면 새로 만든다."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        """동기 클라이언트를 닫는다. 비동기 클라이언트는 루프마다 그 루프에서 aclose()로 닫아야 한다."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
 
 
 class VLLMLLM(BaseLLM):
     """
     vLLM LLM 구현 클래스
-    
+
     SOLID 원칙:
     - 단일 책임 원칙(SRP): vLLM LLM 호출만 담당
     - 개방/폐쇄 원칙(OCP): BaseLLM 확장으로 구현
     - 리스코프 치환 원칙(LSP): BaseLLM으로 완전히 치환 가능
+
+    설정(kwargs 또는 환경변수):
+    - server_url / VLLM_SERVER_URL
+    - endpoint / VLLM_ENDPOINT: 'generate'(기본) 또는 'chat'(OpenAI 호환)
+    - max_connections / VLLM_MAX_CONNECTIONS, max_keepalive_connections / VLLM_MAX_KEEPALIVE,
+      keepalive_expiry / VLLM_KEEPALIVE_EXPIRY: 연결 풀 한도
+    - batch_window_ms / VLLM_BATCH_WINDOW_MS(기본 0=끔), max_batch_size / VLLM_MAX_BATCH_SIZE: 마이크로 배칭
+    - verify, timeout, temperature, max_tokens, api_key(/VLLM_API_KEY)
     """
-    
+
     def _initialize(self) -> None:
-        """서버 URL/검증/타임아웃 설정 초기화"""
+        """서버 URL/검증/타임아웃/연결 풀 설정 초기화"""
         self.server_url = self.config.get('server_url') or os.getenv('VLLM_SERVER_URL')
         if not self.server_url:
             raise ValueError("vLLM 서버 URL이 필요합니다. (server_url 인자 또는 VLLM_SERVER_URL 환경변수)")
@@ -28,16 +278,37 @@ class VLLMLLM(BaseLLM):
         self.timeout = self.config.get('timeout', 30)
         if not self.verify:
             urllib3.disable_warnings(InsecureRequestWarning)
+        self.llm = VLLMChatModel(
+            server_url=self.server_url,
+            model_name=self.model,
+            endpoint=self.config.get('endpoint') or os.getenv('VLLM_ENDPOINT', 'generate'),
+            temperature=self.config.get('temperature'),
+            max_tokens=self.config.get('max_tokens'),
+            timeout=self.timeout,
+            verify=self.verify,
+            max_connections=int(self.config.get('max_connections') or os.getenv('VLLM_MAX_CONNECTIONS', 100)),
+            max_keepalive_connections=int(self.config.get('max_keepalive_connections') or os.getenv('VLLM_MAX_KEEPALIVE', 20)),
+            keepalive_expiry=float(self.config.get('keepalive_expiry') or os.getenv('VLLM_KEEPALIVE_EXPIRY', 30)),
+            api_key=self.config.get('api_key') or os.getenv('VLLM_API_KEY'),
+            batch_window_ms=float(self.config.get('batch_window_ms') or os.getenv('VLLM_BATCH_WINDOW_MS', 0)),
+            max_batch_size=int(self.config.get('max_batch_size') or os.getenv('VLLM_MAX_BATCH_SIZE', 16)),
+        )
+
+    async def awarmup(self) -> None:
+        """현재 이벤트 루프의 연결 풀에 keep-alive 연결을 미리 연다(/health 확인)."""
+        response = await self.llm._get_async_client().get("/health")
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        """현재 이벤트 루프의 비동기 연결 풀을 닫는다(그래프 종료 시 호출)."""
+        await self.llm.aclose()
+
+    def batch_stats(self):
+        """마이크로 배칭 통계(배치 크기/큐 대기 히스토그램). 배칭 미사용 시 None."""
+        return self.llm.batch_stats()
 
     def __call__(self, prompt: str, *args, **kwargs):
         """vLLM 서버에 프롬프트를 전송하고 결과를 반환"""
         payload = {"prompt": prompt}
         payload.update(kwargs.pop('payload', {}))
-        response = requests.post(
-            f"{self.server_url}/generate",
-            json=payload,
-            timeout=self.timeout,
-            verify=self.verify,
-        )
-        response.raise_for_status()
-        return response.json()
+        return self.llm.generate_raw(payload)
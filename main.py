@@ -2,20 +2,21 @@
 메인 애플리케이션 진입점
 그래프 선택은 .env의 AGENT_GRAPH로 제어합니다.
 각 노드에서 사용할 LLM은 .env의 전역/노드별 설정을 통해 선택됩니다.
+그래프/에이전트는 UI 세션에서 한 번만 생성되므로 여기서는 만들지 않으며,
+무거운 모듈(Streamlit, LangChain 등)은 실행 시점에 임포트합니다.
 """
 import os
 from dotenv import load_dotenv
-from agent.memory_agent import MemoryAgent
-from agent.graphs.factory import create_from_env
-from ui.streamlit_ui import run
 
 load_dotenv()  # .env 파일에서 환경 변수 로드
 
-# 그래프 선택 및 에이전트 생성
-graph = create_from_env()
-agent = MemoryAgent(graph)
 
-print(f"🕸️ 사용 중인 그래프: {os.getenv('AGENT_GRAPH', 'purchase')}")
+def main() -> None:
+    from ui.streamlit_ui import run
+
+    print(f"🕸️ 사용 중인 그래프: {os.getenv('AGENT_GRAPH', 'purchase')}")
+    run()
+
 
 if __name__ == "__main__":
-    run() 
\ No newline at end of file
+    main()
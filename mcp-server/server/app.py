@@ -3,8 +3,13 @@ import re
 from datetime import datetime
 from fastmcp import FastMCP
 
+from trace_context import TraceContextMiddleware, exporter_from_env
+
 # FastMCP 서버 인스턴스 (단일 책임: MCP 서버와 도구 정의)
 mcp = FastMCP("pay-server")
+# 클라이언트가 보낸 trace context(_meta.traceparent)로 도구 실행 span을 이어서 기록
+trace_middleware = TraceContextMiddleware(exporter_from_env())
+mcp.add_middleware(trace_middleware)
 
 @mcp.tool
 def pay_amount(amount: int) -> str:
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+요청 _meta의 W3C traceparent를 읽어 도구 실행 구간을 span으로 기록하는 FastMCP 미들웨어.
+에이전트(agent/tracing.py)와 같은 JSONL 형식으로 기록하므로 TRACE_FILE을 공유하면 한 trace로 이어진다.
+
+환경변수:
+    TRACE_EXPORTER  jsonl이면 TRACE_FILE에 덧붙인다(그 외 값은 기록하지 않음)
+    TRACE_FILE      기본: 저장소 루트의 .cache/traces.jsonl
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastmcp.server.middleware import Middleware
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def parse_traceparent(value: Any) -> Optional[Tuple[str, str]]:
+    """샘플링된 traceparent면 (trace_id, parent_span_id)를 반환한다."""
+    if not isinstance(value, str):
+        return None
+    match = _TRACEPARENT.match(value.strip())
+    if match is None or not int(match.group(3), 16) & 1:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _jsonl_exporter(path: str) -> Callable[[Dict[str, Any]], None]:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    lock = threading.Lock()
+
+    def _export(span: Dict[str, Any]) -> None:
+        line = json.dumps(span, ensure_ascii=False, default=str) + "\n"
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    return _export
+
+
+def exporter_from_env() -> Optional[Callable[[Dict[str, Any]], None]]:
+    if os.getenv("TRACE_EXPORTER", "off").strip().lower() != "jsonl":
+        return None
+    default = str(Path(__file__).resolve().parents[2] / ".cache" / "traces.jsonl")
+    return _jsonl_exporter(os.getenv("TRACE_FILE", "").strip() or default)
+
+
+def _request_meta(context: Any) -> Dict[str, Any]:
+    request_context = getattr(getattr(context, "fastmcp_context", None), "request_context", None)
+    meta = getattr(request_context, "meta", None)
+    if meta is None:
+        return {}
+    return meta if isinstance(meta, dict) else getattr(meta, "model_extra", None) or {}
+
+
+class TraceContextMiddleware(Middleware):
+    """call_tool 요청에 traceparent가 있으면 서버 측 span을 기록한다. exporter가 None이면 아무것도 하지 않는다."""
+
+    def __init__(self, exporter: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self.exporter = exporter
+
+    async def on_call_tool(self, context: Any, call_next: Any) -> Any:
+        exporter = self.exporter
+        parent = parse_traceparent(_request_meta(context).get("traceparent")) if exporter is not None else None
+        if parent is None:
+            return await call_next(context)
+
+        span = {
+            "trace_id": parent[0],
+            "span_id": f"{random.getrandbits(64):016x}",
+            "parent_id": parent[1],
+            "name": "mcp.server.call_tool",
+            "kind": "server",
+            "start_time": time.time(),
+            "duration_ms": None,
+            "status": "ok",
+            "error": None,
+            "attributes": {"tool": getattr(context.message, "name", "")},
+        }
+        started = time.perf_counter()
+        try:
+            return await call_next(context)
+        except Exception as e:
+            span["status"] = "error"
+            span["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span["duration_ms"] = (time.perf_counter() - started) * 1000.0
+            try:
+                exporter(span)
+            except Exception:
+                pass
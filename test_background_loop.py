@@ -0,0 +1,76 @@
+"""
+백그라운드 이벤트 루프 테스트
+동기 invoke가 턴마다 같은 루프를 재사용하는지와 종료 정리만 확인
+"""
+import asyncio
+import gc
+import threading
+
+from agent.graphs.background_loop import BackgroundLoop
+from agent.graphs.base import GraphInterface
+
+
+class _LoopProbeGraph(GraphInterface):
+    def __init__(self):
+        self.closed = False
+
+    async def ainvoke(self, input_text: str, history=None, session_id=None):
+        return {"loop": id(asyncio.get_running_loop()), "thread": threading.current_thread().name, "output": input_text}
+
+    async def astream(self, input_text: str, history=None, session_id=None):
+        for ch in input_text:
+            yield {"type": "token", "text": ch, "loop": id(asyncio.get_running_loop())}
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_invoke_reuses_one_loop_across_turns_and_threads():
+    """스크립트 스레드가 달라도 모든 턴이 같은 백그라운드 루프에서 실행"""
+    graph = _LoopProbeGraph()
+    first = graph.invoke("a")
+    results = []
+    worker = threading.Thread(target=lambda: results.append(graph.invoke("b")))
+    worker.start()
+    worker.join()
+    assert first["thread"] == "graph-background-loop"
+    assert results[0]["loop"] == first["loop"]
+    assert {e["loop"] for e in graph.stream("xy")} == {first["loop"]}
+
+
+def test_invoke_inside_running_loop():
+    """이미 실행 중인 루프 안에서도 동기 호출 가능"""
+    graph = _LoopProbeGraph()
+
+    async def _caller():
+        return graph.invoke("ok")["output"]
+
+    assert asyncio.run(_caller()) == "ok"
+
+
+def test_shutdown_runs_finalizers_and_stops_thread():
+    """종료 시 등록된 정리 함수를 루프 안에서 실행하고 스레드를 정지"""
+    runner = BackgroundLoop(name="test-loop")
+    graph = _LoopProbeGraph()
+    runner.add_finalizer(graph.aclose)
+    runner.run(graph.ainvoke("x"))
+    thread = runner._thread
+    runner.shutdown()
+    assert graph.closed
+    assert not thread.is_alive()
+
+
+def test_finalizer_registered_once_and_dead_refs_dropped():
+    """그래프당 정리 함수는 한 번만 등록되고, 사라진 그래프의 참조는 다음 등록 때 제거"""
+    graph = _LoopProbeGraph()
+    for _ in range(3):
+        graph.invoke("x")
+    runner = graph._background_loop()
+    assert sum(ref() == graph.aclose for ref in runner._finalizers) == 1
+
+    runner = BackgroundLoop(name="test-loop")
+    for _ in range(5):
+        runner.add_finalizer(_LoopProbeGraph().aclose)
+    gc.collect()
+    runner.add_finalizer(graph.aclose)
+    assert [ref() for ref in runner._finalizers] == [graph.aclose]
@@ -0,0 +1,45 @@
+"""
+오프라인 벤치마크 모음 테스트
+기준선 비교 규칙과 짧은 실행(콜드 스타트 제외)의 결과 형식 확인
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "bench"))
+
+import bench_suite  # noqa: E402
+from agent.nodes import llm_utils  # noqa: E402
+
+
+def test_compare_flags_regressions_by_direction():
+    """_ms는 증가, _rps는 감소가 임계치를 넘을 때만 회귀(잡음 이하 차이는 무시)"""
+    baseline = {"e2e.p50_ms": 10.0, "node.x.p50_ms": 0.1, "e2e.throughput_rps": 100.0, "other": 1.0}
+    current = {"e2e.p50_ms": 13.0, "node.x.p50_ms": 0.2, "e2e.throughput_rps": 70.0, "other": 5.0, "new_ms": 1.0}
+    rows = {r["metric"]: r for r in bench_suite.compare(current, baseline, threshold=0.25, noise_ms=0.2)}
+    assert set(rows) == {"e2e.p50_ms", "node.x.p50_ms", "e2e.throughput_rps", "other"}
+    assert rows["e2e.p50_ms"]["regressed"] and rows["e2e.throughput_rps"]["regressed"]
+    assert not rows["node.x.p50_ms"]["regressed"] and not rows["other"]["regressed"]
+    assert not bench_suite.compare({"e2e.p50_ms": 12.0}, baseline, threshold=0.25)[0]["regressed"]
+
+
+def test_suite_runs_offline_and_compares_with_baseline(tmp_path, capsys):
+    """스텁 LLM + in-memory MCP로 측정하고, 기준선 대비 회귀가 있으면 종료 코드 1"""
+    saved_env = dict(os.environ)
+    output, baseline = tmp_path / "results.json", tmp_path / "baseline.json"
+    common = ["--requests", "6", "--skip", "cold_start", "--output", str(output), "--baseline", str(baseline)]
+    try:
+        assert bench_suite.main(common + ["--update-baseline"]) == 0
+        metrics = json.loads(baseline.read_text(encoding="utf-8"))["metrics"]
+        assert {"e2e.p50_ms", "e2e.throughput_rps", "node.agent.p50_ms", "tool.overhead.p50_ms"} <= set(metrics)
+
+        doc = json.loads(baseline.read_text(encoding="utf-8"))
+        doc["metrics"]["e2e.p50_ms"] = 1e-6
+        baseline.write_text(json.dumps(doc), encoding="utf-8")
+        assert bench_suite.main(common + ["--noise-ms", "0"]) == 1
+        assert "REGRESSION" in capsys.readouterr().out
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        llm_utils.clear_llm_pool()
@@ -0,0 +1,41 @@
+"""
+YES/NO 분류 응답 캐시 테스트
+"""
+import time
+
+from agent.nodes.classifier_cache import ClassifierCache, MemoryLRUCache, SQLiteCache, make_cache_key
+
+
+def test_key_normalizes_trivial_differences():
+    """공백/전각 문자 차이는 같은 키, 모델 설정이 다르면 다른 키"""
+    a = make_cache_key("NODE_PAY_INTENT", ("ollama", "m", "{}"), "돈 12345  지불해요 ")
+    b = make_cache_key("NODE_PAY_INTENT", ("ollama", "m", "{}"), "돈 １２３４５ 지불해요")
+    c = make_cache_key("NODE_PAY_INTENT", ("openai", "m", "{}"), "돈 12345 지불해요")
+    assert a == b
+    assert a != c
+
+
+def test_memory_lru_and_ttl():
+    """항목 수 상한과 TTL 만료"""
+    cache = MemoryLRUCache(maxsize=2, ttl=0.05)
+    cache.set("a", True)
+    cache.set("b", False)
+    assert cache.get("a") is True  # a가 최근 사용으로 이동
+    cache.set("c", True)
+    assert cache.get("b") is None and cache.evictions == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None and cache.expirations == 1
+
+
+def test_sqlite_shared_between_instances(tmp_path):
+    """SQLite 백엔드는 다른 인스턴스(워커)와 결과를 공유"""
+    path = str(tmp_path / "cache.sqlite3")
+    writer = ClassifierCache(persistent=SQLiteCache(path))
+    reader = ClassifierCache(persistent=SQLiteCache(path))
+
+    writer.set("k", True)
+    assert reader.get("k") is True
+    assert reader.get("k") is True
+    assert reader.stats()["persistent_hits"] == 1
+    assert reader.stats()["hits"] == 2
+    assert reader.get("missing") is None and reader.stats()["misses"] == 1
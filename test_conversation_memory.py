@@ -0,0 +1,143 @@
+"""
+세션 대화 기록 테스트
+토큰 예산/링 버퍼 절단, 백그라운드 요약, MemoryAgent의 기록 전달 확인 (실제 LLM 호출 없음)
+"""
+import asyncio
+import json
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agent.conversation_memory import ConversationMemory, approx_tokens, truncate_to_tokens
+from agent.graphs.base import GraphInterface
+from agent.memory_agent import MemoryAgent
+from agent.nodes import llm_utils
+from llm import BaseLLM, LLMFactory
+
+
+def test_history_stays_within_token_budget():
+    """대화가 길어져도 기록은 예산/턴 수 이내, 최신 턴은 항상 남는다"""
+    memory = ConversationMemory(max_turns=8, token_budget=120)
+    for i in range(200):
+        memory.add(f"질문 {i} " + "상품" * (i % 7), f"응답 {i} " + "가격" * (i % 5))
+        assert memory.token_count() <= 120
+        assert memory.stats()["turns"] <= 8
+    history = memory.messages()
+    assert history[-2].content.startswith("질문 199")
+    assert isinstance(history[-1], AIMessage) and history[-1].content.startswith("응답 199")
+    assert memory.stats()["evicted"] == 200 - memory.stats()["turns"]
+
+
+def test_oversized_turn_is_truncated():
+    """예산보다 긴 한 턴도 잘려서 기록된다"""
+    memory = ConversationMemory(max_turns=4, token_budget=40)
+    memory.add("가" * 500, "나" * 500)
+    assert memory.token_count() <= 40
+    assert approx_tokens(truncate_to_tokens("abcd" * 100, 10)) <= 10
+    assert truncate_to_tokens("가나다라마", 3, keep="tail").endswith("라마")
+
+
+def test_background_summary_folds_evicted_turns():
+    """밀려난 턴은 백그라운드에서 요약되며 요약도 예산 이내"""
+    seen = []
+
+    async def _summarize(summary, turns):
+        seen.append(list(turns))
+        await asyncio.sleep(0.01)
+        return (summary + " " + " ".join(u for u, _ in turns)).strip() * 20
+
+    async def _run():
+        memory = ConversationMemory(max_turns=2, token_budget=60, summary_tokens=20, summarizer=_summarize)
+        for i in range(6):
+            memory.add(f"q{i}", f"a{i}")
+        await memory.wait_idle()
+        return memory
+
+    memory = asyncio.run(_run())
+    assert sum(len(turns) for turns in seen) == 4
+    history = memory.messages()
+    assert isinstance(history[0], SystemMessage)
+    assert memory.stats()["summary_tokens"] <= 20 and memory.token_count() <= 60
+    assert [m.content for m in history[1:]] == ["q4", "a4", "q5", "a5"]
+
+
+class _RecordingGraph(GraphInterface):
+    def __init__(self):
+        self.histories = []
+
+    async def ainvoke(self, input_text: str, history=None, session_id=None):
+        self.histories.append(list(history or []))
+        return {"output": f"{input_text}!"}
+
+    async def aclose(self):
+        return None
+
+
+def test_memory_agent_passes_previous_turns():
+    """다음 턴에 이전 대화가 기록으로 전달된다"""
+    graph = _RecordingGraph()
+    agent = MemoryAgent(graph, ConversationMemory(max_turns=4, token_budget=200))
+    assert asyncio.run(agent.achat("상품 보여주세요")) == "상품 보여주세요!"
+    assert agent.chat("그 상품으로 결제해 주세요") == "그 상품으로 결제해 주세요!"
+    assert graph.histories[0] == []
+    assert graph.histories[1] == [HumanMessage(content="상품 보여주세요"), AIMessage(content="상품 보여주세요!")]
+    events = list(agent.stream("고마워요"))
+    assert events[-1]["type"] == "end"
+    assert len(graph.histories[2]) == 4
+    assert agent.memory.stats()["turns"] == 3
+
+
+class _ContextPayIntentModel(BaseChatModel):
+    """이전 대화에 상품이 나왔을 때만 지불 의사를 YES로 답하는 스텁."""
+
+    prompts: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "context-pay-intent-stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        context = prompt.split("[Conversation]", 1)[1] if "[Conversation]" in prompt else ""
+        reply = "YES" if "노트북" in context.split("[User Input]", 1)[0] else "NO"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply))])
+
+
+class _ContextPayIntentLLM(BaseLLM):
+    def _initialize(self):
+        self.llm = _ContextPayIntentModel(prompts=[])
+
+    def __call__(self, *args, **kwargs):
+        return self.llm.invoke(*args, **kwargs)
+
+
+def test_pay_intent_uses_previous_turns(monkeypatch):
+    """'그 상품으로 결제해 주세요'는 이전 턴 맥락으로 지불 의사를 판정해 에이전트까지 간다"""
+    from agent.graphs.purchase_graph import PurchaseFlowGraph
+
+    LLMFactory.register("ctxstub", _ContextPayIntentLLM)
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_MODEL", "default")
+    monkeypatch.setenv("FAKE_LLM_SCRIPT", json.dumps({"default": {"reply": "YES"}, "agent": {"reply": "결제를 진행할게요."}}))
+    monkeypatch.setenv("NODE_AGENT_MODEL", "agent")
+    monkeypatch.setenv("NODE_PAY_INTENT_PROVIDER", "ctxstub")
+    monkeypatch.setenv("CLASSIFIER_CACHE", "memory")
+    llm_utils.clear_llm_pool()
+
+    async def _no_tools():
+        return []
+
+    graph = PurchaseFlowGraph(get_tools=_no_tools)
+    agent = MemoryAgent(graph, ConversationMemory(max_turns=4, token_budget=200))
+    try:
+        assert agent.chat("노트북 상품 보여주세요").startswith("어떤 상품을")
+        assert agent.chat("그 상품으로 결제해 주세요") == "결제를 진행할게요."
+        provider, model, kwargs = llm_utils.resolve_llm_config("NODE_PAY_INTENT")
+        prompts = llm_utils._POOL.get_llm(provider, model, **kwargs).llm.prompts
+        assert all("[Conversation]" not in prompt for prompt in prompts[:-1])
+        assert "사용자: 노트북 상품 보여주세요" in prompts[-1]
+    finally:
+        llm_utils.clear_llm_pool()
@@ -0,0 +1,117 @@
+"""
+가짜(합성) LLM 제공자 테스트
+지연 분포, 노드별 스크립트, 도구 호출/스트리밍, 그래프 전체 실행 확인 (실제 LLM 호출 없음)
+"""
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import tool
+
+from llm import LLMFactory
+from llm.fake_llm import FakeChatModel, LatencyModel, resolve_entry
+from agent.nodes import llm_utils
+
+
+def test_latency_distributions():
+    """고정/로그정규/분위수/재생 분포의 표본 범위와 시드 재현성"""
+    assert LatencyModel("fixed:120").sample() == 0.12
+    lognormal = LatencyModel("lognormal:200:0.5", random.Random(1))
+    assert 0.17 < statistics.median(lognormal.sample() for _ in range(4000)) < 0.23
+    pct = LatencyModel("percentiles:50=100,95=400,99=900", random.Random(2))
+    samples = sorted(pct.sample() for _ in range(5000))
+    assert samples[0] >= 0.05 and samples[-1] <= 0.9
+    assert 0.08 < samples[2500] < 0.12 and 0.3 < samples[int(5000 * 0.95)] < 0.5
+    a = [LatencyModel("uniform:10:20", random.Random(7)).sample() for _ in range(3)]
+    assert a == [LatencyModel("uniform:10:20", random.Random(7)).sample() for _ in range(3)]
+
+
+def test_replay_distribution(tmp_path):
+    """관측 지연 목록에서 재생"""
+    path = tmp_path / "observed.json"
+    path.write_text(json.dumps([10, 20, 30]), encoding="utf-8")
+    assert {LatencyModel(f"replay:{path}", random.Random(0)).sample() for _ in range(50)} <= {0.01, 0.02, 0.03}
+
+
+def test_script_per_prefix_and_inline_spec(monkeypatch):
+    """모델명이 스크립트 키면 해당 항목, 아니면 '응답@지연' 인라인 형식"""
+    script = {"default": {"latency": "fixed:5"}, "NODE_POLITENESS": {"reply": "NO"}}
+    assert resolve_entry("NODE_POLITENESS", script) == {"latency": "fixed:5", "reply": "NO"}
+    assert resolve_entry("YES@fixed:1", script) == {"latency": "fixed:1", "reply": "YES"}
+
+    monkeypatch.setenv("FAKE_LLM_SCRIPT", json.dumps(script))
+    llm = LLMFactory.create("fake", "NODE_POLITENESS")
+    assert llm.as_langchain_model().invoke("hi").content == "NO"
+    assert llm.fake_stats()["calls"] == 1
+
+
+def test_tool_calls_and_streaming():
+    """도구가 바인딩되면 먼저 도구를 호출하고, 도구 결과 뒤에는 응답을 토큰 단위로 스트리밍"""
+
+    @tool
+    def pay_amount(amount: int) -> str:
+        """지불"""
+        return "ok"
+
+    model = FakeChatModel(reply="결제가 완료되었습니다.", token_ms=1).bind_tools([pay_amount])
+    first = asyncio.run(model.ainvoke("돈 12345 지불해요"))
+    assert first.tool_calls[0]["name"] == "pay_amount" and first.tool_calls[0]["args"] == {"amount": 1000}
+
+    async def _stream():
+        messages = ["돈 12345 지불해요", first, ToolMessage(content="ok", tool_call_id=first.tool_calls[0]["id"])]
+        return [chunk async for chunk in model.astream(messages)]
+
+    chunks = asyncio.run(_stream())
+    assert len(chunks) == 2 and "".join(c.content for c in chunks) == "결제가 완료되었습니다."
+    assert chunks[-1].usage_metadata["output_tokens"] == 2
+
+
+def test_purchase_graph_runs_unchanged_at_high_concurrency(monkeypatch):
+    """그래프 전체(분류 → 도구 판정 → 에이전트 도구 호출)가 가짜 제공자로 동시에 실행된다"""
+    from agent.graphs.purchase_graph import PurchaseFlowGraph
+
+    sys.path.insert(0, str(Path(__file__).parent / "bench"))
+    from in_memory_mcp import pay_server_catalog
+
+    script = {
+        "default": {"reply": "YES", "latency": "fixed:50"},
+        "NODE_AGENT": {"reply": "결제가 완료되었습니다.", "tool_calls": [{"name": "pay_amount", "args": {"amount": 12345}}]},
+    }
+    monkeypatch.setenv("FAKE_LLM_SCRIPT", json.dumps(script))
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_MODEL", "default")
+    monkeypatch.setenv("NODE_AGENT_MODEL", "NODE_AGENT")
+    monkeypatch.setenv("MCP_TOOL_CATALOG_SNAPSHOT", "")
+    monkeypatch.setenv("CLASSIFIER_CACHE", "off")
+    monkeypatch.setenv("TOOL_ELIGIBILITY_CACHE", "off")
+    llm_utils.clear_llm_pool()
+
+    catalog = pay_server_catalog()
+    graph = PurchaseFlowGraph(preclassify=False, tool_catalog=catalog)
+
+    async def _run():
+        try:
+            await catalog.get_tools()
+            t0 = time.perf_counter()
+            finals = await asyncio.gather(*(graph.ainvoke("돈 12345 지불해요") for _ in range(40)))
+            elapsed = time.perf_counter() - t0
+            events = [e async for e in graph.astream("돈 12345 지불해요")]
+            return finals, elapsed, events
+        finally:
+            await graph.aclose()
+
+    finals, elapsed, events = asyncio.run(_run())
+    assert all(f["output"] == "결제가 완료되었습니다." for f in finals)
+    # 요청당 모델 호출 5번(분류 2, 도구 판정 1, 에이전트 2) × 50ms가 직렬이면 10초, 동시 실행이면 수백 ms
+    assert elapsed < 3.0
+    tokens = [e["text"] for e in events if e["type"] == "token"]
+    assert "".join(tokens) == "결제가 완료되었습니다."
+    provider, model, kwargs = llm_utils.resolve_llm_config("NODE_AGENT")
+    agent = llm_utils._POOL.get_llm(provider, model, **kwargs)
+    assert agent.fake_stats()["tool_calls"] >= 41
+    llm_utils.clear_llm_pool()
@@ -0,0 +1,156 @@
+"""
+HTTP API 테스트
+스텁 그래프로 엔드포인트/스트리밍/과부하 거절만 확인 (실제 LLM 호출 없음)
+"""
+import asyncio
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from agent.graphs.base import GraphInterface
+from ui.fastapi_app import create_app
+
+
+class _EchoGraph(GraphInterface):
+    instances = 0
+
+    def __init__(self, delay: float = 0.0):
+        _EchoGraph.instances += 1
+        self.delay = delay
+        self.warmed = False
+        self.closed = False
+
+    async def ainvoke(self, input_text: str, history=None, session_id=None):
+        await asyncio.sleep(self.delay)
+        return {"input": input_text, "output": input_text[::-1]}
+
+    async def astream(self, input_text: str, history=None, session_id=None):
+        await asyncio.sleep(self.delay)
+        yield {"type": "node", "node": "echo", "update": {}}
+        for ch in input_text[::-1]:
+            yield {"type": "token", "node": "agent", "text": ch}
+        yield {"type": "end", "state": {}, "output": input_text[::-1]}
+
+    async def awarmup(self):
+        self.warmed = True
+        return {"echo": {"ok": True}}
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_chat_stream_and_probes_share_one_graph():
+    """세션이 달라도 그래프는 하나, 스트리밍은 SSE 이벤트"""
+    graphs = []
+
+    def _factory():
+        graphs.append(_EchoGraph())
+        return graphs[-1]
+
+    with TestClient(create_app(graph_factory=_factory, warmup=True)) as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+        first = client.post("/chat", json={"message": "abc"}).json()
+        second = client.post("/chat", json={"message": "xy", "session_id": "s2"}).json()
+        assert first["output"] == "cba" and first["session_id"]
+        assert second == {"output": "yx", "session_id": "s2"}
+
+        with client.stream("POST", "/chat/stream", json={"message": "ab", "session_id": "s3"}) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+        assert [e["type"] for e in events] == ["node", "token", "token", "end"]
+        assert events[-1]["output"] == "ba"
+
+        ready = client.get("/readyz")
+        assert ready.status_code == 200 and ready.json()["sessions"] == 3
+    assert len(graphs) == 1 and graphs[0].warmed and graphs[0].closed
+
+
+def test_saturated_server_returns_429():
+    """동시 실행 슬롯과 대기열이 모두 차면 429"""
+    app = create_app(graph_factory=lambda: _EchoGraph(delay=0.3), max_concurrency=1, max_queue=0, warmup=False)
+    statuses = []
+    with TestClient(app) as client:
+        def _call():
+            statuses.append(client.post("/chat", json={"message": "hi"}).status_code)
+
+        threads = [threading.Thread(target=_call) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert client.get("/readyz").json()["admission"]["rejected"] == statuses.count(429)
+    assert sorted(statuses) == [200, 429, 429]
+
+
+def test_saturated_stream_returns_429_before_streaming():
+    """스트리밍 경로도 동시 요청이 몰리면 SSE 오류 이벤트가 아니라 429 상태 코드로 거절"""
+    app = create_app(graph_factory=lambda: _EchoGraph(delay=0.3), max_concurrency=1, max_queue=0, warmup=False)
+    results = []
+    with TestClient(app) as client:
+        def _call():
+            with client.stream("POST", "/chat/stream", json={"message": "hi"}) as response:
+                results.append((response.status_code, "".join(response.iter_lines())))
+
+        threads = [threading.Thread(target=_call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        admission = client.get("/readyz").json()["admission"]
+        assert admission["running"] == 0 and admission["queued"] == 0
+        assert admission["rejected"] == 3
+    assert sorted(code for code, _ in results) == [200, 429, 429, 429]
+    assert all('"error"' not in body for code, body in results if code == 200)
+
+
+def test_rejected_requests_do_not_take_session_slots():
+    """429로 거절된 요청은 세션을 만들지 않아 살아 있는 세션을 밀어내지 않는다"""
+    app = create_app(graph_factory=lambda: _EchoGraph(delay=0.3), max_concurrency=1, max_queue=0, warmup=False)
+    statuses = []
+    with TestClient(app) as client:
+        def _call(i):
+            statuses.append(client.post("/chat", json={"message": "hi", "session_id": f"s{i}"}).status_code)
+
+        threads = [threading.Thread(target=_call, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert client.get("/readyz").json()["sessions"] == statuses.count(200) == 1
+
+
+def test_stream_times_out_and_frees_its_slot():
+    """스트리밍도 요청 제한 시간을 넘기면 error 이벤트로 끝나고 실행 슬롯을 반납한다"""
+    app = create_app(graph_factory=lambda: _EchoGraph(delay=5.0), max_concurrency=1, max_queue=0, warmup=False, request_timeout=0.2)
+    with TestClient(app) as client:
+        with client.stream("POST", "/chat/stream", json={"message": "hi", "session_id": "s1"}) as response:
+            events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+        assert events == [{"type": "error", "detail": "응답 시간이 초과되었습니다.", "session_id": "s1"}]
+        admission = client.get("/readyz").json()["admission"]
+        assert admission["running"] == 0 and admission["queued"] == 0
+
+
+class _BrokenWarmupGraph(_EchoGraph):
+    async def awarmup(self):
+        raise RuntimeError("model load failed")
+
+
+def test_failed_warmup_is_not_ready():
+    """예열이 예외로 끝나면 /readyz는 503과 오류 내용을 돌려준다"""
+    with TestClient(create_app(graph_factory=_BrokenWarmupGraph, warmup=True)) as client:
+        for _ in range(50):
+            body = client.get("/readyz")
+            if body.json()["error"]:
+                break
+            time.sleep(0.01)
+        assert body.status_code == 503
+        assert "model load failed" in body.json()["error"]
+
+
+def test_import_does_not_build_an_app():
+    """모듈 임포트는 앱/그래프를 만들지 않는다(uvicorn --factory로 워커마다 생성)"""
+    import ui.fastapi_app
+
+    assert not hasattr(ui.fastapi_app, "app")
@@ -0,0 +1,45 @@
+"""
+지연 로딩 테스트
+새 인터프리터에서 임포트된 모듈만 확인 (LLM 호출 없음)
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+
+def _loaded_after(code: str, *packages: str) -> list:
+    probe = f"import sys; {code}; print(','.join(p for p in {packages!r} if p in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return [p for p in out.stdout.strip().split(",") if p]
+
+
+def test_import_llm_loads_no_provider_sdk():
+    """import llm은 제공자 SDK를 로드하지 않음"""
+    assert _loaded_after("import llm", "langchain_openai", "langchain_community", "langchain_core", "httpx") == []
+
+
+def test_create_loads_only_requested_provider():
+    """처음 create한 제공자만 로드"""
+    loaded = _loaded_after("from llm import LLMFactory; LLMFactory.create('ollama', 'm')", "langchain_openai", "langchain_community")
+    assert loaded == ["langchain_community"]
+
+
+def test_register_by_import_path():
+    """'module:Class' 경로로 등록한 제공자는 create 시점에 임포트"""
+    from llm import LLMFactory
+    from llm.router_llm import RouterLLM
+
+    LLMFactory.register("lazyrouter", "llm.router_llm:RouterLLM")
+    assert "lazyrouter" in LLMFactory.get_available_providers()
+    llm = LLMFactory.create("lazyrouter", "ollama/m", hedge=False)
+    assert isinstance(llm.unwrap(), RouterLLM)
+
+
+def test_composite_providers_are_registered_lazily():
+    """router/fake는 register로 등록된 확장 제공자이며 import llm 시점에는 로드하지 않음"""
+    from llm.factory import LLMFactory
+
+    assert {"router", "fake"} <= set(LLMFactory.get_available_providers())
+    assert _loaded_after("import llm", "llm.router_llm", "llm.fake_llm") == []
@@ -0,0 +1,68 @@
+"""
+노드 LLM 클라이언트 풀 테스트
+실제 LLM 호출 없이 재사용/카운터 동작만 확인
+"""
+from llm import BaseLLM, LLMFactory
+from agent.nodes import llm_utils
+
+
+class _PoolTestLLM(BaseLLM):
+    created = 0
+
+    def _initialize(self):
+        _PoolTestLLM.created += 1
+        self.llm = object()
+
+    def __call__(self, *args, **kwargs):
+        return "ok"
+
+
+def _setup(monkeypatch):
+    LLMFactory.register('pooltest', _PoolTestLLM)
+    monkeypatch.setenv('NODE_POOL_A_PROVIDER', 'pooltest')
+    monkeypatch.setenv('NODE_POOL_A_MODEL', 'm1')
+    monkeypatch.setenv('NODE_POOL_B_PROVIDER', 'pooltest')
+    monkeypatch.setenv('NODE_POOL_B_MODEL', 'm1')
+    llm_utils.clear_llm_pool()
+    _PoolTestLLM.created = 0
+
+
+def test_same_config_reuses_client(monkeypatch):
+    """동일 설정의 노드는 같은 클라이언트를 공유"""
+    _setup(monkeypatch)
+    a = llm_utils.create_langchain_llm_from_env('NODE_POOL_A')
+    b = llm_utils.create_langchain_llm_from_env('NODE_POOL_B')
+    assert a is b
+    assert _PoolTestLLM.created == 1
+    stats = llm_utils.get_llm_pool_stats()
+    assert stats['misses'] == 1 and stats['hits'] == 1 and stats['size'] == 1
+
+
+def test_different_config_creates_new_client(monkeypatch):
+    """temperature 등 설정이 다르면 별도 클라이언트 생성"""
+    _setup(monkeypatch)
+    monkeypatch.setenv('NODE_POOL_B_TEMPERATURE', '0.7')
+    a = llm_utils.create_langchain_llm_from_env('NODE_POOL_A')
+    b = llm_utils.create_langchain_llm_from_env('NODE_POOL_B')
+    assert a is not b
+    assert llm_utils.get_llm_pool_stats()['misses'] == 2
+
+
+def test_dotenv_reload_only_on_mtime_change(tmp_path, monkeypatch):
+    """.env는 mtime이 바뀐 경우에만 다시 반영"""
+    env_file = tmp_path / ".env"
+    env_file.write_text("POOL_TEST_VALUE=1\n", encoding="utf-8")
+    monkeypatch.delenv('POOL_TEST_VALUE', raising=False)
+
+    watcher = llm_utils._DotenvWatcher()
+    watcher._path = str(env_file)
+    assert watcher.refresh() is True
+    assert watcher.refresh() is False
+
+    import os
+    assert os.environ['POOL_TEST_VALUE'] == '1'
+    env_file.write_text("POOL_TEST_VALUE=2\n", encoding="utf-8")
+    os.utime(env_file, ns=(1, 1))
+    assert watcher.refresh() is True
+    assert os.environ['POOL_TEST_VALUE'] == '2'
+    monkeypatch.delenv('POOL_TEST_VALUE', raising=False)
@@ -0,0 +1,140 @@
+"""
+LLM 호출 스케줄러 테스트
+지연을 지정할 수 있는 스텁 모델로 동시 실행 한도/우선순위/속도 한도만 확인 (실제 LLM 호출 없음)
+"""
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from llm import BaseLLM, LLMFactory
+from llm.scheduler import LLMScheduler, ScheduledLLM, llm_priority, reset_scheduler, get_scheduler
+
+
+class _SlowChatModel(BaseChatModel):
+    delay: float = 0.05
+    order: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scheduler-test-stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.order.append(messages[-1].content)
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+
+class _SlowLLM(BaseLLM):
+    def _initialize(self):
+        self.llm = _SlowChatModel(delay=self.config.get("delay", 0.05), order=[])
+
+    def __call__(self, *args, **kwargs):
+        return "ok"
+
+
+def _setup(monkeypatch, **limits):
+    LLMFactory.register("schedstub", _SlowLLM)
+    for name, value in limits.items():
+        monkeypatch.setenv(f"LLM_LIMIT_SCHEDSTUB_{name.upper()}", str(value))
+    reset_scheduler()
+
+
+def test_factory_wraps_and_classifier_calls_jump_the_queue(monkeypatch):
+    """동시 실행 1개 한도에서 대기 중인 분류 호출이 먼저 대기한 에이전트 호출보다 먼저 실행"""
+    _setup(monkeypatch, concurrency=1)
+    llm = LLMFactory.create("schedstub", "m", delay=0.05)
+    assert isinstance(llm, ScheduledLLM)
+    model = llm.as_langchain_model()
+
+    async def _call(name: str, priority: str, start_after: float):
+        await asyncio.sleep(start_after)
+        with llm_priority(priority):
+            await model.ainvoke(name)
+
+    async def _run():
+        await asyncio.gather(
+            _call("agent-1", "agent", 0.0),
+            _call("agent-2", "agent", 0.01),
+            _call("classifier", "classifier", 0.02),
+        )
+
+    asyncio.run(_run())
+    assert llm.unwrap().llm.order == ["agent-1", "classifier", "agent-2"]
+    stats = get_scheduler().stats()["schedstub"]
+    assert stats["calls"] == 3 and stats["queued"] == 2 and stats["in_flight"] == 0
+
+
+def test_requests_per_second_bucket(monkeypatch):
+    """초당 요청 수 한도를 넘는 호출은 버킷이 채워질 때까지 대기"""
+    _setup(monkeypatch, rps=20)
+    model = LLMFactory.create("schedstub", "m", delay=0.0).as_langchain_model()
+
+    async def _run():
+        await asyncio.gather(*(model.ainvoke(str(i)) for i in range(24)))
+
+    t0 = time.perf_counter()
+    asyncio.run(_run())
+    assert time.perf_counter() - t0 >= 0.15  # 버스트 20개 이후 4개는 0.05초 간격
+    assert get_scheduler().stats()["schedstub"]["throttled"] == 4
+
+
+def test_rate_limit_wait_does_not_hold_concurrency_slot():
+    """RPS 한도로 대기 중인 모델 호출이 제공자 동시성 슬롯을 잡지 않아 다른 모델 호출은 바로 실행"""
+    scheduler = LLMScheduler(env={"LLM_LIMIT_P_CONCURRENCY": "1", "LLM_LIMIT_P__SLOW_RPS": "2"})
+    started = {}
+
+    async def _call(name: str, model: str, start_after: float):
+        await asyncio.sleep(start_after)
+        async with scheduler.slot("p", model, 1):
+            started[name] = time.perf_counter()
+
+    async def _run():
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            _call("slow-1", "slow", 0.0),
+            _call("slow-2", "slow", 0.0),
+            _call("slow-3", "slow", 0.0),
+            _call("fast", "fast", 0.05),
+        )
+        return {name: at - t0 for name, at in started.items()}
+
+    elapsed = asyncio.run(_run())
+    assert elapsed["slow-3"] >= 0.4  # 버스트 2개 이후 0.5초 간격
+    assert elapsed["fast"] < 0.3
+    assert scheduler.stats()["p/slow"]["throttled"] == 1
+
+
+def test_cancelled_wait_refunds_its_reservation():
+    """RPS/TPM 대기 중 취소된 호출의 예약은 되돌려져 다음 호출이 기다리지 않음"""
+    scheduler = LLMScheduler(env={"LLM_LIMIT_P_RPS": "1", "LLM_LIMIT_P_TPM": "600"})
+
+    async def _call():
+        async with scheduler.slot("p", "m", 100):
+            pass
+
+    async def _run():
+        await _call()  # 버스트 1개와 토큰 100개를 소진
+        waiting = asyncio.ensure_future(_call())
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        # 취소된 예약이 남아 있으면 다음 호출은 약 2초(요청 2개분)를 기다린다.
+        t0 = time.perf_counter()
+        await _call()
+        return time.perf_counter() - t0
+
+    assert asyncio.run(_run()) < 1.5
+
+
+def test_scheduler_can_be_disabled(monkeypatch):
+    """LLM_SCHEDULER=off이면 제공자 인스턴스를 그대로 반환"""
+    _setup(monkeypatch)
+    monkeypatch.setenv("LLM_SCHEDULER", "off")
+    assert isinstance(LLMFactory.create("schedstub", "m"), _SlowLLM)
@@ -0,0 +1,91 @@
+"""
+부하 생성기 테스트
+스텁 그래프(종료 노드가 입력에 따라 다름)로 개방/폐쇄 루프 집계와 코퍼스 파싱 확인
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "bench"))
+
+import load_generator  # noqa: E402
+from agent.conversation_memory import ConversationMemory  # noqa: E402
+
+
+class _StubGraph:
+    """'상품'이면 ask_product, '오류'면 예외, 나머지는 agent로 끝나는 스텁 그래프"""
+
+    async def aload_history(self, session_id):
+        return []
+
+    async def astream(self, input_text, history=None, session_id=None):
+        if "오류" in input_text:
+            raise RuntimeError("boom")
+        yield {"type": "node", "node": "polite_warning"}
+        await asyncio.sleep(0.001)
+        node = "ask_product" if "상품" in input_text else "agent"
+        yield {"type": "node", "node": node}
+        yield {"type": "end", "output": f"{node} 응답"}
+
+
+def test_load_corpus_accepts_keys_and_strings(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    lines = [{"text": "a"}, {"input": "b"}, {"utterance": "c"}, "d", {"other": "x"}]
+    path.write_text("\n".join(json.dumps(x, ensure_ascii=False) for x in lines) + "\n\n", encoding="utf-8")
+    assert load_generator.load_corpus(str(path)) == ["a", "b", "c", "d"]
+
+
+def test_repo_corpus_is_loadable():
+    assert len(load_generator.load_corpus(str(Path(__file__).parent / "bench" / "corpus.jsonl"))) >= 4
+
+
+def test_open_loop_groups_latency_by_terminal_node(monkeypatch):
+    monkeypatch.setattr(load_generator, "MemoryAgent", _agent_factory())
+    result = asyncio.run(
+        load_generator.run_open_loop(_StubGraph(), ["상품 보여줘", "돈 내", "오류"], qps=200, duration=0.15, seed=1)
+    )
+    assert result["sent"] == 30 and result["dropped"] == 0
+    assert result["completed"] == 20 and result["errors"] == {"RuntimeError": 10}
+    assert set(result["nodes"]) == {"ask_product", "agent"}
+    assert result["nodes"]["agent"]["count"] == 10
+    assert result["error_rate"] == 10 / 30
+    row = result["all"]
+    assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+
+
+def test_open_loop_drops_arrivals_over_max_inflight(monkeypatch):
+    monkeypatch.setattr(load_generator, "MemoryAgent", _agent_factory())
+    result = asyncio.run(
+        load_generator.run_open_loop(_StubGraph(), ["돈 내"], qps=1000, duration=0.02, max_inflight=1, arrival="uniform")
+    )
+    assert result["dropped"] > 0
+    assert result["completed"] + result["dropped"] == result["sent"]
+
+
+def test_closed_loop_counts_timeouts(monkeypatch):
+    class _SlowGraph(_StubGraph):
+        async def astream(self, input_text, history=None, session_id=None):
+            await asyncio.sleep(1)
+            yield {"type": "end", "output": ""}
+
+    monkeypatch.setattr(load_generator, "MemoryAgent", _agent_factory())
+    result = asyncio.run(load_generator.run_closed_loop(_SlowGraph(), ["x"], concurrency=3, duration=0.01, timeout=0.05))
+    assert result["sent"] == 3 and result["errors"] == {"timeout": 3}
+    assert result["completed"] == 0 and result["all"] is None
+
+
+def test_closed_loop_keeps_sessions_busy(monkeypatch):
+    monkeypatch.setattr(load_generator, "MemoryAgent", _agent_factory())
+    result = asyncio.run(load_generator.run_closed_loop(_StubGraph(), ["상품", "돈"], concurrency=4, duration=0.05))
+    assert result["completed"] == result["sent"] > 4
+    assert result["achieved_rps"] > 0
+
+
+def _agent_factory():
+    real = load_generator.MemoryAgent
+
+    def _make(graph, session_id=None):
+        return real(graph, memory=ConversationMemory(max_turns=2, token_budget=100), session_id=session_id)
+
+    return _make
@@ -0,0 +1,149 @@
+"""
+MCP 세션 관리자 테스트
+저장소의 pay-server(FastMCP)를 in-memory로 연결하여 세션 재사용 동작 확인
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+from fastmcp import Client
+
+from agent.tools.mcp_session import MCPSessionManager
+
+sys.path.insert(0, str(Path(__file__).parent / "mcp-server" / "server"))
+from app import mcp  # noqa: E402
+
+CONFIG_PATH = str(Path(__file__).parent / "mcp-server" / "mcp_servers.json")
+
+
+def _make_manager() -> MCPSessionManager:
+    return MCPSessionManager(CONFIG_PATH, client_factory=lambda _config, **kwargs: Client(mcp, **kwargs))
+
+
+def test_session_is_reused_across_calls():
+    """여러 동시 호출이 하나의 세션을 공유"""
+
+    async def scenario():
+        sessions = _make_manager()
+        tools = await sessions.list_tools()
+        assert [t.name for t in tools] == ["pay_amount"]
+        results = await asyncio.gather(*[sessions.call_tool("pay_amount", {"amount": i}) for i in range(5)])
+        assert all("지불 완료" in r.content[0].text for r in results)
+        assert sessions.connects == 1
+        await sessions.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_reconnects_after_session_loss():
+    """세션이 끊어지면 다음 호출에서 지연 재연결"""
+
+    async def scenario():
+        sessions = _make_manager()
+        client = await sessions.get_client()
+        await client.close()
+        await sessions.list_tools()
+        assert sessions.connects == 2
+        await sessions.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_new_event_loop_gets_new_session():
+    """이벤트 루프가 바뀌면 해당 루프에서 새로 연결"""
+    sessions = _make_manager()
+    asyncio.run(sessions.list_tools())
+    asyncio.run(sessions.list_tools())
+    assert sessions.connects == 2
+
+
+def test_tool_catalog_caches_and_invalidates():
+    """TTL 내에는 캐시를 반환하고 tools/list_changed 알림 시 무효화"""
+    from agent.tools.tool_catalog import ToolCatalog
+
+    async def scenario():
+        sessions = _make_manager()
+        catalog = ToolCatalog(sessions, ttl=60)
+        first = await catalog.get_tools()
+        second = await catalog.get_tools()
+        assert first is second and catalog.refreshes == 1
+        fingerprint = catalog.fingerprint
+
+        sessions._notify_tools_changed()
+        third = await catalog.get_tools()
+        assert catalog.refreshes == 2
+        assert catalog.fingerprint == fingerprint
+        assert third[0].args_schema is first[0].args_schema  # 스키마 해시 기반 메모이즈
+        await sessions.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_tool_catalog_snapshot_serves_cold_start(tmp_path):
+    """디스크 스냅샷으로 MCP 서버 응답 없이 첫 요청 처리"""
+    from agent.tools.tool_catalog import ToolCatalog
+
+    snapshot = str(tmp_path / "catalog.json")
+
+    async def warm():
+        sessions = _make_manager()
+        await ToolCatalog(sessions, snapshot_path=snapshot).get_tools()
+        await sessions.aclose()
+
+    asyncio.run(warm())
+
+    def _unreachable(_config, **kwargs):
+        raise ConnectionError("server down")
+
+    async def cold():
+        catalog = ToolCatalog(MCPSessionManager(CONFIG_PATH, client_factory=_unreachable), snapshot_path=snapshot)
+        tools = await catalog.get_tools()
+        assert [t.name for t in tools] == ["pay_amount"]
+
+    asyncio.run(cold())
+
+
+def test_tool_catalog_snapshot_ignored_for_other_config(tmp_path):
+    """다른 MCP 설정으로 뜬 프로세스는 이전 서버의 도구 스냅샷을 쓰지 않음"""
+    import json
+    from agent.tools.tool_catalog import ToolCatalog
+
+    snapshot = str(tmp_path / "catalog.json")
+
+    async def warm():
+        sessions = _make_manager()
+        await ToolCatalog(sessions, snapshot_path=snapshot).get_tools()
+        await sessions.aclose()
+
+    asyncio.run(warm())
+
+    other_config = tmp_path / "other_servers.json"
+    other_config.write_text(json.dumps({"mcpServers": {"other": {"url": "http://127.0.0.1:1/sse"}}}), encoding="utf-8")
+    catalog = ToolCatalog(MCPSessionManager(str(other_config)), snapshot_path=snapshot)
+    assert catalog.fingerprint is None
+    assert ToolCatalog(_make_manager(), snapshot_path=snapshot).fingerprint is not None
+
+
+def test_session_on_other_loop_is_closed_on_its_own_loop(caplog):
+    """다른 루프에 묶인 세션은 소유 루프가 살아 있으면 그 루프에서 닫고, 멈췄으면 경고만 남김"""
+    import threading
+
+    owner = asyncio.new_event_loop()
+    thread = threading.Thread(target=owner.run_forever, daemon=True)
+    thread.start()
+    try:
+        sessions = _make_manager()
+        client = asyncio.run_coroutine_threadsafe(sessions.get_client(), owner).result(timeout=10)
+        assert client.is_connected()
+        asyncio.run(sessions.aclose())
+        assert not client.is_connected()
+    finally:
+        owner.call_soon_threadsafe(owner.stop)
+        thread.join(timeout=5)
+        owner.close()
+
+    sessions = _make_manager()
+    asyncio.run(sessions.list_tools())
+    with caplog.at_level("WARNING", logger="agent.tools.mcp_session"):
+        asyncio.run(sessions.aclose())
+    assert "세션을 닫지 못했습니다" in caplog.text
@@ -0,0 +1,137 @@
+"""
+성능 지표 테스트
+스텁 LLM 그래프와 in-memory MCP로 노드/LLM/MCP 계측과 Prometheus 텍스트 출력 확인
+"""
+import asyncio
+import sys
+import urllib.request
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from fastmcp import Client
+
+from agent import metrics
+from agent.graphs.purchase_graph import PurchaseFlowGraph
+from agent.nodes import llm_utils
+from agent.tools.mcp_session import MCPSessionManager
+from llm import LLMFactory
+from test_fastapi_app import _EchoGraph
+from test_purchase_graph import _StubLLM
+from ui.fastapi_app import create_app
+
+sys.path.insert(0, str(Path(__file__).parent / "mcp-server" / "server"))
+from app import mcp  # noqa: E402
+
+CONFIG_PATH = str(Path(__file__).parent / "mcp-server" / "mcp_servers.json")
+
+
+@pytest.fixture
+def metrics_on():
+    metrics.enable(True)
+    metrics.REGISTRY.clear()
+    llm_utils.clear_llm_pool()
+    yield metrics.REGISTRY
+    metrics.enable(False)
+    metrics.REGISTRY.clear()
+    llm_utils.clear_llm_pool()
+
+
+def test_render_prometheus_text():
+    registry = metrics.MetricsRegistry()
+    hist = registry.histogram("x_seconds", "지연", ("node",), buckets=(0.1, 1.0))
+    hist.observe(('a"b',), 0.5)
+    registry.counter("y_total", "횟수").inc()
+    text = registry.render()
+    assert "# TYPE x_seconds histogram" in text
+    assert 'x_seconds_bucket{node="a\\"b",le="0.1"} 0' in text
+    assert 'x_seconds_bucket{node="a\\"b",le="1"} 1' in text
+    assert 'x_seconds_bucket{node="a\\"b",le="+Inf"} 1' in text
+    assert 'x_seconds_count{node="a\\"b"} 1' in text
+    assert "y_total 1" in text.splitlines()
+
+
+def test_disabled_installs_nothing():
+    def node(state):
+        return state
+
+    assert not metrics.enabled()
+    assert metrics.instrument_node("n", node) is node
+    assert metrics.instrument_branch("n", node, {}) is node
+    assert metrics.mcp_timer("call_tool", "t") is metrics.mcp_timer("list_tools")
+
+
+def test_graph_records_nodes_branches_and_llm_calls(metrics_on, monkeypatch):
+    LLMFactory.register("graphstub", _StubLLM)
+    monkeypatch.setenv("LLM_PROVIDER", "graphstub")
+    monkeypatch.setenv("LLM_TEMPERATURE", "0.0")
+    monkeypatch.setenv("NODE_POLITENESS_MODEL", "no")
+    monkeypatch.setenv("MCP_TOOL_CATALOG_SNAPSHOT", "")
+    monkeypatch.setenv("CLASSIFIER_CACHE", "off")
+
+    graph = PurchaseFlowGraph(preclassify=False)
+    assert asyncio.run(graph.ainvoke("돈 내"))["output"] == "존대말을 써주세요"
+
+    assert metrics.NODE_DURATION.count(("politeness",)) == 1
+    assert metrics.NODE_DURATION.count(("polite_warning",)) == 1
+    assert metrics.NODE_INFLIGHT.value(("politeness",)) == 0
+    assert metrics.BRANCH_TOTAL.value(("politeness", "polite_warning")) == 1
+    assert metrics.LLM_DURATION.count(("politeness", "graphstub", "no")) == 1
+    assert metrics.LLM_INFLIGHT.value(("graphstub", "no")) == 0
+    assert 'agent_llm_request_duration_seconds_count{node="politeness",provider="graphstub",model="no"} 1' in metrics_on.render()
+
+
+def test_llm_pooled_before_enabling_is_measured(monkeypatch):
+    """계측을 켜기 전에 풀에 들어간 모델도 켠 뒤의 요청부터 기록된다"""
+    LLMFactory.register("graphstub", _StubLLM)
+    monkeypatch.setenv("LLM_PROVIDER", "graphstub")
+    monkeypatch.setenv("NODE_POLITENESS_MODEL", "no")
+    monkeypatch.setenv("NODE_POLITENESS_TEMPERATURE", "0.0")
+    llm_utils.clear_llm_pool()
+    metrics.REGISTRY.clear()
+    model = llm_utils.create_langchain_llm_from_env("NODE_POLITENESS")
+    try:
+        asyncio.run(model.ainvoke("안녕"))
+        assert metrics.LLM_DURATION.count(("", "graphstub", "no")) == 0
+
+        metrics.enable(True)
+        asyncio.run(llm_utils.create_langchain_llm_from_env("NODE_POLITENESS").ainvoke("안녕"))
+        assert llm_utils.get_llm_pool_stats()["misses"] == 1
+        assert metrics.LLM_DURATION.count(("", "graphstub", "no")) == 1
+        assert metrics.LLM_INFLIGHT.value(("graphstub", "no")) == 0
+    finally:
+        metrics.enable(False)
+        metrics.REGISTRY.clear()
+        llm_utils.clear_llm_pool()
+
+
+def test_mcp_calls_and_errors_are_recorded(metrics_on):
+    async def scenario():
+        sessions = MCPSessionManager(CONFIG_PATH, client_factory=lambda _config, **kwargs: Client(mcp, **kwargs))
+        await sessions.list_tools()
+        await sessions.call_tool("pay_amount", {"amount": 1})
+        with pytest.raises(Exception):
+            await sessions.call_tool("missing_tool", {})
+        await sessions.aclose()
+
+    asyncio.run(scenario())
+    assert metrics.MCP_DURATION.count(("list_tools", "")) == 1
+    assert metrics.MCP_DURATION.count(("call_tool", "pay_amount")) == 1
+    assert sum(v for k, v in metrics.MCP_ERRORS._values.items() if k[:2] == ("call_tool", "missing_tool")) == 1
+    assert metrics.MCP_INFLIGHT.value(("call_tool",)) == 0
+
+
+def test_endpoints_serve_text_format(metrics_on):
+    metrics.NODE_ERRORS.inc(("agent", "ValueError"))
+    with TestClient(create_app(graph_factory=_EchoGraph, warmup=False)) as client:
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'agent_graph_node_errors_total{node="agent",error="ValueError"} 1' in response.text
+
+        metrics.enable(False)
+        assert client.get("/metrics").status_code == 404
+
+    server = metrics.start_http_server(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as resp:
+        assert b"agent_graph_node_errors_total" in resp.read()
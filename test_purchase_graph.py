@@ -0,0 +1,283 @@
+"""
+구매 흐름 그래프 테스트
+지연/응답을 지정할 수 있는 스텁 LLM으로 분기와 실행 모드만 확인 (실제 LLM 호출 없음)
+"""
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from llm import BaseLLM, LLMFactory
+from agent.nodes import llm_utils
+from agent.graphs.purchase_graph import PurchaseFlowGraph
+from agent.nodes.purchase_nodes import parse_multilabel_response
+
+
+class _StubChatModel(BaseChatModel):
+    reply: str = "YES"
+    delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "graph-test-stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+
+class _StubLLM(BaseLLM):
+    """모델명이 그대로 응답이 되고, temperature 값을 지연(초)으로 사용하는 스텁 제공자."""
+
+    def _initialize(self):
+        self.llm = _StubChatModel(reply=self.model, delay=self.config.get("temperature", 0.0))
+
+    def __call__(self, *args, **kwargs):
+        return self.llm.invoke(*args, **kwargs)
+
+
+@pytest.fixture
+def stub_env(monkeypatch):
+    LLMFactory.register("graphstub", _StubLLM)
+    monkeypatch.setenv("LLM_PROVIDER", "graphstub")
+    monkeypatch.setenv("LLM_TEMPERATURE", "0.0")
+    monkeypatch.setenv("MCP_TOOL_CATALOG_SNAPSHOT", "")
+    llm_utils.clear_llm_pool()
+
+    def configure(politeness: str, pay_intent: str, delay: float = 0.0, multilabel: str = ""):
+        monkeypatch.setenv("NODE_POLITENESS_MODEL", politeness)
+        monkeypatch.setenv("NODE_PAY_INTENT_MODEL", pay_intent)
+        monkeypatch.setenv("NODE_MULTI_LABEL_MODEL", multilabel)
+        monkeypatch.setenv("LLM_TEMPERATURE", str(delay))
+
+    return configure
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_routing(stub_env, speculative):
+    """두 실행 모드 모두 같은 분기 결과"""
+    graph = PurchaseFlowGraph(speculative=speculative)
+
+    stub_env("no", "yes")
+    assert asyncio.run(graph.ainvoke("돈 내"))["output"] == "존대말을 써주세요"
+
+    stub_env("yes", "no")
+    assert asyncio.run(graph.ainvoke("안녕하세요"))["output"].startswith("어떤 상품을")
+
+
+def test_speculative_mode_overlaps_classifiers(stub_env):
+    """추측 실행 모드는 두 분류 호출을 겹쳐 실행"""
+    stub_env("yes", "no", delay=0.2)
+
+    sequential = PurchaseFlowGraph(speculative=False, preclassify=False)
+    t0 = time.perf_counter()
+    asyncio.run(sequential.ainvoke("상품 보여주세요"))
+    sequential_elapsed = time.perf_counter() - t0
+
+    speculative = PurchaseFlowGraph(speculative=True, preclassify=False)
+    t0 = time.perf_counter()
+    asyncio.run(speculative.ainvoke("상품 보여주세요"))
+    speculative_elapsed = time.perf_counter() - t0
+
+    assert sequential_elapsed >= 0.4
+    assert speculative_elapsed < 0.35
+
+
+def test_preclassifier_skips_llm(stub_env):
+    """규칙으로 결정되는 발화는 LLM을 거치지 않음"""
+    stub_env("no", "no")  # LLM은 항상 NO
+    graph = PurchaseFlowGraph(speculative=False, preclassify=True)
+    assert asyncio.run(graph.ainvoke("상품 좀 보여주세요"))["output"].startswith("어떤 상품을")
+
+    stats = graph.preclassifier_stats()
+    assert stats["NODE_POLITENESS"]["rules"]["honorific_seyo_ending"]["hits"] == 1
+    assert stats["NODE_PAY_INTENT"]["decided"] == 0  # 금액이 없다는 것만으로 NO를 정하지 않고 LLM에 넘긴다
+    assert stats["NODE_PAY_INTENT"]["fallthrough"] == 1
+
+
+@pytest.mark.parametrize("text", ["이 상품 구매할게요", "주문해 주세요", "그걸로 살게요", "상품 좀 보여주세요"])
+def test_pay_intent_rules_do_not_settle_purchase_requests_as_no(text):
+    """금액이 없는 구매/주문 요청은 규칙이 NO로 정하지 않는다"""
+    from agent.nodes.preclassifier import NO, default_pay_intent_preclassifier
+
+    decision = default_pay_intent_preclassifier().classify(text)
+    assert decision.verdict != NO
+    assert not decision.decided
+
+
+def _graph_without_mcp(**kwargs) -> PurchaseFlowGraph:
+    """MCP 서버 없이 빈 도구 목록으로 동작하는 그래프"""
+
+    async def _no_tools():
+        return []
+
+    return PurchaseFlowGraph(get_tools=_no_tools, **kwargs)
+
+
+def test_multilabel_mode_single_call(stub_env):
+    """다중 라벨 모드는 JSON 한 번으로 분기"""
+    stub_env("no", "no", multilabel='결과: {"honorific": true, "pay_intent": false, "tool_eligible": false}')
+    graph = _graph_without_mcp(multilabel=True, preclassify=False)
+    final = asyncio.run(graph.ainvoke("상품 보여주세요"))
+    assert final["multilabel_ok"] is True
+    assert final["output"].startswith("어떤 상품을")
+
+
+def test_multilabel_mode_falls_back_on_invalid_json(stub_env):
+    """응답 검증 실패 시 노드별 경로로 폴백"""
+    stub_env("yes", "no", multilabel="잘 모르겠습니다")
+    graph = _graph_without_mcp(multilabel=True, preclassify=False)
+    final = asyncio.run(graph.ainvoke("상품 보여주세요"))
+    assert final["multilabel_ok"] is False
+    assert final["output"].startswith("어떤 상품을")
+
+
+def test_multilabel_mode_keeps_rule_verdicts(stub_env):
+    """규칙이 정한 라벨은 다중 라벨 응답이 뒤집지 못하고, 노드별 경로와 같은 분기로 간다"""
+    stub_env("no", "yes", multilabel='{"honorific": false, "pay_intent": true, "tool_eligible": false}')
+    # 존대말 규칙 YES, 지불 의사 규칙 UNSURE(금액 없음) → 지불 의사만 LLM 응답을 따른다
+    final = asyncio.run(_graph_without_mcp(multilabel=True).ainvoke("결제 부탁드립니다"))
+    assert final["multilabel_ok"] is True and final["is_honorific"] is True and final["intent_pay_amount"] is True
+    assert final["output"] == "적절한 tool 이 존재하지 않습니다."
+
+    # 두 규칙이 모두 YES → 다중 라벨 호출 없이 check_tool로 바로 가서 도구 판정만 한다
+    graph = _graph_without_mcp(multilabel=True)
+
+    async def _collect():
+        return [event async for event in graph.astream("돈 12345 지불합니다")]
+
+    events = asyncio.run(_collect())
+    assert [e["node"] for e in events if e["type"] == "node"] == ["classify_all", "check_tool", "no_tool"]
+    final = events[-1]["state"]
+    assert final["is_honorific"] is True and final["intent_pay_amount"] is True
+    assert final["output"] == "적절한 tool 이 존재하지 않습니다."
+    stats = graph.preclassifier_stats()
+    assert stats["NODE_POLITENESS"]["calls"] == 1 and stats["NODE_PAY_INTENT"]["calls"] == 1
+
+
+def test_parse_multilabel_response():
+    """다중 라벨 응답 검증"""
+    assert parse_multilabel_response('{"honorific": "YES", "pay_intent": "NO", "tool_eligible": false}') == {
+        "honorific": True, "pay_intent": False, "tool_eligible": False,
+    }
+    assert parse_multilabel_response('{"honorific": true}') is None
+    assert parse_multilabel_response("YES") is None
+
+
+def test_classifier_cache_skips_repeated_llm_calls(stub_env, monkeypatch):
+    """같은 발화의 반복 분류는 캐시에서 응답"""
+    monkeypatch.setenv("CLASSIFIER_CACHE", "memory")
+    stub_env("yes", "no")
+    graph = PurchaseFlowGraph(preclassify=False)
+    for _ in range(3):
+        asyncio.run(graph.ainvoke("상품 보여주세요"))
+    stats = graph.classifier_cache_stats()
+    assert stats["misses"] == 2  # 존대말/지불 의사 각 1회
+    assert stats["hits"] == 4
+
+
+def test_tool_eligibility_cached_per_catalog(stub_env, monkeypatch):
+    """같은 의도의 반복 요청은 도구 적합성 LLM 호출을 건너뛰고, 카탈로그가 바뀌면 무효화"""
+    from langchain.tools import StructuredTool
+
+    stub_env("yes", "yes")
+    monkeypatch.setenv("NODE_TOOL_CHECK_MODEL", "no")
+    tools = [StructuredTool.from_function(func=lambda amount: "ok", name="pay_amount", description="금액 지불")]
+
+    async def _get_tools():
+        return tools
+
+    graph = PurchaseFlowGraph(preclassify=False, get_tools=_get_tools)
+
+    asyncio.run(graph.ainvoke("돈 12345 지불해요"))
+    asyncio.run(graph.ainvoke("돈 500 지불해요"))
+    assert graph.eligibility_cache_stats()["hits"] == 1
+
+    tools[0] = StructuredTool.from_function(func=lambda amount: "ok", name="pay_amount", description="카드 결제")
+    assert asyncio.run(graph.ainvoke("돈 500 지불해요"))["output"] == "적절한 tool 이 존재하지 않습니다."
+    stats = graph.eligibility_cache_stats()
+    assert stats["misses"] == 2 and stats["invalidations"] == 1
+
+
+def test_astream_yields_node_events_then_end(stub_env):
+    """스트리밍 실행: 노드 전이 이벤트 후 최종 응답, 분류 노드 토큰은 노출하지 않음"""
+    stub_env("yes", "no")
+    graph = PurchaseFlowGraph(speculative=False, preclassify=False)
+
+    async def _collect():
+        return [event async for event in graph.astream("상품 보여주세요")]
+
+    events = asyncio.run(_collect())
+    assert [e["node"] for e in events if e["type"] == "node"] == ["politeness", "classify_pay_amount", "ask_product"]
+    assert not [e for e in events if e["type"] == "token"]
+    assert events[-1]["type"] == "end" and events[-1]["output"].startswith("어떤 상품을")
+
+    graph._STREAMED_NODES = frozenset({"politeness"})
+    tokens = [e["text"] for e in graph.stream("다른 상품 보여주세요") if e["type"] == "token"]
+    assert "".join(tokens) == "yes"
+
+
+def test_graph_compiles_lazily_and_warmup_prepares_resources(stub_env):
+    """생성 시에는 컴파일하지 않고, warmup이 그래프/노드 모델/MCP 도구/분류 호출을 미리 준비"""
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent / "bench"))
+    from in_memory_mcp import pay_server_catalog
+
+    stub_env("yes", "no")
+    catalog = pay_server_catalog()
+    graph = PurchaseFlowGraph(tool_catalog=catalog)
+    assert graph._compiled is None
+
+    report = graph.warmup()
+    assert all(step["ok"] for step in report.values()), report
+    assert {"graph", "llm:NODE_POLITENESS", "llm:NODE_AGENT", "tools", "classify"} <= set(report)
+    assert report["tools"]["detail"] >= 1
+    assert graph._compiled is not None and catalog.sessions.connects == 1
+    assert llm_utils.get_llm_pool_stats()["size"] >= 1
+
+
+def test_session_resumes_from_checkpoint_on_another_worker(stub_env, tmp_path):
+    """체크포인터를 공유하면 새 프로세스의 MemoryAgent가 첫 턴에서 이전 대화를 복원"""
+    from agent.conversation_memory import ConversationMemory
+    from agent.graphs.sqlite_checkpointer import SQLiteCheckpointSaver
+    from agent.memory_agent import MemoryAgent
+
+    stub_env("yes", "no")
+    path = str(tmp_path / "checkpoints.sqlite")
+    first_saver = SQLiteCheckpointSaver(path)
+    first = MemoryAgent(_graph_without_mcp(checkpointer=first_saver), ConversationMemory(), session_id="u1")
+    assert asyncio.run(first.achat("안녕하세요")).startswith("어떤 상품을")
+    first_saver.close()
+
+    second = _graph_without_mcp(checkpointer=SQLiteCheckpointSaver(path))
+    resumed = MemoryAgent(second, ConversationMemory(), session_id="u1")
+    asyncio.run(resumed.achat("상품 보여주세요"))
+    assert [m.content for m in resumed.memory.messages()][:1] == ["안녕하세요"]
+    assert resumed.memory.stats()["turns"] == 2
+    assert second.checkpointer_stats()["pending"] > 0
+
+
+def test_anonymous_turn_is_not_checkpointed(stub_env, tmp_path):
+    """session_id 없는 호출은 체크포인터를 거치지 않는다(다시 읽을 일 없는 스레드를 만들지 않음)"""
+    from agent.graphs.sqlite_checkpointer import SQLiteCheckpointSaver
+
+    stub_env("yes", "no")
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = _graph_without_mcp(checkpointer=saver)
+    assert asyncio.run(graph.ainvoke("안녕하세요"))["output"].startswith("어떤 상품을")
+    assert [e["type"] for e in graph.stream("안녕하세요")][-1] == "end"
+    assert saver.stats()["pending"] == 0
+    assert graph.load_history("") == []
+    asyncio.run(graph.ainvoke("안녕하세요", session_id="u1"))
+    assert saver.stats()["pending"] > 0
+    saver.close()
@@ -0,0 +1,138 @@
+"""
+라우터 제공자 테스트
+모델명으로 지연/실패를 지정하는 스텁 제공자로 헤징과 장애 조치만 확인 (실제 LLM 호출 없음)
+"""
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from llm import BaseLLM, LLMFactory
+from llm.router_llm import parse_targets
+
+
+class _BackendChatModel(BaseChatModel):
+    name_: str
+    delay: float = 0.0
+    fail: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "router-test-stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.fail:
+            raise ConnectionError(self.name_)
+        time.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.name_))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(self.name_)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.name_))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(self.name_)
+        for part in (self.name_[:2], self.name_[2:]):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=part))
+
+
+class _BackendLLM(BaseLLM):
+    """모델명 'slow'/'fast'/'fail'이 동작을 정하는 스텁 제공자."""
+
+    def _initialize(self):
+        delays = {"slow": 1.0, "fast": 0.01, "fail": 0.01}
+        self.llm = _BackendChatModel(name_=self.model, delay=delays[self.model], fail=self.model == "fail")
+
+    def __call__(self, *args, **kwargs):
+        return self.llm.invoke(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def _register():
+    LLMFactory.register("routerstub", _BackendLLM)
+
+
+def test_parse_targets():
+    assert parse_targets("ollama/gemma3n:e4b, openai/gpt-4o-mini") == [("ollama", "gemma3n:e4b"), ("openai", "gpt-4o-mini")]
+    with pytest.raises(ValueError):
+        parse_targets("ollama")
+
+
+def test_hedged_request_takes_first_answer():
+    """첫 대상이 헤징 지연 안에 응답하지 않으면 다음 대상의 응답을 사용"""
+    llm = LLMFactory.create("router", "routerstub/slow,routerstub/fast", hedge_delay=0.05)
+    t0 = time.perf_counter()
+    assert asyncio.run(llm.as_langchain_model().ainvoke("hi")).content == "fast"
+    assert time.perf_counter() - t0 < 0.5
+    stats = llm.router_stats()["targets"]
+    assert stats["routerstub/fast"]["hedged"] == 1 and stats["routerstub/fast"]["wins"] == 1
+
+
+def test_failover_on_error_without_hedging():
+    """오류가 나면 다음 대상으로 넘어감 (비동기/동기)"""
+    llm = LLMFactory.create("router", "routerstub/fail,routerstub/fast", hedge=False)
+    model = llm.as_langchain_model()
+    assert asyncio.run(model.ainvoke("hi")).content == "fast"
+    assert model.invoke("hi").content == "fast"
+    assert llm.router_stats()["targets"]["routerstub/fail"]["errors"] == 2
+
+    only_failing = LLMFactory.create("router", "routerstub/fail", hedge=False)
+    with pytest.raises(ConnectionError):
+        asyncio.run(only_failing.as_langchain_model().ainvoke("hi"))
+
+
+def test_hedge_delay_follows_primary_quantile():
+    """표본이 모이면 헤징 지연은 첫 대상의 p95 지연을 따름"""
+    llm = LLMFactory.create("router", "routerstub/fast,routerstub/slow", hedge_delay=5.0)
+    model = llm.as_langchain_model()
+
+    async def _run():
+        for _ in range(12):
+            await model.ainvoke("hi")
+
+    asyncio.run(_run())
+    assert llm.router_stats()["hedge_delay_ms"] < 1000
+
+
+def test_cancelled_primary_enters_latency_samples():
+    """헤징에서 져 취소된 첫 대상도 경과 시간만큼 지연 표본에 들어가 헤징 지연이 짧아지지 않음"""
+    llm = LLMFactory.create("router", "routerstub/slow,routerstub/fast", hedge_delay=0.05, min_samples=1)
+
+    async def _run():
+        await llm.as_langchain_model().ainvoke("hi")
+        await asyncio.sleep(0.01)  # 취소된 시도가 정리될 시간
+
+    asyncio.run(_run())
+    stats = llm.router_stats()
+    assert stats["targets"]["routerstub/slow"]["p95_ms"] >= 50
+    assert stats["hedge_delay_ms"] >= 50
+
+
+def test_min_samples_from_env_and_kwargs(monkeypatch):
+    monkeypatch.setenv("ROUTER_MIN_SAMPLES", "3")
+    assert LLMFactory.create("router", "routerstub/fast").llm.min_samples == 3
+    assert LLMFactory.create("router", "routerstub/fast", min_samples=5).llm.min_samples == 5
+
+
+def test_stream_hedges_and_fails_over():
+    """스트리밍도 헤징(첫 조각이 먼저 온 대상)과 장애 조치를 따름"""
+    hedged = LLMFactory.create("router", "routerstub/slow,routerstub/fast", hedge_delay=0.05)
+    failing = LLMFactory.create("router", "routerstub/fail,routerstub/fast", hedge=False)
+
+    async def _collect(llm):
+        return [chunk.content async for chunk in llm.as_langchain_model().astream("hi")]
+
+    t0 = time.perf_counter()
+    assert asyncio.run(_collect(hedged)) == ["fa", "st"]  # 이긴 대상의 조각을 그대로 이어서 받음
+    assert time.perf_counter() - t0 < 0.5
+    assert hedged.router_stats()["targets"]["routerstub/fast"]["wins"] == 1
+    assert asyncio.run(_collect(failing)) == ["fa", "st"]
+    assert failing.router_stats()["targets"]["routerstub/fail"]["errors"] == 1
@@ -0,0 +1,101 @@
+"""
+SQLite 그래프 체크포인터 테스트
+지연 쓰기(요청 경로에서 DB 미기록), 워커 간 재개, 오래된 체크포인트 정리 확인
+"""
+import asyncio
+import sqlite3
+import time
+from typing import TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from agent.graphs.sqlite_checkpointer import SQLiteCheckpointSaver
+
+
+class _CounterState(TypedDict):
+    count: int
+    note: str
+
+
+def _compile(saver):
+    workflow = StateGraph(_CounterState)
+    workflow.add_node("inc", lambda s: {"count": s["count"] + 1})
+    workflow.add_node("annotate", lambda s: {"note": "x" * 2000})
+    workflow.add_edge(START, "inc")
+    workflow.add_edge("inc", "annotate")
+    workflow.add_edge("annotate", END)
+    return workflow.compile(checkpointer=saver)
+
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+
+
+def test_writes_are_deferred_but_visible(tmp_path):
+    """체크포인트는 대기열에만 쌓이고, 같은 프로세스 조회에는 바로 보인다"""
+    path = tmp_path / "cp.sqlite"
+    saver = SQLiteCheckpointSaver(str(path), flush_interval=60.0)
+    graph = _compile(saver)
+    config = {"configurable": {"thread_id": "s1"}}
+    assert asyncio.run(graph.ainvoke({"count": 1, "note": ""}, config))["count"] == 2
+    assert _rows(path) == 0
+    assert graph.get_state(config).values["count"] == 2
+    assert saver.stats()["pending"] > 0
+
+    saver.flush()
+    assert _rows(path) > 0 and saver.stats()["pending"] == 0
+    saver.close()
+
+
+def test_session_resumes_on_another_worker_and_prunes(tmp_path):
+    """같은 DB 파일을 쓰는 다른 인스턴스에서 이어서 실행, 스레드별 최근 keep_last개만 유지"""
+    path = str(tmp_path / "cp.sqlite")
+    first = SQLiteCheckpointSaver(path, flush_interval=0.01, keep_last=2)
+    config = {"configurable": {"thread_id": "s1"}}
+    _compile(first).invoke({"count": 1, "note": ""}, config)
+    first.close()
+
+    second = SQLiteCheckpointSaver(path, keep_last=2)
+    graph = _compile(second)
+    assert graph.get_state(config).values == {"count": 2, "note": "x" * 2000}
+    assert graph.invoke({"count": graph.get_state(config).values["count"] + 10}, config)["count"] == 13
+    second.flush()
+    assert _rows(path) == 2
+    assert second.stats()["pruned"] > 0
+    assert [t.checkpoint["channel_values"]["count"] for t in second.list(config)][0] == 13
+    second.close()
+
+
+def test_ttl_prunes_idle_threads_by_index(tmp_path):
+    """기간 정리는 threads 표의 마지막 갱신 시각으로 오래된 스레드만 지운다(기존 DB는 처음 열 때 채움)"""
+    path = str(tmp_path / "cp.sqlite")
+    saver = SQLiteCheckpointSaver(path, flush_interval=60.0)
+    _compile(saver).invoke({"count": 1, "note": ""}, {"configurable": {"thread_id": "old"}})
+    saver.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE threads")  # threads 표 이전 스키마
+        conn.execute("UPDATE checkpoints SET updated_at = ?", (time.time() - 3600,))
+
+    saver = SQLiteCheckpointSaver(path, flush_interval=60.0, ttl_seconds=60.0)
+    _compile(saver).invoke({"count": 1, "note": ""}, {"configurable": {"thread_id": "new"}})
+    saver.flush()
+    with sqlite3.connect(path) as conn:
+        assert {r[0] for r in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")} == {"new"}
+        assert [r[0] for r in conn.execute("SELECT thread_id FROM threads")] == ["new"]
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT thread_id FROM threads WHERE updated_at < ?", (0,)
+        ))
+    assert "threads_updated_at" in plan
+    saver.close()
+
+
+def test_writes_after_close_are_written_immediately(tmp_path):
+    """close() 뒤의 쓰기는 대기열에 남지 않고 바로 기록된다"""
+    path = tmp_path / "cp.sqlite"
+    saver = SQLiteCheckpointSaver(str(path), flush_interval=60.0)
+    graph = _compile(saver)
+    saver.close()
+    graph.invoke({"count": 1, "note": ""}, {"configurable": {"thread_id": "late"}})
+    assert saver.stats()["pending"] == 0
+    assert _rows(path) > 0
@@ -0,0 +1,142 @@
+"""
+로컬 추적 테스트
+스텁 LLM 그래프와 in-memory MCP로 턴당 trace 구성, 서버로의 trace context 전파, 샘플링/내보내기 확인
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastmcp import Client
+
+from agent.graphs.purchase_graph import PurchaseFlowGraph
+from agent.nodes import llm_utils
+from agent.tools.mcp_session import MCPSessionManager
+from agent.tracing import TRACER, InMemoryExporter, JsonlExporter, Tracer, critical_path, render_trace, trace_node
+from llm import LLMFactory
+from test_purchase_graph import _StubLLM
+
+sys.path.insert(0, str(Path(__file__).parent / "mcp-server" / "server"))
+import app as pay_server  # noqa: E402
+from trace_context import parse_traceparent  # noqa: E402
+
+CONFIG_PATH = str(Path(__file__).parent / "mcp-server" / "mcp_servers.json")
+
+
+@pytest.fixture
+def exporter():
+    memory = InMemoryExporter()
+    TRACER.configure(memory)
+    llm_utils.clear_llm_pool()
+    yield memory
+    TRACER.configure(None)
+    llm_utils.clear_llm_pool()
+
+
+def test_disabled_tracer_records_nothing():
+    def node(state):
+        return state
+
+    assert not TRACER.enabled
+    assert trace_node("n", node) is node
+    with TRACER.start_trace("turn") as span:
+        assert span is None and TRACER.traceparent() is None
+
+
+def test_turn_produces_one_trace_with_node_and_llm_spans(exporter, monkeypatch):
+    LLMFactory.register("graphstub", _StubLLM)
+    monkeypatch.setenv("LLM_PROVIDER", "graphstub")
+    monkeypatch.setenv("LLM_TEMPERATURE", "0.0")
+    monkeypatch.setenv("NODE_POLITENESS_MODEL", "no")
+    monkeypatch.setenv("MCP_TOOL_CATALOG_SNAPSHOT", "")
+    monkeypatch.setenv("CLASSIFIER_CACHE", "off")
+
+    graph = PurchaseFlowGraph(preclassify=False)
+    asyncio.run(graph.ainvoke("돈 내", session_id="s1"))
+
+    traces = exporter.traces()
+    assert len(traces) == 1
+    spans = {s["name"]: s for s in next(iter(traces.values()))}
+    root = spans["chat_turn"]
+    assert root["parent_id"] is None and root["attributes"]["session_id"] == "s1"
+    assert spans["node.politeness"]["parent_id"] == root["span_id"]
+    assert spans["node.polite_warning"]["parent_id"] == root["span_id"]
+    llm = spans["llm.graphstub"]
+    assert llm["parent_id"] == spans["node.politeness"]["span_id"]
+    assert llm["attributes"]["node"] == "politeness" and llm["attributes"]["model"] == "no"
+    assert [s["name"] for s in critical_path(list(spans.values()))] == ["chat_turn", "node.polite_warning"]
+
+
+def test_llm_pooled_before_tracing_is_traced(monkeypatch):
+    """추적을 켜기 전에 풀에 들어간 모델도 켠 뒤의 요청부터 span을 남긴다"""
+    LLMFactory.register("graphstub", _StubLLM)
+    monkeypatch.setenv("LLM_PROVIDER", "graphstub")
+    monkeypatch.setenv("NODE_POLITENESS_MODEL", "no")
+    monkeypatch.setenv("NODE_POLITENESS_TEMPERATURE", "0.0")
+    llm_utils.clear_llm_pool()
+    model = llm_utils.create_langchain_llm_from_env("NODE_POLITENESS")
+    asyncio.run(model.ainvoke("안녕"))
+
+    memory = InMemoryExporter()
+    TRACER.configure(memory)
+    try:
+        async def _turn():
+            with TRACER.start_trace("chat_turn"):
+                await llm_utils.create_langchain_llm_from_env("NODE_POLITENESS").ainvoke("안녕")
+
+        asyncio.run(_turn())
+        assert [s["name"] for s in memory.spans] == ["llm.graphstub", "chat_turn"]
+    finally:
+        TRACER.configure(None)
+        llm_utils.clear_llm_pool()
+
+
+def test_mcp_call_carries_trace_context_to_server(exporter, monkeypatch):
+    server_spans = []
+    monkeypatch.setattr(pay_server.trace_middleware, "exporter", server_spans.append)
+
+    async def scenario():
+        sessions = MCPSessionManager(CONFIG_PATH, client_factory=lambda _config, **kwargs: Client(pay_server.mcp, **kwargs))
+        await sessions.call_tool("pay_amount", {"amount": 1})  # trace 밖의 호출은 기록하지 않음
+        with TRACER.start_trace("turn"):
+            await sessions.call_tool("pay_amount", {"amount": 2})
+        await sessions.aclose()
+
+    asyncio.run(scenario())
+    client_span = next(s for s in exporter.spans if s["name"] == "mcp.call_tool")
+    assert len(server_spans) == 1
+    assert server_spans[0]["trace_id"] == client_span["trace_id"]
+    assert server_spans[0]["parent_id"] == client_span["span_id"]
+    assert server_spans[0]["attributes"]["tool"] == "pay_amount"
+    assert "mcp.server.call_tool" in render_trace(exporter.spans + server_spans)
+
+
+def test_sampling_and_jsonl_export(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(JsonlExporter(str(path)), sample_rate=0.5, seed=7)
+    for _ in range(40):
+        with tracer.start_trace("turn"):
+            with tracer.span("child") as child:
+                if child is not None:  # 샘플링에서 빠진 trace는 None
+                    child.set_attribute("k", 1)
+    tracer.configure(None)
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    roots = [s for s in spans if s["name"] == "turn"]
+    assert 5 < len(roots) < 35 and len(spans) == 2 * len(roots)
+
+    tracer = Tracer(InMemoryExporter(), sample_rate=0.0)
+    with tracer.start_trace("turn"), tracer.span("child"):
+        assert tracer.traceparent() is None
+    assert tracer.exporter.spans == []
+
+
+def test_errors_are_recorded_and_traceparent_is_parsed(exporter):
+    with pytest.raises(ValueError):
+        with TRACER.start_trace("turn"):
+            header = TRACER.traceparent()
+            raise ValueError("boom")
+    assert exporter.spans[0]["status"] == "error" and "boom" in exporter.spans[0]["error"]
+    assert parse_traceparent(header) == (exporter.spans[0]["trace_id"], exporter.spans[0]["span_id"])
+    assert parse_traceparent(header[:-2] + "00") is None
+    assert parse_traceparent("garbage") is None
@@ -0,0 +1,165 @@
+"""
+vLLM 제공자 테스트
+httpx MockTransport로 서버 응답을 흉내내어 /generate, /v1/chat/completions 경로 확인 (실제 서버 불필요)
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm import LLMFactory
+from llm.vllm_llm import VLLMChatModel
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    requests_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests_seen.append((request.url.path, body))
+        if request.url.path == "/generate":
+            return httpx.Response(200, json={"text": [body["prompt"] + " YES"]})
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": "NO"}}]})
+
+    original = VLLMChatModel._client_kwargs
+
+    def _client_kwargs(self):
+        kwargs = original(self)
+        kwargs.pop("limits")
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return kwargs
+
+    monkeypatch.setattr(VLLMChatModel, "_client_kwargs", _client_kwargs)
+    return requests_seen
+
+
+def test_generate_endpoint_async(mock_server):
+    """/generate 경로: 프롬프트 접두부를 제거한 응답과 비동기 호출"""
+    llm = LLMFactory.create('vllm', 'm', server_url='http://vllm', temperature=0.0)
+    model = llm.as_langchain_model()
+    resp = asyncio.run(model.ainvoke("존대말인가요?"))
+    assert resp.content == "YES"
+    assert mock_server[0] == ("/generate", {"prompt": "존대말인가요?", "temperature": 0.0})
+    assert llm("ping")["text"] == ["ping YES"]
+
+
+def test_chat_endpoint_and_client_reuse(mock_server):
+    """OpenAI 호환 경로와 동기 클라이언트(연결 풀) 재사용"""
+    llm = LLMFactory.create('vllm', 'm', server_url='http://vllm', endpoint='chat', max_tokens=3)
+    model = llm.as_langchain_model()
+    assert model.invoke("hi").content == "NO"
+    client = model._get_sync_client()
+    model.invoke("again")
+    assert model._get_sync_client() is client
+    path, body = mock_server[0]
+    assert path == "/v1/chat/completions"
+    assert body["messages"] == [{"role": "user", "content": "hi"}] and body["max_tokens"] == 3
+
+
+def test_aclose_closes_the_loop_client(mock_server):
+    """aclose는 현재 루프의 비동기 클라이언트를 닫고, 다음 호출은 새 클라이언트를 만든다"""
+    llm = LLMFactory.create('vllm', 'm', server_url='http://vllm')
+    model = llm.as_langchain_model()
+
+    async def _scenario():
+        await model.ainvoke("hi")
+        client = model._get_async_client()
+        await llm.aclose()
+        assert client.is_closed and not model._async_clients
+        await model.ainvoke("again")
+        assert model._get_async_client() is not client
+        await llm.aclose()
+
+    asyncio.run(_scenario())
+
+
+def test_graph_aclose_closes_pooled_llm_clients(mock_server, monkeypatch):
+    """그래프 종료(aclose)가 풀에 있는 LLM의 비동기 연결 풀을 닫는다"""
+    from agent.graphs.purchase_graph import PurchaseFlowGraph
+    from agent.nodes import llm_utils
+
+    monkeypatch.setenv("VLLM_SERVER_URL", "http://vllm")
+    monkeypatch.setenv("NODE_POLITENESS_PROVIDER", "vllm")
+    monkeypatch.setenv("NODE_POLITENESS_MODEL", "m")
+    llm_utils.clear_llm_pool()
+
+    async def _no_tools():
+        return []
+
+    graph = PurchaseFlowGraph(get_tools=_no_tools)
+
+    async def _scenario():
+        model = llm_utils.create_langchain_llm_from_env("NODE_POLITENESS")
+        await model.ainvoke("hi")
+        provider, model_name, _ = llm_utils.resolve_llm_config("NODE_POLITENESS")
+        vllm = llm_utils._POOL.get_llm(provider, model_name).unwrap()
+        client = vllm.llm._get_async_client()
+        await graph.aclose()
+        return client
+
+    try:
+        assert asyncio.run(_scenario()).is_closed
+    finally:
+        llm_utils.clear_llm_pool()
+
+
+def test_chat_endpoint_streams_sse(monkeypatch):
+    """chat 엔드포인트의 SSE 응답을 토큰 조각으로 전달"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        lines = [f'data: {json.dumps({"choices": [{"delta": {"content": t}}]})}' for t in ("안녕", "하세요")]
+        return httpx.Response(200, text="\n\n".join(lines + ["data: [DONE]"]) + "\n\n")
+
+    original = VLLMChatModel._client_kwargs
+
+    def _client_kwargs(self):
+        kwargs = original(self)
+        kwargs.pop("limits")
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return kwargs
+
+    monkeypatch.setattr(VLLMChatModel, "_client_kwargs", _client_kwargs)
+    model = LLMFactory.create('vllm', 'm', server_url='http://vllm', endpoint='chat').as_langchain_model()
+
+    async def _collect():
+        return [chunk.content async for chunk in model.astream("hi")]
+
+    assert asyncio.run(_collect()) == ["안녕", "하세요"]
+
+
+def test_micro_batching_coalesces_concurrent_prompts(monkeypatch):
+    """창 안에 도착한 프롬프트를 한 번의 /v1/completions 요청으로 묶고 결과를 나누어 전달"""
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append((request.url.path, body))
+        choices = [{"index": i, "text": f" {p}!"} for i, p in enumerate(body["prompt"])]
+        return httpx.Response(200, json={"choices": list(reversed(choices))})
+
+    original = VLLMChatModel._client_kwargs
+
+    def _client_kwargs(self):
+        kwargs = original(self)
+        kwargs.pop("limits")
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return kwargs
+
+    monkeypatch.setattr(VLLMChatModel, "_client_kwargs", _client_kwargs)
+    llm = LLMFactory.create('vllm', 'm', server_url='http://vllm', batch_window_ms=20, max_batch_size=4)
+    model = llm.as_langchain_model()
+
+    async def _run():
+        return await asyncio.gather(*(model.ainvoke(f"q{i}") for i in range(6)))
+
+    replies = [r.content for r in asyncio.run(_run())]
+    assert replies == [f"q{i}!" for i in range(6)]
+    assert [len(body["prompt"]) for path, body in bodies] == [4, 2]
+    assert all(path == "/v1/completions" for path, _ in bodies)
+
+    stats = llm.batch_stats()
+    assert stats["requests"] == 6 and stats["batches"] == 2
+    assert stats["batch_size"]["buckets"]["4"] == 1 and stats["batch_size"]["buckets"]["2"] == 1
+    assert stats["queue_wait_ms"]["count"] == 6
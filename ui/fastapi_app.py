@@ -0,0 +1,334 @@
+"""
+FastAPI 비동기 HTTP API 모듈
+모든 세션이 하나의 그래프를 공유하며, 그래프의 ainvoke/astream을 서버 이벤트 루프에서 직접 실행한다.
+
+엔드포인트:
+    POST /chat          {"message": "...", "session_id": "..."} → {"output": "...", "session_id": "..."}
+    POST /chat/stream   같은 요청 → Server-Sent Events (node/token/end 이벤트)
+    GET  /healthz       프로세스 생존 확인
+    GET  /readyz        그래프 생성·예열 완료 여부(미완료 시 503)
+    GET  /metrics       노드/LLM/MCP 지표(Prometheus 텍스트 형식, METRICS_ENABLED=on일 때만)
+
+동시 실행 수는 HTTP_MAX_CONCURRENCY, 대기열 길이는 HTTP_MAX_QUEUE로 제한하며
+둘 다 찬 상태에서 들어온 요청은 세션을 만들기 전에 429(Retry-After)로 거절한다.
+/chat과 /chat/stream 모두 그래프 실행에 HTTP_REQUEST_TIMEOUT을 적용한다(스트림은 error 이벤트로 끝냄).
+
+실행:
+    python -m ui.fastapi_app                                   # HTTP_HOST/HTTP_PORT/HTTP_WORKERS
+    uvicorn ui.fastapi_app:create_app --factory --workers 4    # 워커마다 앱/그래프를 하나씩 생성
+"""
+import asyncio
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from agent import metrics
+from agent.graphs.base import GraphInterface
+from agent.memory_agent import MemoryAgent
+
+load_dotenv()  # 워커 프로세스마다 임포트 시점에 .env 반영
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_on(name: str, default: str = "on") -> bool:
+    return os.getenv(name, default).strip().lower() not in ("off", "false", "0", "no")
+
+
+class Saturated(Exception):
+    """동시 실행 슬롯과 대기열이 모두 찬 상태."""
+
+
+class AdmissionController:
+    """
+    동시 실행 수와 대기열 길이를 제한하는 입장 제어기.
+    실행 중 + 대기 중 요청이 max_concurrency + max_queue에 도달하면 새 요청을 즉시 거절한다.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_system = 0
+        self.running = 0
+        self.rejected = 0
+
+    def reserve(self) -> None:
+        """
+        실행 또는 대기 자리를 즉시 예약한다. 가득 찼으면 Saturated를 던진다.
+        예약한 요청은 slot()에서 실행 슬롯을 기다리고, 끝나면 반드시 release()로 반납한다.
+        """
+        if self.in_system >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise Saturated()
+        self.in_system += 1
+
+    def release(self) -> None:
+        self.in_system -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """예약된 요청이 실행 슬롯을 얻을 때까지 기다린 뒤 실행한다."""
+        async with self._semaphore:
+            self.running += 1
+            try:
+                yield
+            finally:
+                self.running -= 1
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        self.reserve()
+        try:
+            async with self.slot():
+                yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "queued": self.in_system - self.running,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+_DONE = object()
+
+
+async def _iterate_with_deadline(stream: AsyncIterator[Any], timeout: float) -> AsyncIterator[Any]:
+    """
+    비동기 이터레이터를 별도 작업 하나에서 끝까지 진행하고, 전체가 timeout 안에 끝나지 않으면 asyncio.TimeoutError.
+    항목마다 wait_for로 감싸면 스트림이 여러 작업에 걸쳐 진행되어 컨텍스트 변수(추적 span 등)가 깨지므로 대기열로 넘겨받는다.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=1)
+
+    async def _pump() -> None:
+        try:
+            async for item in stream:
+                await queue.put((item, None))
+            await queue.put((_DONE, None))
+        except Exception as e:
+            await queue.put((_DONE, e))
+
+    task = asyncio.create_task(_pump())
+    try:
+        while True:
+            item, error = await asyncio.wait_for(queue.get(), timeout=max(0.0, deadline - loop.time()))
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+class SessionRegistry:
+    """session_id별 MemoryAgent. 모든 에이전트는 같은 그래프를 공유하며, 오래 쓰지 않은 세션부터 정리한다."""
+
+    def __init__(self, graph: GraphInterface, maxsize: int = 10_000) -> None:
+        self._graph = graph
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._agents: "OrderedDict[str, MemoryAgent]" = OrderedDict()
+
+    def get(self, session_id: str) -> MemoryAgent:
+        with self._lock:
+            agent = self._agents.get(session_id)
+            if agent is None:
+                agent = self._agents[session_id] = MemoryAgent(self._graph, session_id=session_id)
+                while len(self._agents) > self._maxsize:
+                    self._agents.popitem(last=False)
+            else:
+                self._agents.move_to_end(session_id)
+            return agent
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: Optional[str] = None
+
+
+class ChatResponse(BaseModel):
+    output: str
+    session_id: str
+
+
+def create_app(
+    graph_factory: Optional[Callable[[], GraphInterface]] = None,
+    max_concurrency: Optional[int] = None,
+    max_queue: Optional[int] = None,
+    warmup: Optional[bool] = None,
+    request_timeout: Optional[float] = None,
+) -> FastAPI:
+    """
+    HTTP 앱을 만든다. 그래프는 앱 시작(lifespan) 시 워커마다 한 번 생성되고 모든 세션이 공유한다.
+    인자가 None이면 HTTP_MAX_CONCURRENCY(32), HTTP_MAX_QUEUE(64), HTTP_WARMUP(on), HTTP_REQUEST_TIMEOUT(120초)을 따른다.
+    """
+    if graph_factory is None:
+        from agent.graphs.factory import create_from_env as graph_factory
+    max_concurrency = _env_int("HTTP_MAX_CONCURRENCY", 32) if max_concurrency is None else max_concurrency
+    max_queue = _env_int("HTTP_MAX_QUEUE", 64) if max_queue is None else max_queue
+    warmup = _env_on("HTTP_WARMUP") if warmup is None else warmup
+    if request_timeout is None:
+        request_timeout = float(os.getenv("HTTP_REQUEST_TIMEOUT", "120"))
+
+    state: Dict[str, Any] = {"graph": None, "sessions": None, "ready": False, "warmup": None, "warmup_error": None}
+
+    async def _warmup(graph: GraphInterface) -> None:
+        try:
+            state["warmup"] = await graph.awarmup()
+        except Exception as e:
+            # 예열 실패는 준비되지 않은 상태로 남겨 /readyz가 오류와 함께 503을 돌려준다.
+            state["warmup_error"] = repr(e)
+            return
+        state["ready"] = True
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        graph = graph_factory()
+        state["graph"] = graph
+        state["sessions"] = SessionRegistry(graph, maxsize=_env_int("HTTP_MAX_SESSIONS", 10_000))
+        app.state.admission = AdmissionController(max_concurrency, max_queue)
+        warmup_task = asyncio.create_task(_warmup(graph)) if warmup else None
+        if warmup_task is None:
+            state["ready"] = True
+        try:
+            yield
+        finally:
+            if warmup_task is not None and not warmup_task.done():
+                warmup_task.cancel()
+            await graph.aclose()
+
+    app = FastAPI(title="Graph-driven Chatbot API", lifespan=lifespan)
+
+    def _too_busy() -> JSONResponse:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "서버가 처리 가능한 요청 수를 초과했습니다. 잠시 후 다시 시도하세요."},
+            headers={"Retry-After": "1"},
+        )
+
+    def _session(request: ChatRequest):
+        session_id = request.session_id or uuid.uuid4().hex
+        return session_id, state["sessions"].get(session_id)
+
+    @app.post("/chat", response_model=ChatResponse)
+    async def chat(request: ChatRequest):
+        # 입장 판정을 먼저 해야 거절될 요청이 세션 LRU의 자리를 차지해 살아 있는 세션을 밀어내지 않는다.
+        try:
+            async with app.state.admission.admit():
+                session_id, agent = _session(request)
+                output = await asyncio.wait_for(agent.achat(request.message), timeout=request_timeout)
+        except Saturated:
+            return _too_busy()
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="응답 시간이 초과되었습니다.")
+        return ChatResponse(output=output, session_id=session_id)
+
+    @app.post("/chat/stream")
+    async def chat_stream(request: ChatRequest):
+        admission = app.state.admission
+        # 거절은 스트림을 열기 전에 판정해야 429 상태 코드를 돌려줄 수 있으므로, 자리를 여기서 예약한다.
+        try:
+            admission.reserve()
+        except Saturated:
+            return _too_busy()
+        session_id, agent = _session(request)
+        released = False
+
+        def _release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                admission.release()
+
+        async def _events() -> AsyncIterator[str]:
+            try:
+                async with admission.slot():
+                    async for event in _iterate_with_deadline(agent.astream(request.message), request_timeout):
+                        if event["type"] == "end":
+                            event = {"type": "end", "output": event.get("output", ""), "session_id": session_id}
+                        elif event["type"] == "node":
+                            event = {"type": "node", "node": event["node"]}
+                        yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+            except asyncio.TimeoutError:
+                # 상태 코드는 이미 보냈으므로 error 이벤트로 알리고 스트림을 닫는다.
+                event = {"type": "error", "detail": "응답 시간이 초과되었습니다.", "session_id": session_id}
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            finally:
+                _release()
+
+        # 스트림이 시작되지 못한 채 끝나는 경우에도 예약을 반납한다(중복 반납은 무시).
+        return StreamingResponse(
+            _events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+            background=BackgroundTask(_release),
+        )
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz():
+        ready = state["graph"] is not None and state["ready"]
+        body = {
+            "ready": ready,
+            "sessions": len(state["sessions"]) if state["sessions"] is not None else 0,
+            "admission": app.state.admission.stats() if hasattr(app.state, "admission") else None,
+            "warmup": state["warmup"],
+            "error": state["warmup_error"],
+        }
+        return JSONResponse(status_code=200 if ready else 503, content=json.loads(json.dumps(body, default=str)))
+
+    @app.get("/metrics")
+    async def metrics_endpoint():
+        if not metrics.enabled():
+            raise HTTPException(status_code=404, detail="METRICS_ENABLED가 꺼져 있습니다.")
+        return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    workers = _env_int("HTTP_WORKERS", 1)
+    # 앱 팩토리를 임포트 경로로 지정해 각 워커 프로세스가 자체 앱/그래프를 만든다(임포트만으로는 앱을 만들지 않음).
+    uvicorn.run(
+        "ui.fastapi_app:create_app",
+        factory=True,
+        host=os.getenv("HTTP_HOST", "0.0.0.0"),
+        port=_env_int("HTTP_PORT", 8000),
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
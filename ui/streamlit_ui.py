@@ -18,6 +18,10 @@ def run():
     if "agent" not in st.session_state:
         try:
             graph = create_from_env()
+            if os.getenv("AGENT_WARMUP", "on").strip().lower() not in ("off", "false", "0", "no"):
+                # 모델 적재/MCP 연결/도구 조회를 미리 끝내 첫 요청이 콜드 스타트가 되지 않게 한다.
+                with st.spinner("모델과 도구를 준비하는 중..."):
+                    graph.warmup()
             st.session_state["agent"] = MemoryAgent(graph)
         except Exception as e:
             st.error(f"❌ 그래프 초기화 실패: {e}")
@@ -34,7 +38,21 @@ def run():
         st.session_state["messages"].append({"role": "user", "content": user_input})
         with st.chat_message("user"):
             st.markdown(user_input)
-        bot_response = agent.chat(user_input)
-        st.session_state["messages"].append({"role": "assistant", "content": bot_response})
         with st.chat_message("assistant"):
-            st.markdown(bot_response) 
\ No newline at end of file
+            status = st.empty()
+            placeholder = st.empty()
+            streamed = ""
+            bot_response = ""
+            # 노드 전이와 응답 토큰을 도착하는 대로 표시
+            for event in agent.stream(user_input):
+                if event["type"] == "node":
+                    status.caption(f"⏳ {event['node']}")
+                elif event["type"] == "token":
+                    streamed += event["text"]
+                    placeholder.markdown(streamed + "▌")
+                elif event["type"] == "end":
+                    output = event.get("output", "")
+                    bot_response = output if isinstance(output, str) else str(output)
+            status.empty()
+            placeholder.markdown(bot_response)
+        st.session_state["messages"].append({"role": "assistant", "content": bot_response}) 
\ No newline at end of file